@@ -1,60 +1,167 @@
 import asyncio
 import json
-import openai
 import httpx
-from typing import List, Dict, Tuple
-import os
+from typing import Callable, List, Dict, Optional, Tuple
 from dotenv import load_dotenv
+from agents.llm import chat_completion, make_openai_client
 import random
+from datetime import datetime, timedelta, timezone
 
 load_dotenv()
 
 class DamageAssessmentAgent:
-    def __init__(self):
-        self.openai_client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    def __init__(self, event_sink: Callable[[dict], None] = None, disaster_id: int = 1, region: Optional[str] = None,
+                 strict: bool = False):
+        # When set (e.g. running in a worker process), status updates go to
+        # this callable instead of being POSTed to /agent-update
+        self.event_sink = event_sink
+        # Strict agents raise on LLM and API failures instead of carrying
+        # on, so a job queue can retry the work
+        self.strict = strict
+        self.openai_client = make_openai_client()
         self.api_base_url = "http://localhost:8000/api/v1"
+        self.disaster_id = disaster_id
+        # Optional "minLng,minLat,maxLng,maxLat" limiting the shard to part of the disaster
+        self.region = region
+        self.lookback_hours = 72  # matches the damage_reports retention window
         
     async def send_agent_update(self, status: str, message: str, data: dict = None):
         """Send status update to the API"""
+        update = {
+            "agent_type": "damage_assessment",
+            "status": status,
+            "message": message,
+            "data": {"disaster_id": self.disaster_id, "region": self.region, **(data or {})}
+        }
+        if self.event_sink is not None:
+            self.event_sink(update)
+            return
         async with httpx.AsyncClient() as client:
             try:
-                await client.post(f"{self.api_base_url}/agent-update", json={
-                    "agent_type": "damage_assessment",
-                    "status": status,
-                    "message": message,
-                    "data": data or {}
-                })
+                await client.post(f"{self.api_base_url}/agent-update", json=update)
             except Exception as e:
                 print(f"Failed to send agent update: {e}")
     
-    async def get_damage_reports(self) -> List[Dict]:
-        """Fetch all damage reports from the API"""
+    async def get_summary(self) -> Dict:
+        """Fetch the precomputed report/task counters for this agent's disaster"""
         async with httpx.AsyncClient() as client:
             try:
-                response = await client.get(f"{self.api_base_url}/damage-reports/")
+                response = await client.get(f"{self.api_base_url}/disasters/{self.disaster_id}/summary")
+                response.raise_for_status()
+                return response.json()
+            except Exception as e:
+                print(f"Failed to fetch disaster summary: {e}")
+                if self.strict:
+                    raise
+                return {}
+    
+    def in_region(self, item: Dict) -> bool:
+        if self.region is None:
+            return True
+        min_lng, min_lat, max_lng, max_lat = (float(v) for v in self.region.split(","))
+        return min_lng <= item["longitude"] <= max_lng and min_lat <= item["latitude"] <= max_lat
+
+    def scoped_params(self, **params) -> Dict:
+        """Query parameters restricted to this agent's disaster and region"""
+        params["disaster_id"] = self.disaster_id
+        if self.region is not None:
+            params["bbox"] = self.region
+        return params
+
+    def lookback_since(self) -> str:
+        """Start of the lookback window, truncated to the minute so repeated
+        fetches send the same query and can be served from the API's cache"""
+        since = datetime.now(timezone.utc) - timedelta(hours=self.lookback_hours)
+        return since.replace(second=0, microsecond=0).isoformat()
+
+    async def get_hotspots(self, limit: int = 5) -> List[Dict]:
+        """Fetch the strongest points of the live time-decayed damage heat map"""
+        async with httpx.AsyncClient() as client:
+            try:
+                # The heat map covers the whole disaster; a region shard
+                # keeps the peaks inside its box
+                response = await client.get(
+                    f"{self.api_base_url}/disasters/{self.disaster_id}/hotspots",
+                    params={"limit": limit if self.region is None else limit * 4}
+                )
+                response.raise_for_status()
+                return [s for s in response.json().get("hotspots", []) if self.in_region(s)][:limit]
+            except Exception as e:
+                print(f"Failed to fetch hotspots: {e}")
+                if self.strict:
+                    raise
+                return []
+    
+    async def get_damage_reports(self, limit: int = 100) -> List[Dict]:
+        """Fetch the most recent damage reports for this agent's disaster"""
+        # Bounding by time lets Postgres prune old damage_reports partitions
+        async with httpx.AsyncClient() as client:
+            try:
+                response = await client.get(
+                    f"{self.api_base_url}/damage-reports/",
+                    params=self.scoped_params(since=self.lookback_since(), limit=limit)
+                )
+                response.raise_for_status()
                 return response.json()
             except Exception as e:
                 print(f"Failed to fetch damage reports: {e}")
+                if self.strict:
+                    raise
+                return []
+    
+    async def get_incidents(self, limit: int = 100) -> List[Dict]:
+        """Fetch the most severe recent incidents (merged reports) for this agent's disaster"""
+        async with httpx.AsyncClient() as client:
+            try:
+                response = await client.get(
+                    f"{self.api_base_url}/incidents/",
+                    params=self.scoped_params(since=self.lookback_since(), limit=limit)
+                )
+                response.raise_for_status()
+                return response.json()
+            except Exception as e:
+                print(f"Failed to fetch incidents: {e}")
+                if self.strict:
+                    raise
                 return []
     
-    def analyze_damage_pattern(self, reports: List[Dict]) -> Dict:
-        """Analyze patterns in damage reports to assess overall situation"""
-        if not reports:
+    def analyze_damage_pattern(self, incidents: List[Dict], summary: Dict = None,
+                               hotspots: List[Dict] = None) -> Dict:
+        """Analyze patterns in damage incidents to assess overall situation"""
+        if not incidents:
             return {"severity": "low", "confidence": 0.0, "analysis": "No damage reports available"}
         
-        # Group reports by location proximity and damage type
-        high_severity_reports = [r for r in reports if r.get("severity", 0) >= 7]
-        verified_reports = [r for r in reports if r.get("verified", False)]
+        if not summary:
+            # No server-side counters available; count the sample we have
+            summary = {
+                "total_reports": sum(i.get("report_count", 1) for i in incidents),
+                "high_severity_reports": sum(i.get("report_count", 1) for i in incidents if i.get("severity", 0) >= 7),
+                "verified_reports": sum(i.get("report_count", 1) for i in incidents if i.get("verified", False)),
+            }
+        
+        # Corroborating reports are already merged, so each sample is a distinct incident
+        sample = [
+            {key: incident.get(key) for key in (
+                "latitude", "longitude", "damage_type", "severity", "confidence",
+                "verified", "report_count", "source_count", "last_report_at")}
+            for incident in incidents[:5]
+        ]
         
         prompt = f"""
         Analyze these damage reports for patterns and overall disaster impact:
         
-        Total reports: {len(reports)}
-        High severity reports (7+): {len(high_severity_reports)}
-        Verified reports: {len(verified_reports)}
+        Total reports: {summary.get("total_reports", 0)}
+        High severity reports (7+): {summary.get("high_severity_reports", 0)}
+        Verified reports: {summary.get("verified_reports", 0)}
+        Reports by damage type: {json.dumps(summary.get("damage_type_counts", {}))}
+        Reports by source: {json.dumps(summary.get("source_counts", {}))}
+        Reports per minute (rolling): {json.dumps(summary.get("reports_per_minute", {}))}
+        
+        Damage hotspots (peaks of severity x confidence, decayed over time; strongest first):
+        {json.dumps(hotspots or [], indent=2)}
         
-        Sample reports:
-        {json.dumps(reports[:5], indent=2)}
+        Most severe incidents (each merges corroborating reports from the same place and time):
+        {json.dumps(sample, indent=2)}
         
         Provide analysis in JSON format:
         {{
@@ -71,7 +178,9 @@ class DamageAssessmentAgent:
         """
         
         try:
-            response = self.openai_client.chat.completions.create(
+            response = chat_completion(
+                self.openai_client,
+                "damage_assessment",
                 model="gpt-4",
                 messages=[{"role": "user", "content": prompt}],
                 temperature=0.3
@@ -81,6 +190,8 @@ class DamageAssessmentAgent:
             return analysis
         except Exception as e:
             print(f"Error analyzing damage patterns: {e}")
+            if self.strict:
+                raise
             return {
                 "overall_severity": "unknown",
                 "confidence": 0.0,
@@ -95,7 +206,7 @@ class DamageAssessmentAgent:
             # Create high-priority rescue tasks for critical zones
             for zone in analysis.get("critical_zones", []):
                 task = {
-                    "disaster_id": 1,
+                    "disaster_id": self.disaster_id,
                     "title": f"Emergency Response - {zone.get('description', 'Critical Zone')}",
                     "description": f"High priority response needed. Severity: {zone.get('severity', 'unknown')}",
                     "task_type": "rescue",
@@ -108,15 +219,18 @@ class DamageAssessmentAgent:
                 async with httpx.AsyncClient() as client:
                     try:
                         response = await client.post(f"{self.api_base_url}/tasks/", json=task)
+                        response.raise_for_status()
                         tasks.append(response.json())
                     except Exception as e:
                         print(f"Failed to create task: {e}")
+                        if self.strict:
+                            raise
         
         # Create assessment tasks for medium severity areas
         if analysis.get("overall_severity") in ["medium", "high"]:
             for action in analysis.get("recommended_actions", []):
                 task = {
-                    "disaster_id": 1,
+                    "disaster_id": self.disaster_id,
                     "title": f"Assessment Task: {action}",
                     "description": f"Recommended action based on damage assessment: {action}",
                     "task_type": "assessment",
@@ -129,9 +243,12 @@ class DamageAssessmentAgent:
                 async with httpx.AsyncClient() as client:
                     try:
                         response = await client.post(f"{self.api_base_url}/tasks/", json=task)
+                        response.raise_for_status()
                         tasks.append(response.json())
                     except Exception as e:
                         print(f"Failed to create task: {e}")
+                        if self.strict:
+                            raise
                         break  # Only create one task to avoid spam
         
         return tasks
@@ -141,25 +258,30 @@ class DamageAssessmentAgent:
         await self.send_agent_update("active", "Damage Assessment Agent started")
         
         try:
-            # Fetch all damage reports
-            await self.send_agent_update("processing", "Fetching damage reports...")
-            reports = await self.get_damage_reports()
+            # Counts come from the disaster summary; only the most severe
+            # incidents are needed for the prompt
+            await self.send_agent_update("processing", "Fetching damage summary...")
+            summary = await self.get_summary()
+            incidents = await self.get_incidents(limit=5)
+            hotspots = await self.get_hotspots(limit=5)
             
-            if not reports:
+            if not incidents:
                 await self.send_agent_update("waiting", "No damage reports found. Waiting for data...")
                 return
             
-            await self.send_agent_update("analyzing", f"Analyzing {len(reports)} damage reports...")
+            total_reports = summary.get("total_reports", sum(i.get("report_count", 1) for i in incidents))
+            await self.send_agent_update("analyzing", f"Analyzing {total_reports} damage reports...")
             
             # Analyze damage patterns
-            analysis = self.analyze_damage_pattern(reports)
+            analysis = await asyncio.to_thread(self.analyze_damage_pattern, incidents, summary, hotspots)
             
             await self.send_agent_update(
                 "analysis_complete",
                 f"Assessment complete. Overall severity: {analysis.get('overall_severity', 'unknown')}",
                 {
                     "analysis": analysis,
-                    "reports_analyzed": len(reports)
+                    "reports_analyzed": total_reports,
+                    "incidents_analyzed": len(incidents)
                 }
             )
             
@@ -176,6 +298,8 @@ class DamageAssessmentAgent:
             
         except Exception as e:
             await self.send_agent_update("error", f"Assessment error: {str(e)}")
+            if self.strict:
+                raise
         
         await self.send_agent_update("completed", "Damage assessment cycle completed")
 
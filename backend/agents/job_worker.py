@@ -0,0 +1,149 @@
+"""
+Worker that drains the durable agent job queue (agent_jobs table).
+
+Each job is one unit of agent work:
+
+    analyze_post     {"text": ..., "latitude": ..., "longitude": ..., "disaster_id": ...}
+    assess_disaster  {"disaster_id": N, "region": "minLng,minLat,maxLng,maxLat"}
+    plan_region      {"disaster_id": N, "region": "minLng,minLat,maxLng,maxLat"}
+
+("region" is optional and scopes the job to part of the disaster.)
+
+Run as many workers as needed, on as many machines as needed; claims use
+FOR UPDATE SKIP LOCKED so they never hand the same job to two workers at
+once. Handlers run the agents in strict mode, so a failed LLM or API call
+fails the job, which is retried with backoff and dead-lettered after
+max_attempts. A job whose worker dies is retried once its visibility
+timeout expires, so handlers must tolerate running more than once.
+
+    python -m agents.job_worker --concurrency 4
+    python -m agents.job_worker --kinds analyze_post --visibility-timeout 60
+"""
+import argparse
+import asyncio
+import os
+import socket
+import sys
+import traceback
+import uuid
+from typing import Dict, List, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.crud import jobs as job_crud
+
+async def handle_analyze_post(payload: Dict):
+    from agents.social_media_agent import SocialMediaAgent
+    await SocialMediaAgent(strict=True).process_post(
+        payload["text"],
+        latitude=payload.get("latitude"),
+        longitude=payload.get("longitude"),
+        disaster_id=payload.get("disaster_id", 1),
+    )
+
+async def handle_assess_disaster(payload: Dict):
+    from agents.damage_assessment_agent import DamageAssessmentAgent
+    await DamageAssessmentAgent(
+        disaster_id=payload["disaster_id"], region=payload.get("region"), strict=True
+    ).run_assessment_cycle()
+
+async def handle_plan_region(payload: Dict):
+    from agents.resource_planning_agent import ResourcePlanningAgent
+    # Without a disaster or region the job plans over every pending task
+    # and available resource
+    await ResourcePlanningAgent(
+        disaster_id=payload.get("disaster_id"), region=payload.get("region"), strict=True
+    ).run_planning_cycle()
+
+HANDLERS = {
+    "analyze_post": handle_analyze_post,
+    "assess_disaster": handle_assess_disaster,
+    "plan_region": handle_plan_region,
+}
+
+def _with_session(fn, *args, **kwargs):
+    db = SessionLocal()
+    try:
+        return fn(db, *args, **kwargs)
+    finally:
+        db.close()
+
+class JobWorker:
+    def __init__(self, worker_id: str, concurrency: int = 1, kinds: Optional[List[str]] = None,
+                 visibility_timeout: int = None, poll_interval: float = 1.0):
+        self.worker_id = worker_id
+        self.concurrency = concurrency
+        self.kinds = kinds
+        self.visibility_timeout = visibility_timeout or settings.job_visibility_timeout_seconds
+        self.poll_interval = poll_interval
+        self.active = set()
+
+    async def claim(self, batch_size: int) -> List[Dict]:
+        return await asyncio.to_thread(
+            _with_session, job_crud.claim_jobs, self.worker_id, batch_size, self.kinds, self.visibility_timeout
+        )
+
+    async def heartbeat(self, job: Dict):
+        """Keep extending the lease while the handler runs"""
+        while True:
+            await asyncio.sleep(self.visibility_timeout / 3)
+            held = await asyncio.to_thread(
+                _with_session, job_crud.extend_lease, job["id"], self.worker_id, self.visibility_timeout
+            )
+            if not held:
+                print(f"⚠️ Lost lease on job {job['id']}")
+                return
+
+    async def run_job(self, job: Dict):
+        print(f"🔧 Job {job['id']} {job['kind']} (attempt {job['attempts']}/{job['max_attempts']})")
+        heartbeat = asyncio.create_task(self.heartbeat(job))
+        try:
+            handler = HANDLERS.get(job["kind"])
+            if handler is None:
+                raise ValueError(f"No handler for job kind '{job['kind']}'")
+            await handler(job["payload"] or {})
+        except Exception as e:
+            print(f"❌ Job {job['id']} failed: {e}")
+            error = f"{e}\n{traceback.format_exc()}"
+            await asyncio.to_thread(
+                _with_session, job_crud.fail_job, job["id"], self.worker_id, error, job["attempts"]
+            )
+        else:
+            print(f"✅ Job {job['id']} done")
+            await asyncio.to_thread(_with_session, job_crud.complete_job, job["id"], self.worker_id)
+        finally:
+            heartbeat.cancel()
+
+    async def run(self):
+        print(f"🤖 Job worker {self.worker_id} started (concurrency {self.concurrency})")
+        while True:
+            free = self.concurrency - len(self.active)
+            jobs = await self.claim(free) if free > 0 else []
+            for job in jobs:
+                task = asyncio.create_task(self.run_job(job))
+                self.active.add(task)
+                task.add_done_callback(self.active.discard)
+            if not jobs:
+                await asyncio.sleep(self.poll_interval)
+
+def main():
+    parser = argparse.ArgumentParser(description="Run agent jobs from the durable queue")
+    parser.add_argument("--concurrency", type=int, default=1, help="jobs to run at once")
+    parser.add_argument("--kinds", nargs="+", choices=sorted(HANDLERS), help="only claim these job kinds")
+    parser.add_argument("--worker-id", default=f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}")
+    parser.add_argument("--visibility-timeout", type=int, default=settings.job_visibility_timeout_seconds,
+                        help="seconds a claimed job stays leased without a heartbeat")
+    parser.add_argument("--poll-interval", type=float, default=1.0, help="seconds to wait when the queue is empty")
+    args = parser.parse_args()
+
+    worker = JobWorker(args.worker_id, concurrency=args.concurrency, kinds=args.kinds,
+                       visibility_timeout=args.visibility_timeout, poll_interval=args.poll_interval)
+    try:
+        asyncio.run(worker.run())
+    except KeyboardInterrupt:
+        print("🏁 Job worker stopped")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""
+Shared, rate-limited LLM calls for the agents.
+
+Every chat completion goes through chat_completion(), which hands it to
+the process-wide LLMGateway:
+
+  - token buckets keep requests and tokens per minute under the
+    provider's limits (tokens are estimated up front and corrected from
+    the response's usage)
+  - a global cap bounds calls in flight
+  - waiting calls are admitted by priority class, resource planning
+    first, then damage assessment, then social media triage, and in
+    arrival order within a class
+  - 429s, 5xx and connection errors are retried with exponential
+    backoff (or the server's Retry-After), releasing the slot while
+    backing off
+
+Latency, token usage, failures, retries and time spent queued are
+recorded per agent in the API's /metrics when the agent runs inside the
+server. Limits are per process: agents in "process" mode workers or a
+separate job worker each get their own gateway, so size the limits
+accordingly.
+
+Calls block the calling thread while queued; async agents run them with
+asyncio.to_thread. Clients come from make_openai_client(), which returns
+one shared client per endpoint and honours OPENAI_BASE_URL so the agents
+can be pointed at benchmarks/fake_llm_server.py instead of the real API.
+"""
+import heapq
+import itertools
+import os
+import random
+import threading
+import time
+from typing import Optional
+
+import openai
+
+from app.core.config import settings
+from app.core.metrics import LLM_QUEUE_WAIT, LLM_RETRIES, observe_llm_call, register_llm_gateway_metrics
+
+# Lower is served first
+PRIORITY_CLASSES = {"resource_planning": 0, "damage_assessment": 1, "social_media": 2}
+DEFAULT_PRIORITY = 3
+DEFAULT_COMPLETION_TOKENS = 500
+RETRYABLE_ERRORS = (openai.RateLimitError, openai.InternalServerError,
+                    openai.APIConnectionError, openai.APITimeoutError)
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+def make_openai_client() -> openai.OpenAI:
+    """The process's client for the configured endpoint; retries are left to the gateway"""
+    api_key = settings.openai_api_key or os.getenv("OPENAI_API_KEY")
+    base_url = settings.openai_base_url or None
+    with _clients_lock:
+        client = _clients.get((api_key, base_url))
+        if client is None:
+            client = openai.OpenAI(api_key=api_key, base_url=base_url, max_retries=0)
+            _clients[(api_key, base_url)] = client
+        return client
+
+class TokenBucket:
+    """Refills `per_minute` units a minute up to one minute's worth.
+
+    Reservations may overdraw the bucket; the caller waits until the
+    balance would be back at zero, which keeps admission order intact.
+    """
+
+    def __init__(self, per_minute: float):
+        self.rate = per_minute / 60.0
+        self.capacity = float(per_minute)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float, now: float) -> float:
+        """Take `amount`; seconds to wait before using it"""
+        self._refill(now)
+        self.tokens -= amount
+        return max(0.0, -self.tokens / self.rate) if self.rate > 0 else 0.0
+
+    def adjust(self, delta: float):
+        """Give back (positive) or charge (negative) tokens after the fact"""
+        self.tokens = min(self.capacity, self.tokens + delta)
+
+def estimate_tokens(kwargs: dict) -> int:
+    prompt_chars = sum(len(str(m.get("content", ""))) for m in kwargs.get("messages", []))
+    return prompt_chars // 4 + (kwargs.get("max_tokens") or DEFAULT_COMPLETION_TOKENS)
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    response = getattr(error, "response", None)
+    value = response.headers.get("retry-after") if response is not None else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+class LLMGateway:
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float, max_concurrent: int,
+                 max_retries: int = 4, retry_base_seconds: float = 1.0, retry_max_seconds: float = 30.0):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_concurrent = max_concurrent
+        self.max_retries = max_retries
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self.in_flight = 0
+        self._waiting = []  # (priority, arrival) tickets
+        self._arrivals = itertools.count()
+        self._cond = threading.Condition()
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiting)
+
+    def _acquire(self, priority: int, estimated_tokens: int) -> float:
+        """Wait for a slot and rate budget; seconds spent waiting"""
+        started = time.monotonic()
+        ticket = (priority, next(self._arrivals))
+        with self._cond:
+            heapq.heappush(self._waiting, ticket)
+            while self._waiting[0] != ticket or self.in_flight >= self.max_concurrent:
+                self._cond.wait()
+            heapq.heappop(self._waiting)
+            self.in_flight += 1
+            now = time.monotonic()
+            delay = max(self.requests.reserve(1, now), self.tokens.reserve(estimated_tokens, now))
+            # The next in line may be able to go as well
+            self._cond.notify_all()
+        if delay > 0:
+            time.sleep(delay)
+        return time.monotonic() - started
+
+    def _release(self, token_correction: float = 0.0):
+        with self._cond:
+            self.in_flight -= 1
+            self.tokens.adjust(token_correction)
+            self._cond.notify_all()
+
+    def backoff(self, attempt: int, error: Exception) -> float:
+        hinted = retry_after_seconds(error)
+        if hinted is not None:
+            return min(hinted, self.retry_max_seconds)
+        ceiling = min(self.retry_max_seconds, self.retry_base_seconds * 2 ** attempt)
+        return random.uniform(ceiling / 2, ceiling)
+
+    def call(self, client, agent_type: str, **kwargs):
+        """client.chat.completions.create(**kwargs), scheduled, retried and measured"""
+        priority = PRIORITY_CLASSES.get(agent_type, DEFAULT_PRIORITY)
+        model = kwargs.get("model", "unknown")
+        estimated = estimate_tokens(kwargs)
+        for attempt in range(self.max_retries + 1):
+            waited = self._acquire(priority, estimated)
+            LLM_QUEUE_WAIT.labels(agent_type, str(priority)).observe(waited)
+            correction = 0.0
+            try:
+                with observe_llm_call(agent_type, model) as record_usage:
+                    response = client.chat.completions.create(**kwargs)
+                    record_usage(response)
+                usage = getattr(response, "usage", None)
+                if usage is not None and usage.total_tokens:
+                    correction = estimated - usage.total_tokens
+                return response
+            except RETRYABLE_ERRORS as e:
+                if attempt == self.max_retries:
+                    raise
+                LLM_RETRIES.labels(agent_type, type(e).__name__).inc()
+                delay = self.backoff(attempt, e)
+            finally:
+                self._release(correction)
+            time.sleep(delay)
+
+_gateway: Optional[LLMGateway] = None
+_gateway_lock = threading.Lock()
+
+def get_gateway() -> LLMGateway:
+    global _gateway
+    with _gateway_lock:
+        if _gateway is None:
+            _gateway = LLMGateway(
+                requests_per_minute=settings.llm_requests_per_minute,
+                tokens_per_minute=settings.llm_tokens_per_minute,
+                max_concurrent=settings.llm_max_concurrency,
+                max_retries=settings.llm_max_retries,
+                retry_base_seconds=settings.llm_retry_base_seconds,
+                retry_max_seconds=settings.llm_retry_max_seconds,
+            )
+            register_llm_gateway_metrics(_gateway)
+        return _gateway
+
+def chat_completion(client, agent_type: str, **kwargs):
+    """client.chat.completions.create(**kwargs) through the shared gateway"""
+    return get_gateway().call(client, agent_type, **kwargs)
@@ -1,63 +1,101 @@
 import asyncio
 import json
-import openai
 import httpx
-from typing import List, Dict
-import os
+from typing import Callable, List, Dict, Optional
 from dotenv import load_dotenv
+from agents.llm import chat_completion, make_openai_client
 
 load_dotenv()
 
 class ResourcePlanningAgent:
-    def __init__(self):
-        self.openai_client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    def __init__(self, event_sink: Callable[[dict], None] = None, disaster_id: Optional[int] = None,
+                 region: Optional[str] = None, strict: bool = False):
+        # When set (e.g. running in a worker process), status updates go to
+        # this callable instead of being POSTed to /agent-update
+        self.event_sink = event_sink
+        # Shard scope: only this disaster's tasks and, with a
+        # "minLng,minLat,maxLng,maxLat" region, only tasks and resources
+        # inside it. Unscoped, the agent plans over everything.
+        self.disaster_id = disaster_id
+        self.region = region
+        # Strict agents raise on LLM and API failures instead of carrying
+        # on, so a job queue can retry the work
+        self.strict = strict
+        self.openai_client = make_openai_client()
         self.api_base_url = "http://localhost:8000/api/v1"
         
     async def send_agent_update(self, status: str, message: str, data: dict = None):
         """Send status update to the API"""
+        update = {
+            "agent_type": "resource_planning",
+            "status": status,
+            "message": message,
+            "data": {"disaster_id": self.disaster_id, "region": self.region, **(data or {})}
+        }
+        if self.event_sink is not None:
+            self.event_sink(update)
+            return
         async with httpx.AsyncClient() as client:
             try:
-                await client.post(f"{self.api_base_url}/agent-update", json={
-                    "agent_type": "resource_planning",
-                    "status": status,
-                    "message": message,
-                    "data": data or {}
-                })
+                await client.post(f"{self.api_base_url}/agent-update", json=update)
             except Exception as e:
                 print(f"Failed to send agent update: {e}")
     
-    async def get_tasks(self) -> List[Dict]:
-        """Fetch all tasks from the API"""
+    async def get_tasks(self, status: str = None) -> List[Dict]:
+        """Fetch this shard's tasks from the API, optionally filtered by status server-side"""
+        params = {"status": status} if status else {}
+        if self.disaster_id is not None:
+            params["disaster_id"] = self.disaster_id
+        if self.region is not None:
+            params["bbox"] = self.region
         async with httpx.AsyncClient() as client:
             try:
-                response = await client.get(f"{self.api_base_url}/tasks/")
+                response = await client.get(f"{self.api_base_url}/tasks/", params=params)
                 response.raise_for_status()  # Raise an exception for bad status codes
                 return response.json()
             except httpx.HTTPStatusError as e:
                 print(f"HTTP error fetching tasks: {e.response.status_code} - {e.response.text}")
+                if self.strict:
+                    raise
                 return []
             except json.JSONDecodeError as e:
                 print(f"JSON decode error fetching tasks: {e}")
+                if self.strict:
+                    raise
                 return []
             except Exception as e:
                 print(f"Failed to fetch tasks: {e}")
+                if self.strict:
+                    raise
                 return []
     
-    async def get_resources(self) -> List[Dict]:
-        """Fetch all resources from the API"""
+    async def get_resources(self, status: str = None) -> List[Dict]:
+        """Fetch this shard's resources from the API, optionally filtered by status server-side"""
+        params = {"status": status} if status else {}
+        # Resources aren't tied to a disaster, so shards can see the same
+        # units; the assign endpoint deploys each at most once, and a
+        # region keeps a shard to the units near it
+        if self.region is not None:
+            params["bbox"] = self.region
         async with httpx.AsyncClient() as client:
             try:
-                response = await client.get(f"{self.api_base_url}/resources/")
+                response = await client.get(f"{self.api_base_url}/resources/", params=params)
                 response.raise_for_status()  # Raise an exception for bad status codes
                 return response.json()
             except httpx.HTTPStatusError as e:
                 print(f"HTTP error fetching resources: {e.response.status_code} - {e.response.text}")
+                if self.strict:
+                    raise
                 return []
             except json.JSONDecodeError as e:
                 print(f"JSON decode error fetching resources: {e}")
+                if self.strict:
+                    raise
                 return []
             except Exception as e:
                 print(f"Failed to fetch resources: {e}")
+                if self.strict:
+                    raise
                 return []
     
     def optimize_resource_allocation(self, tasks: List[Dict], resources: List[Dict]) -> Dict:
@@ -104,7 +142,9 @@ class ResourcePlanningAgent:
         """
         
         try:
-            response = self.openai_client.chat.completions.create(
+            response = chat_completion(
+                self.openai_client,
+                "resource_planning",
                 model="gpt-4",
                 messages=[{"role": "user", "content": prompt}],
                 temperature=0.3
@@ -114,6 +154,8 @@ class ResourcePlanningAgent:
             return allocation_plan
         except Exception as e:
             print(f"Error optimizing allocation: {e}")
+            if self.strict:
+                raise
             return {
                 "allocations": [],
                 "overall_efficiency": 0.0,
@@ -141,16 +183,27 @@ class ResourcePlanningAgent:
                         resource_names.append(resource_types.get(res_id, f"Resource {res_id}"))
                     
                     # Assign resources to the task
-                    await client.put(
+                    response = await client.put(
                         f"{self.api_base_url}/tasks/{task_id}/assign",
                         json={"resource_ids": resource_ids}
                     )
+                    if response.status_code == 409:
+                        # Another planner shard assigned the task or deployed
+                        # one of these resources first; nothing was changed
+                        await self.send_agent_update(
+                            "assignment_conflict",
+                            f"Task {task_id} skipped: {response.json().get('detail', 'conflict')}",
+                            {"task_id": task_id, "resource_ids": resource_ids}
+                        )
+                        continue
+                    response.raise_for_status()
                     
                     # Also update status to assigned
-                    await client.put(
+                    response = await client.put(
                         f"{self.api_base_url}/tasks/{task_id}",
                         params={"status": "assigned"}
                     )
+                    response.raise_for_status()
                     
                     await self.send_agent_update(
                         "task_assigned",
@@ -164,6 +217,8 @@ class ResourcePlanningAgent:
                     )
                 except Exception as e:
                     print(f"Failed to assign resources to task {task_id}: {e}")
+                    if self.strict:
+                        raise
     
     async def create_emergency_resources(self):
         """Create some emergency resources if none exist"""
@@ -200,13 +255,16 @@ class ResourcePlanningAgent:
             async with httpx.AsyncClient() as client:
                 for resource in emergency_resources:
                     try:
-                        await client.post(f"{self.api_base_url}/resources/", json=resource)
+                        response = await client.post(f"{self.api_base_url}/resources/", json=resource)
+                        response.raise_for_status()
                         await self.send_agent_update(
                             "resource_created", 
                             f"Created emergency resource: {resource['name']}"
                         )
                     except Exception as e:
                         print(f"Failed to create resource: {e}")
+                        if self.strict:
+                            raise
     
     async def run_planning_cycle(self):
         """Run a complete resource planning cycle"""
@@ -214,22 +272,24 @@ class ResourcePlanningAgent:
         await self.send_agent_update("active", "Resource Planning Agent started")
         
         try:
-            # Ensure we have some resources
-            print("🏗️ Creating emergency resources...")
-            await self.create_emergency_resources()
+            # Ensure we have some resources; the demo defaults are in New
+            # York, so region shards don't seed them
+            if self.region is None:
+                print("🏗️ Creating emergency resources...")
+                await self.create_emergency_resources()
             
             # Fetch current tasks and resources
             print("📋 Fetching tasks and resources...")
             await self.send_agent_update("processing", "Fetching tasks and resources...")
             
-            tasks = await self.get_tasks()
-            resources = await self.get_resources()
+            tasks = await self.get_tasks(status="pending")
+            resources = await self.get_resources(status="available")
             
             print(f"📊 Found {len(tasks)} tasks and {len(resources)} resources")
             
             if not tasks:
-                print("⏳ No tasks found. Waiting for assignments...")
-                await self.send_agent_update("waiting", "No tasks found. Waiting for assignments...")
+                print("⏳ No pending tasks found. Waiting for assignments...")
+                await self.send_agent_update("waiting", "No pending tasks found. Waiting for assignments...")
                 return
             
             print(f"🧮 Optimizing allocation for {len(tasks)} tasks and {len(resources)} resources...")
@@ -239,7 +299,7 @@ class ResourcePlanningAgent:
             )
             
             # Optimize resource allocation
-            allocation_plan = self.optimize_resource_allocation(tasks, resources)
+            allocation_plan = await asyncio.to_thread(self.optimize_resource_allocation, tasks, resources)
             print(f"📋 Allocation plan: {allocation_plan}")
             
             if allocation_plan.get("allocations"):
@@ -270,6 +330,8 @@ class ResourcePlanningAgent:
         except Exception as e:
             print(f"❌ Planning error: {str(e)}")
             await self.send_agent_update("error", f"Planning error: {str(e)}")
+            if self.strict:
+                raise
         
         print("🏁 Resource planning cycle completed")
         await self.send_agent_update("completed", "Resource planning cycle completed")
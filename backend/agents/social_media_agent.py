@@ -1,29 +1,42 @@
 import asyncio
 import json
-import openai
 import httpx
-from typing import List, Dict
-import os
+from typing import Callable, List, Dict
 from dotenv import load_dotenv
+from agents.gazetteer import get_gazetteer
+from agents.llm import chat_completion, make_openai_client
 
 load_dotenv()
 
 class SocialMediaAgent:
-    def __init__(self):
-        self.openai_client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    def __init__(self, event_sink: Callable[[dict], None] = None, disaster_id: int = 1, strict: bool = False):
+        # When set (e.g. running in a worker process), status updates go to
+        # this callable instead of being POSTed to /agent-update
+        self.event_sink = event_sink
+        # Strict agents raise on LLM and API failures instead of carrying
+        # on, so a job queue can retry the work
+        self.strict = strict
+        self.openai_client = make_openai_client()
+        self.gazetteer = get_gazetteer()
         self.api_base_url = "http://localhost:8000/api/v1"
+        # Disaster that monitored posts are reported against
+        self.disaster_id = disaster_id
         
     async def send_agent_update(self, status: str, message: str, data: dict = None):
         """Send status update to the API"""
         print(f"🤖 Agent Update: [{status.upper()}] {message}")
+        update = {
+            "agent_type": "social_media",
+            "status": status,
+            "message": message,
+            "data": data or {}
+        }
+        if self.event_sink is not None:
+            self.event_sink(update)
+            return
         async with httpx.AsyncClient() as client:
             try:
-                await client.post(f"{self.api_base_url}/agent-update", json={
-                    "agent_type": "social_media",
-                    "status": status,
-                    "message": message,
-                    "data": data or {}
-                })
+                await client.post(f"{self.api_base_url}/agent-update", json=update)
             except Exception as e:
                 print(f"Failed to send agent update: {e}")
     
@@ -60,7 +73,9 @@ class SocialMediaAgent:
         """
         
         try:
-            response = self.openai_client.chat.completions.create(
+            response = chat_completion(
+                self.openai_client,
+                "social_media",
                 model="gpt-4",
                 messages=[{"role": "user", "content": prompt}],
                 temperature=0.3
@@ -70,18 +85,33 @@ class SocialMediaAgent:
             return analysis
         except Exception as e:
             print(f"Error analyzing post: {e}")
+            if self.strict:
+                raise
             return {
                 "is_disaster_related": False,
                 "confidence": 0.0,
                 "error": str(e)
             }
     
-    async def create_damage_report(self, analysis: Dict, post_text: str, latitude: float = None, longitude: float = None):
+    async def create_damage_report(self, analysis: Dict, post_text: str, latitude: float = None, longitude: float = None,
+                                   disaster_id: int = 1):
         """Create a damage report based on social media analysis"""
         if not analysis.get("is_disaster_related") or analysis.get("confidence", 0) < 0.5:
             return None
             
-        # Use default coordinates if none provided (e.g., city center)
+        confidence = analysis.get("confidence", 0.5)
+        located = ""
+        if latitude is None or longitude is None:
+            # Resolve the place the post mentions offline; fall back to the
+            # city center, with less confidence since the position is a guess.
+            # A match's score says how much of the mention it covered, not
+            # how sure the damage is, so it is noted rather than applied
+            place = self.gazetteer.resolve(analysis.get("location_mentioned") or "")
+            if place is not None:
+                latitude, longitude = place.latitude, place.longitude
+                located = f" [located: {place.name}, match {place.score:.2f}]"
+            else:
+                confidence = round(confidence * 0.5, 3)
         lat = latitude or 40.7128  # NYC coordinates as default
         lng = longitude or -74.0060
         
@@ -94,14 +124,14 @@ class SocialMediaAgent:
         damage_type = analysis.get("damage_type") or "unknown"
         
         damage_report = {
-            "disaster_id": 1,  # Assuming active disaster with ID 1
+            "disaster_id": disaster_id,
             "latitude": lat,
             "longitude": lng,
             "damage_type": damage_type,
             "severity": severity,
-            "description": f"Social media report: {post_text[:200]}...",
+            "description": f"Social media report: {post_text[:200]}...{located}",
             "source": "social_media",
-            "confidence": analysis.get("confidence", 0.5),
+            "confidence": confidence,
             "verified": False
         }
         
@@ -112,14 +142,54 @@ class SocialMediaAgent:
                 return response.json()
             except httpx.HTTPStatusError as e:
                 print(f"HTTP error creating damage report: {e.response.status_code} - {e.response.text}")
+                if self.strict:
+                    raise
                 return None
             except json.JSONDecodeError as e:
                 print(f"JSON decode error: {e}")
+                if self.strict:
+                    raise
                 return None
             except Exception as e:
                 print(f"Failed to create damage report: {e}")
+                if self.strict:
+                    raise
                 return None
     
+    async def process_post(self, post: str, latitude: float = None, longitude: float = None, disaster_id: int = None):
+        """Analyze one post and file a damage report if it is disaster related"""
+        if disaster_id is None:
+            disaster_id = self.disaster_id
+        print("🔍 Analyzing with OpenAI...")
+        # The LLM call may queue in the gateway; keep it off the event loop
+        analysis = await asyncio.to_thread(self.analyze_social_media_post, post)
+        print(f"📊 Analysis result: {analysis}")
+        
+        if analysis.get("is_disaster_related") and analysis.get("confidence", 0) > 0.5:
+            # Create damage report
+            print("⚠️ Disaster-related content detected! Creating damage report...")
+            report = await self.create_damage_report(analysis, post, latitude, longitude, disaster_id)
+            
+            if report:
+                print(f"✅ Damage report created successfully! ID: {report.get('id')}")
+                await self.send_agent_update(
+                    "found_incident", 
+                    f"Disaster-related post detected: {analysis.get('disaster_type', 'unknown')}",
+                    {
+                        "post": post[:100],
+                        "analysis": analysis,
+                        "report_id": report.get("id")
+                    }
+                )
+            else:
+                print("❌ Failed to create damage report")
+                await self.send_agent_update("low_confidence", f"Low confidence post: {post[:50]}...")
+            return report
+        
+        print("ℹ️ Non-disaster related post")
+        await self.send_agent_update("no_incident", f"Non-disaster post: {post[:50]}...")
+        return None
+    
     async def monitor_social_media(self):
         """Main loop to monitor social media for disaster-related posts"""
         print("🤖 Social Media Agent starting...")
@@ -142,33 +212,7 @@ class SocialMediaAgent:
                 await asyncio.sleep(10)  # Wait 10 seconds between posts
                 
                 await self.send_agent_update("processing", f"Analyzing post {i+1}/{len(sample_posts)}")
-                
-                print("🔍 Analyzing with OpenAI...")
-                analysis = self.analyze_social_media_post(post)
-                print(f"📊 Analysis result: {analysis}")
-                
-                if analysis.get("is_disaster_related") and analysis.get("confidence", 0) > 0.5:
-                    # Create damage report
-                    print("⚠️ Disaster-related content detected! Creating damage report...")
-                    report = await self.create_damage_report(analysis, post)
-                    
-                    if report:
-                        print(f"✅ Damage report created successfully! ID: {report.get('id')}")
-                        await self.send_agent_update(
-                            "found_incident", 
-                            f"Disaster-related post detected: {analysis.get('disaster_type', 'unknown')}",
-                            {
-                                "post": post[:100],
-                                "analysis": analysis,
-                                "report_id": report.get("id")
-                            }
-                        )
-                    else:
-                        print("❌ Failed to create damage report")
-                        await self.send_agent_update("low_confidence", f"Low confidence post: {post[:50]}...")
-                else:
-                    print("ℹ️ Non-disaster related post")
-                    await self.send_agent_update("no_incident", f"Non-disaster post: {post[:50]}...")
+                await self.process_post(post)
                     
         except Exception as e:
             print(f"❌ Agent error: {str(e)}")
@@ -10,7 +10,7 @@ sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
 from app.core.config import settings
 from app.core.database import Base
-from app.models import disaster
+from app.models import disaster, events, jobs
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
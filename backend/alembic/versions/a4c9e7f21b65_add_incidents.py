@@ -0,0 +1,102 @@
+"""Add incidents for merged damage reports
+
+Revision ID: a4c9e7f21b65
+Revises: f2b6d8e41a93
+Create Date: 2025-08-16 10:13:52.640327
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import geoalchemy2
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'a4c9e7f21b65'
+down_revision = 'f2b6d8e41a93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('incidents',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('disaster_id', sa.Integer(), nullable=True),
+    sa.Column('damage_type', sa.String(), nullable=True),
+    sa.Column('location', geoalchemy2.types.Geography(geometry_type='POINT', dimension=2, from_text='ST_GeogFromText', name='geography'), nullable=True),
+    sa.Column('latitude', sa.Float(), sa.Computed('ST_Y(location::geometry)', persisted=True), nullable=True),
+    sa.Column('longitude', sa.Float(), sa.Computed('ST_X(location::geometry)', persisted=True), nullable=True),
+    sa.Column('severity', sa.Integer(), nullable=True),
+    sa.Column('confidence', sa.Float(), nullable=True),
+    sa.Column('verified', sa.Boolean(), nullable=True),
+    sa.Column('report_count', sa.Integer(), nullable=False),
+    sa.Column('source_count', sa.Integer(), nullable=False),
+    sa.Column('source_counts', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('first_report_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('last_report_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_incidents_id'), 'incidents', ['id'], unique=False)
+    op.create_index('idx_incidents_location', 'incidents', ['location'], unique=False, postgresql_using='gist')
+    op.create_index('ix_incidents_disaster_id_damage_type_last_report_at', 'incidents',
+                    ['disaster_id', 'damage_type', 'last_report_at'], unique=False)
+    op.create_index('ix_incidents_lat_lng', 'incidents', ['latitude', 'longitude'], unique=False)
+
+    op.add_column('damage_reports', sa.Column('incident_id', sa.Integer(), nullable=True))
+    op.create_index('ix_damage_reports_incident_id', 'damage_reports', ['incident_id'], unique=False)
+
+    # New reports are merged at ingest; group the existing ones the way
+    # app.crud.disaster.backfill_incidents does, with the default 300 m
+    # merge radius (in degrees) and 30 minute window, so the agents, which
+    # read incidents, still see them
+    op.execute("""
+        WITH unlinked AS (
+            SELECT id, created_at, disaster_id, coalesce(damage_type, 'unknown') AS damage_type,
+                   coalesce(source, 'unknown') AS source, latitude, longitude, severity, confidence, verified,
+                   floor(latitude / (300 / 111320.0)) AS cell_y, floor(longitude / (300 / 111320.0)) AS cell_x,
+                   floor(extract(epoch FROM created_at) / 1800) AS slot
+            FROM damage_reports
+            WHERE incident_id IS NULL AND disaster_id IS NOT NULL AND location IS NOT NULL
+        ), by_source AS (
+            SELECT disaster_id, damage_type, cell_y, cell_x, slot, source, count(*)::int AS n,
+                   sum(latitude) AS latitude_sum, sum(longitude) AS longitude_sum, max(severity) AS severity,
+                   sum(ln(greatest(1 - coalesce(confidence, 0), 1e-9))) AS doubt,
+                   bool_or(coalesce(verified, false)) AS verified,
+                   min(created_at) AS first_report_at, max(created_at) AS last_report_at
+            FROM unlinked
+            GROUP BY disaster_id, damage_type, cell_y, cell_x, slot, source
+        ), grouped AS (
+            SELECT disaster_id, damage_type, cell_y, cell_x, slot,
+                   sum(latitude_sum) / sum(n) AS latitude, sum(longitude_sum) / sum(n) AS longitude,
+                   max(severity) AS severity, 1 - exp(sum(doubt)) AS confidence, bool_or(verified) AS verified,
+                   sum(n)::int AS report_count, count(*)::int AS source_count,
+                   jsonb_object_agg(source, n) AS source_counts,
+                   min(first_report_at) AS first_report_at, max(last_report_at) AS last_report_at
+            FROM by_source
+            GROUP BY disaster_id, damage_type, cell_y, cell_x, slot
+        ), clusters AS (
+            SELECT nextval(pg_get_serial_sequence('incidents', 'id')) AS incident_id, * FROM grouped
+        ), created AS (
+            INSERT INTO incidents (
+                id, disaster_id, damage_type, location, severity, confidence, verified,
+                report_count, source_count, source_counts, first_report_at, last_report_at
+            )
+            SELECT incident_id, disaster_id, damage_type,
+                   ST_SetSRID(ST_MakePoint(longitude, latitude), 4326)::geography,
+                   severity, confidence, verified, report_count, source_count, source_counts,
+                   first_report_at, last_report_at
+            FROM clusters
+        )
+        UPDATE damage_reports AS r SET incident_id = c.incident_id
+        FROM unlinked u JOIN clusters c USING (disaster_id, damage_type, cell_y, cell_x, slot)
+        WHERE r.id = u.id AND r.created_at = u.created_at
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_damage_reports_incident_id', table_name='damage_reports')
+    op.drop_column('damage_reports', 'incident_id')
+    op.drop_index('ix_incidents_lat_lng', table_name='incidents')
+    op.drop_index('ix_incidents_disaster_id_damage_type_last_report_at', table_name='incidents')
+    op.drop_index('idx_incidents_location', table_name='incidents', postgresql_using='gist')
+    op.drop_index(op.f('ix_incidents_id'), table_name='incidents')
+    op.drop_table('incidents')
@@ -0,0 +1,29 @@
+"""Add composite and partial indexes for hot agent filters
+
+Revision ID: b7e2c41d9a0f
+Revises: 4aab01913677
+Create Date: 2025-08-12 10:14:03.512118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'b7e2c41d9a0f'
+down_revision = '4aab01913677'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_damage_reports_disaster_id_created_at', 'damage_reports', ['disaster_id', 'created_at'], unique=False)
+    op.create_index('ix_tasks_disaster_id_status_priority', 'tasks', ['disaster_id', 'status', 'priority'], unique=False)
+    op.create_index('ix_tasks_pending', 'tasks', [sa.text('priority DESC'), 'created_at'], unique=False, postgresql_where=sa.text("status = 'pending'"))
+    op.create_index('ix_resources_available', 'resources', ['id'], unique=False, postgresql_where=sa.text("status = 'available'"))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_resources_available', table_name='resources')
+    op.drop_index('ix_tasks_pending', table_name='tasks')
+    op.drop_index('ix_tasks_disaster_id_status_priority', table_name='tasks')
+    op.drop_index('ix_damage_reports_disaster_id_created_at', table_name='damage_reports')
@@ -0,0 +1,32 @@
+"""Add broadcast_events for WebSocket replay
+
+Revision ID: b8d3f5a17c42
+Revises: a4c9e7f21b65
+Create Date: 2025-08-16 14:38:05.117902
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'b8d3f5a17c42'
+down_revision = 'a4c9e7f21b65'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('broadcast_events',
+    sa.Column('seq', sa.BigInteger(), autoincrement=False, nullable=False),
+    sa.Column('event_type', sa.String(), nullable=True),
+    sa.Column('payload', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('seq')
+    )
+    op.create_index('ix_broadcast_events_created_at', 'broadcast_events', ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_broadcast_events_created_at', table_name='broadcast_events')
+    op.drop_table('broadcast_events')
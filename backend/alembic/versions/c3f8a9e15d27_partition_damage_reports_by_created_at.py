@@ -0,0 +1,112 @@
+"""Partition damage_reports by created_at
+
+Revision ID: c3f8a9e15d27
+Revises: b7e2c41d9a0f
+Create Date: 2025-08-13 09:41:52.207734
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'c3f8a9e15d27'
+down_revision = 'b7e2c41d9a0f'
+branch_labels = None
+depends_on = None
+
+# Days of partitions created ahead of now; app.core.partitions keeps this topped up
+PREMAKE_DAYS = 3
+
+COLUMNS = "id, disaster_id, location, damage_type, severity, description, source, confidence, verified, created_at"
+
+
+def upgrade() -> None:
+    # Move the existing table aside, keeping its id sequence for the new table
+    op.execute("ALTER TABLE damage_reports RENAME TO damage_reports_unpartitioned")
+    op.execute("ALTER TABLE damage_reports_unpartitioned RENAME CONSTRAINT damage_reports_pkey TO damage_reports_unpartitioned_pkey")
+    op.execute("ALTER INDEX idx_damage_reports_location RENAME TO idx_damage_reports_unpartitioned_location")
+    op.execute("ALTER INDEX ix_damage_reports_id RENAME TO ix_damage_reports_unpartitioned_id")
+    op.execute("ALTER INDEX ix_damage_reports_disaster_id_created_at RENAME TO ix_damage_reports_unpartitioned_disaster_id_created_at")
+    op.execute("ALTER TABLE damage_reports_unpartitioned ALTER COLUMN id DROP DEFAULT")
+    op.execute("ALTER SEQUENCE damage_reports_id_seq OWNED BY NONE")
+
+    op.execute("""
+        CREATE TABLE damage_reports (
+            id INTEGER NOT NULL DEFAULT nextval('damage_reports_id_seq'),
+            disaster_id INTEGER,
+            location geography(POINT),
+            damage_type VARCHAR,
+            severity INTEGER,
+            description TEXT,
+            source VARCHAR,
+            confidence FLOAT,
+            verified BOOLEAN,
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    op.execute("ALTER SEQUENCE damage_reports_id_seq OWNED BY damage_reports.id")
+    op.create_index('idx_damage_reports_location', 'damage_reports', ['location'], unique=False, postgresql_using='gist')
+    op.create_index(op.f('ix_damage_reports_id'), 'damage_reports', ['id'], unique=False)
+    op.create_index('ix_damage_reports_disaster_id_created_at', 'damage_reports', ['disaster_id', 'created_at'], unique=False)
+
+    # One partition per UTC day covering the existing data and the next few days
+    op.execute("CREATE TABLE damage_reports_default PARTITION OF damage_reports DEFAULT")
+    op.execute(f"""
+        DO $$
+        DECLARE
+            day date;
+            last_day date := (now() AT TIME ZONE 'UTC')::date + {PREMAKE_DAYS};
+        BEGIN
+            SELECT coalesce(min(created_at AT TIME ZONE 'UTC')::date, (now() AT TIME ZONE 'UTC')::date)
+            INTO day FROM damage_reports_unpartitioned;
+            WHILE day <= last_day LOOP
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF damage_reports FOR VALUES FROM (%L) TO (%L)',
+                    'damage_reports_p' || to_char(day, 'YYYYMMDD'),
+                    day::text || ' 00:00:00+00',
+                    (day + 1)::text || ' 00:00:00+00'
+                );
+                day := day + 1;
+            END LOOP;
+        END $$
+    """)
+
+    op.execute(f"""
+        INSERT INTO damage_reports ({COLUMNS})
+        SELECT id, disaster_id, location, damage_type, severity, description, source,
+               confidence, verified, coalesce(created_at, now())
+        FROM damage_reports_unpartitioned
+    """)
+    op.drop_table('damage_reports_unpartitioned')
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE damage_reports ALTER COLUMN id DROP DEFAULT")
+    op.execute("ALTER SEQUENCE damage_reports_id_seq OWNED BY NONE")
+    op.execute("ALTER TABLE damage_reports RENAME TO damage_reports_partitioned")
+    op.execute("ALTER INDEX idx_damage_reports_location RENAME TO idx_damage_reports_partitioned_location")
+    op.execute("ALTER INDEX ix_damage_reports_id RENAME TO ix_damage_reports_partitioned_id")
+    op.execute("ALTER INDEX ix_damage_reports_disaster_id_created_at RENAME TO ix_damage_reports_partitioned_disaster_id_created_at")
+
+    op.execute("""
+        CREATE TABLE damage_reports (
+            id INTEGER NOT NULL DEFAULT nextval('damage_reports_id_seq'),
+            disaster_id INTEGER,
+            location geography(POINT),
+            damage_type VARCHAR,
+            severity INTEGER,
+            description TEXT,
+            source VARCHAR,
+            confidence FLOAT,
+            verified BOOLEAN,
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+            CONSTRAINT damage_reports_pkey PRIMARY KEY (id)
+        )
+    """)
+    op.execute("ALTER SEQUENCE damage_reports_id_seq OWNED BY damage_reports.id")
+    op.execute(f"INSERT INTO damage_reports ({COLUMNS}) SELECT {COLUMNS} FROM damage_reports_partitioned")
+    op.execute("DROP TABLE damage_reports_partitioned CASCADE")
+    op.create_index('idx_damage_reports_location', 'damage_reports', ['location'], unique=False, postgresql_using='gist')
+    op.create_index(op.f('ix_damage_reports_id'), 'damage_reports', ['id'], unique=False)
+    op.create_index('ix_damage_reports_disaster_id_created_at', 'damage_reports', ['disaster_id', 'created_at'], unique=False)
@@ -0,0 +1,83 @@
+"""Add incrementally maintained disaster summaries
+
+Revision ID: d91b6f2a4c80
+Revises: c3f8a9e15d27
+Create Date: 2025-08-14 16:02:37.884190
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'd91b6f2a4c80'
+down_revision = 'c3f8a9e15d27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('disaster_summaries',
+    sa.Column('disaster_id', sa.Integer(), nullable=False),
+    sa.Column('total_reports', sa.Integer(), nullable=False),
+    sa.Column('high_severity_reports', sa.Integer(), nullable=False),
+    sa.Column('verified_reports', sa.Integer(), nullable=False),
+    sa.Column('damage_type_counts', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('source_counts', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('task_status_counts', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('last_report_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('disaster_id')
+    )
+    op.create_table('disaster_report_rates',
+    sa.Column('disaster_id', sa.Integer(), nullable=False),
+    sa.Column('bucket', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('report_count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('disaster_id', 'bucket')
+    )
+
+    # Backfill from the rows already in the database
+    op.execute("""
+    INSERT INTO disaster_summaries (
+        disaster_id, total_reports, high_severity_reports, verified_reports,
+        damage_type_counts, source_counts, task_status_counts, last_report_at, updated_at
+    )
+    SELECT ids.disaster_id,
+           coalesce(r.total, 0), coalesce(r.high, 0), coalesce(r.verified, 0),
+           coalesce(dt.counts, '{}'), coalesce(src.counts, '{}'), coalesce(ts.counts, '{}'),
+           r.last_report_at, now()
+    FROM (
+        SELECT disaster_id FROM damage_reports WHERE disaster_id IS NOT NULL
+        UNION SELECT disaster_id FROM tasks WHERE disaster_id IS NOT NULL
+    ) ids
+    LEFT JOIN (
+        SELECT disaster_id, count(*) AS total,
+               count(*) FILTER (WHERE severity >= 7) AS high,
+               count(*) FILTER (WHERE verified) AS verified,
+               max(created_at) AS last_report_at
+        FROM damage_reports GROUP BY disaster_id
+    ) r ON r.disaster_id = ids.disaster_id
+    LEFT JOIN (
+        SELECT disaster_id, jsonb_object_agg(k, n) AS counts FROM (
+            SELECT disaster_id, coalesce(damage_type, 'unknown') AS k, count(*) AS n
+            FROM damage_reports GROUP BY 1, 2
+        ) x GROUP BY disaster_id
+    ) dt ON dt.disaster_id = ids.disaster_id
+    LEFT JOIN (
+        SELECT disaster_id, jsonb_object_agg(k, n) AS counts FROM (
+            SELECT disaster_id, coalesce(source, 'unknown') AS k, count(*) AS n
+            FROM damage_reports GROUP BY 1, 2
+        ) x GROUP BY disaster_id
+    ) src ON src.disaster_id = ids.disaster_id
+    LEFT JOIN (
+        SELECT disaster_id, jsonb_object_agg(k, n) AS counts FROM (
+            SELECT disaster_id, coalesce(status, 'unknown') AS k, count(*) AS n
+            FROM tasks GROUP BY 1, 2
+        ) x GROUP BY disaster_id
+    ) ts ON ts.disaster_id = ids.disaster_id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('disaster_report_rates')
+    op.drop_table('disaster_summaries')
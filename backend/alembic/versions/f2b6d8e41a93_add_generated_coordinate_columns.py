@@ -0,0 +1,39 @@
+"""Add generated latitude/longitude columns
+
+Revision ID: f2b6d8e41a93
+Revises: e5a07c3b8d14
+Create Date: 2025-08-15 15:42:10.218734
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'f2b6d8e41a93'
+down_revision = 'e5a07c3b8d14'
+branch_labels = None
+depends_on = None
+
+TABLES = ('disaster_events', 'damage_reports', 'resources', 'tasks')
+INDEXED_TABLES = ('damage_reports', 'resources', 'tasks')
+
+
+def upgrade() -> None:
+    # Adding a STORED generated column rewrites the table, which backfills
+    # existing rows; on damage_reports it cascades to every partition.
+    for table in TABLES:
+        op.execute(f"""
+            ALTER TABLE {table}
+                ADD COLUMN latitude double precision GENERATED ALWAYS AS (ST_Y(location::geometry)) STORED,
+                ADD COLUMN longitude double precision GENERATED ALWAYS AS (ST_X(location::geometry)) STORED
+        """)
+    for table in INDEXED_TABLES:
+        op.create_index(f'ix_{table}_lat_lng', table, ['latitude', 'longitude'])
+
+
+def downgrade() -> None:
+    for table in INDEXED_TABLES:
+        op.drop_index(f'ix_{table}_lat_lng', table_name=table)
+    for table in TABLES:
+        op.drop_column(table, 'longitude')
+        op.drop_column(table, 'latitude')
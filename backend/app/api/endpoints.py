@@ -1,36 +1,168 @@
-from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect
+import asyncio
+import io
+import tempfile
+from fastapi.concurrency import run_in_threadpool
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List
-import json
-from ..core.database import get_db
+from typing import Dict, List, Optional
+from datetime import datetime
+from ..core.database import engine, get_db
 from ..schemas import disaster as schemas
+from ..schemas import jobs as job_schemas
 from ..crud import disaster as crud
+from ..crud import jobs as job_crud
+from ..core.cache import cached_response
+from ..core.compression import MIN_COMPRESS_BYTES, compress, negotiate_encoding
+from ..core.heatmap import severity_fields
+from ..core.admission import AdmissionController, ChatterLimiter, Overloaded
+from ..core.bulk_import import IMPORT_FORMATS, import_reports
+from ..core.agent_processes import make_agent_runner
+from ..core.config import settings
+from ..core.event_log import event_log
+from ..core.export import EXPORT_FORMATS, stream_export, validate_export
+from ..core.metrics import WS_MESSAGES_DROPPED, register_websocket_metrics
+from ..core.supervisor import AGENT_TYPES, AgentSupervisor, shard_key
+from .serialization import WS_ENCODINGS, dump_model, encode_event, rows_response
 
 router = APIRouter()
 
 # WebSocket connection manager
 class ConnectionManager:
-    def __init__(self):
+    """Fans events out to WebSocket clients.
+
+    Each client gets a bounded send queue drained by its own writer task,
+    so a broadcast never waits on a slow client; a client whose queue
+    fills up is dropped rather than holding back everyone else.
+
+    Broadcasts carry a `seq` from the event log. A client connecting with
+    `since` is first sent the events after that seq it missed, then the
+    live stream, without gaps or duplicates.
+    """
+    def __init__(self, queue_size: int = 256):
         self.active_connections: List[WebSocket] = []
+        self.encodings: Dict[WebSocket, str] = {}
+        self.queues: Dict[WebSocket, asyncio.Queue] = {}
+        self.writers: Dict[WebSocket, asyncio.Task] = {}
+        self.queue_size = queue_size
 
-    async def connect(self, websocket: WebSocket):
+    async def connect(self, websocket: WebSocket, encoding: str = "json", since: Optional[int] = None):
         await websocket.accept()
+        # Everything after `head` reaches the queue; replay covers up to it
+        head = event_log.seq
         self.active_connections.append(websocket)
+        self.encodings[websocket] = encoding
+        self.queues[websocket] = asyncio.Queue(maxsize=self.queue_size)
+        self.writers[websocket] = asyncio.create_task(self._writer(websocket, since, head))
 
     def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
+        if websocket in self.active_connections:
+            self.active_connections.remove(websocket)
+        self.encodings.pop(websocket, None)
+        self.queues.pop(websocket, None)
+        writer = self.writers.pop(websocket, None)
+        if writer is not None and writer is not asyncio.current_task():
+            writer.cancel()
+
+    def queue_depths(self) -> List[int]:
+        return [queue.qsize() for queue in list(self.queues.values())]
+
+    async def send_personal_message(self, message: dict, websocket: WebSocket):
+        self._enqueue(websocket, encode_event(message, self.encodings.get(websocket, "json")))
+
+    async def broadcast(self, message: dict):
+        message = event_log.append(message)
+        # Encode once per encoding in use rather than once per client
+        payloads = {}
+        for connection in list(self.active_connections):
+            encoding = self.encodings.get(connection, "json")
+            if encoding not in payloads:
+                payloads[encoding] = encode_event(message, encoding)
+            self._enqueue(connection, payloads[encoding])
+
+    def _enqueue(self, websocket: WebSocket, payload):
+        queue = self.queues.get(websocket)
+        if queue is None:
+            return
+        try:
+            queue.put_nowait(payload)
+        except asyncio.QueueFull:
+            WS_MESSAGES_DROPPED.inc()
+            self.disconnect(websocket)
+            asyncio.create_task(self._close(websocket))
+
+    async def _replay(self, websocket: WebSocket, since: int, head: int):
+        encoding = self.encodings.get(websocket, "json")
+        missed = await event_log.events_between(since, head)
+        if missed is None:
+            await self._send(websocket, encode_event({"type": "resync_required", "seq": head}, encoding))
+            return
+        for event in missed:
+            await self._send(websocket, encode_event(event, encoding))
 
-    async def send_personal_message(self, message: str, websocket: WebSocket):
-        await websocket.send_text(message)
+    async def _writer(self, websocket: WebSocket, since: Optional[int] = None, head: int = 0):
+        queue = self.queues[websocket]
+        try:
+            if since is not None:
+                await self._replay(websocket, since, head)
+            while True:
+                await self._send(websocket, await queue.get())
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self.disconnect(websocket)
 
-    async def broadcast(self, message: str):
-        for connection in self.active_connections:
-            try:
-                await connection.send_text(message)
-            except:
-                self.disconnect(connection)
+    async def _close(self, websocket: WebSocket):
+        try:
+            await websocket.close(code=1013, reason="Client too slow")
+        except Exception:
+            pass
 
-manager = ConnectionManager()
+    async def _send(self, websocket: WebSocket, payload):
+        if isinstance(payload, bytes):
+            await websocket.send_bytes(payload)
+        else:
+            await websocket.send_text(payload)
+
+manager = ConnectionManager(settings.ws_send_queue_size)
+register_websocket_metrics(manager)
+
+damage_report_admission = AdmissionController(
+    "/api/v1/damage-reports/",
+    max_concurrent=settings.admission_damage_reports_concurrency,
+    max_queue=settings.admission_damage_reports_queue,
+    shed_depth=settings.admission_shed_queue_depth,
+    queue_timeout=settings.admission_queue_timeout_seconds,
+)
+agent_update_limiter = ChatterLimiter(
+    "/api/v1/agent-update",
+    rate=settings.admission_agent_update_rate,
+    burst=settings.admission_agent_update_burst,
+    load=lambda: max(manager.queue_depths(), default=0),
+    shed_load=settings.admission_agent_update_shed_ws_depth,
+)
+
+def too_many_requests(e: Overloaded) -> HTTPException:
+    return HTTPException(status_code=429, detail=f"Overloaded ({e.reason}), retry later",
+                         headers={"Retry-After": str(e.retry_after)})
+
+def report_admission(report: schemas.DamageReportCreate):
+    """Priority (higher first) and sheddability of a report under load"""
+    priority = report.severity + (10 if report.verified else 0)
+    sheddable = report.source == "social_media" and report.confidence < settings.admission_low_confidence
+    return priority, sheddable
+
+def parse_bbox(bbox: Optional[str]) -> Optional[crud.BBox]:
+    """Parse a "minLng,minLat,maxLng,maxLat" query parameter"""
+    if bbox is None:
+        return None
+    try:
+        min_lng, min_lat, max_lng, max_lat = (float(v) for v in bbox.split(","))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="bbox must be minLng,minLat,maxLng,maxLat")
+    if min_lng > max_lng or min_lat > max_lat:
+        raise HTTPException(status_code=400, detail="bbox minimums must not exceed maximums")
+    return min_lng, min_lat, max_lng, max_lat
 
 # Disaster Events
 @router.post("/disasters/", response_model=schemas.DisasterEvent)
@@ -38,24 +170,75 @@ def create_disaster(disaster: schemas.DisasterEventCreate, db: Session = Depends
     return crud.create_disaster(db=db, disaster=disaster)
 
 @router.get("/disasters/", response_model=List[schemas.DisasterEvent])
-def read_disasters(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    disasters = crud.get_disasters(db, skip=skip, limit=limit)
-    return disasters
+def read_disasters(request: Request, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+    return rows_response(request, ["disaster_events"], lambda: crud.get_disaster_rows(db, skip=skip, limit=limit))
 
 @router.get("/disasters/{disaster_id}", response_model=schemas.DisasterEvent)
-def read_disaster(disaster_id: int, db: Session = Depends(get_db)):
-    db_disaster = crud.get_disaster(db, disaster_id=disaster_id)
-    if db_disaster is None:
+def read_disaster(request: Request, disaster_id: int, db: Session = Depends(get_db)):
+    def build():
+        db_disaster = crud.get_disaster(db, disaster_id=disaster_id)
+        if db_disaster is None:
+            raise HTTPException(status_code=404, detail="Disaster not found")
+        return dump_model(schemas.DisasterEvent, db_disaster)
+    return cached_response(request, ["disaster_events"], build)
+
+@router.get("/disasters/{disaster_id}/summary", response_model=schemas.DisasterSummary)
+def read_disaster_summary(disaster_id: int, db: Session = Depends(get_db)):
+    summary = crud.get_disaster_summary(db, disaster_id=disaster_id)
+    if summary is None:
+        if crud.get_disaster(db, disaster_id=disaster_id) is None:
+            raise HTTPException(status_code=404, detail="Disaster not found")
+        return schemas.DisasterSummary(disaster_id=disaster_id)
+    return summary
+
+@router.get("/disasters/{disaster_id}/heatmap")
+def read_disaster_heatmap(request: Request, disaster_id: int, db: Session = Depends(get_db)):
+    """Time-decayed damage intensity raster.
+
+    The body is the grid as uint8, row-major from the northern edge, where
+    255 is the X-Raster-Max intensity. Shape and bounds are in headers.
+    """
+    field = severity_fields.get(db, disaster_id)
+    if field is None:
         raise HTTPException(status_code=404, detail="Disaster not found")
-    return db_disaster
+    raster, peak = field.quantized()
+    body = raster.tobytes()
+    headers = {
+        "Cache-Control": "no-store",
+        "Vary": "Accept-Encoding",
+        "X-Raster-Shape": f"{raster.shape[0]},{raster.shape[1]}",
+        "X-Raster-Bounds": ",".join(f"{v:.6f}" for v in field.bounds),
+        "X-Raster-Max": f"{peak:.6g}",
+        "X-Raster-Half-Life-Minutes": f"{settings.heatmap_half_life_minutes:g}",
+    }
+    encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+    if encoding and len(body) >= MIN_COMPRESS_BYTES:
+        body = compress(body, encoding)
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/octet-stream", headers=headers)
+
+@router.get("/disasters/{disaster_id}/hotspots")
+def read_disaster_hotspots(disaster_id: int, limit: int = 10, min_fraction: float = 0.2,
+                           db: Session = Depends(get_db)):
+    """Local maxima of the heat map, strongest first"""
+    field = severity_fields.get(db, disaster_id)
+    if field is None:
+        raise HTTPException(status_code=404, detail="Disaster not found")
+    return {"disaster_id": disaster_id, "reports": field.reports,
+            "hotspots": field.hotspots(limit=limit, min_fraction=min_fraction)}
 
 # Damage Reports
 @router.post("/damage-reports/", response_model=schemas.DamageReport)
 async def create_damage_report(report: schemas.DamageReportCreate, db: Session = Depends(get_db)):
-    db_report = crud.create_damage_report(db=db, report=report)
+    priority, sheddable = report_admission(report)
+    try:
+        async with damage_report_admission.admit(priority, sheddable):
+            db_report = await run_in_threadpool(crud.create_damage_report, db=db, report=report)
+    except Overloaded as e:
+        raise too_many_requests(e)
     # Broadcast to connected clients
     try:
-        await manager.broadcast(json.dumps({
+        await manager.broadcast({
             "type": "damage_report",
             "data": {
                 "id": db_report.id,
@@ -64,15 +247,79 @@ async def create_damage_report(report: schemas.DamageReportCreate, db: Session =
                 "latitude": db_report.latitude,
                 "longitude": db_report.longitude
             }
-        }))
+        })
     except Exception as e:
         print(f"Broadcast error: {e}")
     return db_report
 
+@router.post("/damage-reports/import")
+async def import_damage_reports(request: Request, format: str = "csv"):
+    """Bulk load a CSV (with header) or JSONL request body of damage reports.
+
+    Rows are validated and loaded in chunks without per-row broadcasts or
+    incident merging; the response counts imported and rejected rows.
+    """
+    if format not in IMPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(IMPORT_FORMATS)}")
+    # Spool the body so a large upload is parsed as a stream from disk
+    # instead of being held in memory
+    body = tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024)
+    try:
+        async for chunk in request.stream():
+            await run_in_threadpool(body.write, chunk)
+        body.seek(0)
+        stream = io.TextIOWrapper(body, encoding="utf-8-sig", newline="")
+        result = await run_in_threadpool(import_reports, engine, stream, format)
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="body must be UTF-8 text")
+    finally:
+        body.close()
+    if result["imported"]:
+        await manager.broadcast({
+            "type": "bulk_import",
+            "data": {"imported": result["imported"], "disaster_ids": result["disaster_ids"]}
+        })
+    return result
+
 @router.get("/damage-reports/", response_model=List[schemas.DamageReport])
-def read_damage_reports(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    reports = crud.get_damage_reports(db, skip=skip, limit=limit)
-    return reports
+def read_damage_reports(request: Request, skip: int = 0, limit: int = 100, disaster_id: Optional[int] = None,
+                        since: Optional[datetime] = None, bbox: Optional[str] = None,
+                        db: Session = Depends(get_db)):
+    box = parse_bbox(bbox)
+    return rows_response(request, ["damage_reports"], lambda: crud.get_damage_report_rows(
+        db, skip=skip, limit=limit, disaster_id=disaster_id, since=since, bbox=box
+    ))
+
+@router.get("/damage-reports/points")
+def read_damage_report_points(request: Request, skip: int = 0, limit: int = 5000, disaster_id: Optional[int] = None,
+                              since: Optional[datetime] = None, bbox: Optional[str] = None,
+                              db: Session = Depends(get_db)):
+    """Slim map layer (id, lat/lng, severity, damage_type), columnar unless another format is asked for"""
+    box = parse_bbox(bbox)
+    return rows_response(request, ["damage_reports"], lambda: crud.get_damage_report_points(
+        db, skip=skip, limit=limit, disaster_id=disaster_id, since=since, bbox=box
+    ), default_format="columnar")
+
+# Incidents
+@router.get("/incidents/", response_model=List[schemas.Incident])
+def read_incidents(request: Request, skip: int = 0, limit: int = 100, disaster_id: Optional[int] = None,
+                   since: Optional[datetime] = None, min_severity: Optional[int] = None,
+                   bbox: Optional[str] = None, db: Session = Depends(get_db)):
+    """Damage reports merged by place, damage type and time; most severe first"""
+    box = parse_bbox(bbox)
+    return rows_response(request, ["incidents"], lambda: crud.get_incident_rows(
+        db, skip=skip, limit=limit, disaster_id=disaster_id, since=since, min_severity=min_severity, bbox=box
+    ))
+
+@router.get("/incidents/{incident_id}/reports", response_model=List[schemas.DamageReport])
+def read_incident_reports(request: Request, incident_id: int, skip: int = 0, limit: int = 100,
+                          db: Session = Depends(get_db)):
+    def build():
+        incident = crud.get_incident(db, incident_id=incident_id)
+        if incident is None:
+            raise HTTPException(status_code=404, detail="Incident not found")
+        return crud.get_incident_report_rows(db, incident, skip=skip, limit=limit)
+    return rows_response(request, ["damage_reports"], build)
 
 # Resources
 @router.post("/resources/", response_model=schemas.Resource)
@@ -80,32 +327,41 @@ def create_resource(resource: schemas.ResourceCreate, db: Session = Depends(get_
     return crud.create_resource(db=db, resource=resource)
 
 @router.get("/resources/", response_model=List[schemas.Resource])
-def read_resources(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    resources = crud.get_resources(db, skip=skip, limit=limit)
-    return resources
+def read_resources(request: Request, skip: int = 0, limit: int = 100, status: Optional[str] = None,
+                   bbox: Optional[str] = None, db: Session = Depends(get_db)):
+    box = parse_bbox(bbox)
+    return rows_response(request, ["resources"], lambda: crud.get_resource_rows(
+        db, skip=skip, limit=limit, status=status, bbox=box
+    ))
 
 # Tasks
 @router.post("/tasks/", response_model=schemas.Task)
-def create_task(task: schemas.TaskCreate, db: Session = Depends(get_db)):
-    db_task = crud.create_task(db=db, task=task)
+async def create_task(task: schemas.TaskCreate, db: Session = Depends(get_db)):
+    db_task = await run_in_threadpool(crud.create_task, db=db, task=task)
     # Broadcast to connected clients
-    asyncio.create_task(manager.broadcast(json.dumps({
-        "type": "new_task",
-        "data": {
-            "id": db_task.id,
-            "title": db_task.title,
-            "priority": db_task.priority,
-            "task_type": db_task.task_type,
-            "latitude": db_task.latitude,
-            "longitude": db_task.longitude
-        }
-    })))
+    try:
+        await manager.broadcast({
+            "type": "new_task",
+            "data": {
+                "id": db_task.id,
+                "title": db_task.title,
+                "priority": db_task.priority,
+                "task_type": db_task.task_type,
+                "latitude": db_task.latitude,
+                "longitude": db_task.longitude
+            }
+        })
+    except Exception as e:
+        print(f"Broadcast error: {e}")
     return db_task
 
 @router.get("/tasks/", response_model=List[schemas.Task])
-def read_tasks(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    tasks = crud.get_tasks(db, skip=skip, limit=limit)
-    return tasks
+def read_tasks(request: Request, skip: int = 0, limit: int = 100, disaster_id: Optional[int] = None,
+               status: Optional[str] = None, bbox: Optional[str] = None, db: Session = Depends(get_db)):
+    box = parse_bbox(bbox)
+    return rows_response(request, ["tasks"], lambda: crud.get_task_rows(
+        db, skip=skip, limit=limit, disaster_id=disaster_id, status=status, bbox=box
+    ))
 
 @router.put("/tasks/{task_id}", response_model=schemas.Task)
 def update_task_status(task_id: int, status: str, db: Session = Depends(get_db)):
@@ -116,165 +372,184 @@ def update_task_status(task_id: int, status: str, db: Session = Depends(get_db))
 
 @router.put("/tasks/{task_id}/assign", response_model=schemas.Task)
 def assign_resources_to_task(task_id: int, assignment: dict, db: Session = Depends(get_db)):
-    """Assign resources to a task"""
+    """Assign resources to a pending task, deploying them; 409 if the task or any resource is taken"""
     resource_ids = assignment.get("resource_ids", [])
+    if not isinstance(resource_ids, list) or not all(isinstance(v, int) for v in resource_ids):
+        raise HTTPException(status_code=400, detail="resource_ids must be a list of integers")
     
-    # Convert resource IDs to comma-separated string
-    resource_list = ",".join(map(str, resource_ids))
-    
-    db_task = crud.assign_resources_to_task(db, task_id=task_id, assigned_resources=resource_list)
+    try:
+        db_task = crud.assign_resources_to_task(db, task_id=task_id, resource_ids=resource_ids)
+    except crud.ResourceUnavailable as e:
+        raise HTTPException(status_code=409, detail=f"Resources no longer available: {e.args[0]}")
+    except crud.TaskNotPending as e:
+        raise HTTPException(status_code=409, detail=f"Task is no longer pending (status {e.args[0]})")
     if db_task is None:
         raise HTTPException(status_code=404, detail="Task not found")
     return db_task
 
+# Columnar bulk export for analysis and BI
+@router.get("/export/{table}")
+def export_table(table: str, format: str = "parquet", disaster_id: Optional[int] = None,
+                 since: Optional[datetime] = None, until: Optional[datetime] = None):
+    """Stream damage_reports, tasks or resources as a Parquet or Arrow IPC file"""
+    try:
+        validate_export(table, format, disaster_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    extension, media_type = EXPORT_FORMATS[format]
+    return StreamingResponse(
+        stream_export(engine, table, format, disaster_id=disaster_id, since=since, until=until),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{table}.{extension}"'},
+    )
+
 # WebSocket endpoint
 @router.websocket("/ws")
-async def websocket_endpoint(websocket: WebSocket):
-    await manager.connect(websocket)
+async def websocket_endpoint(websocket: WebSocket, encoding: str = "json", since: Optional[int] = None):
+    """Event stream; connect with ?encoding=msgpack for binary MessagePack frames.
+
+    Reconnect with ?since=<last seq seen> to be sent the missed events
+    first, or a resync_required event if they are no longer available.
+    """
+    if encoding not in WS_ENCODINGS:
+        await websocket.close(code=1003, reason=f"Unsupported encoding '{encoding}'")
+        return
+    await manager.connect(websocket, encoding, since)
     try:
         while True:
-            data = await websocket.receive_text()
-            await manager.send_personal_message(f"Message received: {data}", websocket)
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+            data = message.get("text") if message.get("text") is not None else message.get("bytes")
+            await manager.send_personal_message({"type": "ack", "message": f"Message received: {data}"}, websocket)
     except WebSocketDisconnect:
         manager.disconnect(websocket)
 
 # Agent updates endpoint
 @router.post("/agent-update")
 async def agent_update(update: schemas.AgentUpdate):
+    # Errors and results always go out; progress chatter may be shed
+    if update.status not in ("error", "completed", "analysis_complete", "tasks_created"):
+        try:
+            agent_update_limiter.check(update.agent_type)
+        except Overloaded as e:
+            raise too_many_requests(e)
     # Broadcast agent status to all connected clients
-    await manager.broadcast(json.dumps({
+    await manager.broadcast({
         "type": "agent_update",
         "agent_type": update.agent_type,
         "status": update.status,
         "message": update.message,
         "data": update.data
-    }))
+    })
     return {"status": "success"}
 
 # Agent control endpoints
+supervisor = AgentSupervisor(
+    runner=make_agent_runner(settings.agent_execution_mode, settings.agent_process_workers, notify=manager.broadcast),
+    notify=manager.broadcast
+)
+
+def parse_region(disaster_id: Optional[int], region: Optional[str]) -> Optional[str]:
+    """Validate an agent shard's region bbox and return it in canonical form"""
+    box = parse_bbox(region)
+    if box is None:
+        return None
+    if disaster_id is None:
+        raise HTTPException(status_code=400, detail="region requires disaster_id")
+    return ",".join(str(v) for v in box)
+
+async def start_agent_run(agent_type: str, interval: Optional[float], cron: Optional[str],
+                          disaster_id: Optional[int] = None, region: Optional[str] = None):
+    run = supervisor.start(agent_type, interval=interval, cron=cron, disaster_id=disaster_id, region=region)
+    # Broadcast that agent is starting
+    await manager.broadcast({
+        "type": "agent_update",
+        "agent_type": agent_type,
+        "disaster_id": disaster_id,
+        "status": "starting",
+        "message": f"{agent_type.replace('_', ' ').title()} Agent is starting...",
+        "data": {"process_id": "internal", **run.as_dict()}
+    })
+    return run
+
 @router.post("/agents/start/{agent_type}")
-async def start_agent(agent_type: str):
-    """Start a specific agent"""
-    try:
-        # Define available agents
-        available_agents = {
-            "social_media": "social_media",
-            "damage_assessment": "damage_assessment", 
-            "resource_planning": "resource_planning"
-        }
-        
-        if agent_type not in available_agents:
-            raise HTTPException(status_code=400, detail="Invalid agent type")
-        
-        # Import and run the agent directly in a background task
-        import asyncio
-        
-        # Broadcast that agent is starting
-        await manager.broadcast(json.dumps({
-            "type": "agent_update",
-            "agent_type": agent_type,
-            "status": "starting",
-            "message": f"{agent_type.replace('_', ' ').title()} Agent is starting...",
-            "data": {"process_id": "internal"}
-        }))
-        
-        # Start the agent in background
-        if agent_type == "social_media":
-            asyncio.create_task(run_social_media_agent())
-        elif agent_type == "damage_assessment":
-            asyncio.create_task(run_damage_assessment_agent())
-        elif agent_type == "resource_planning":
-            asyncio.create_task(run_resource_planning_agent())
-        
-        return {"status": "started", "agent_type": agent_type, "process_id": "internal"}
-    except Exception as e:
-        error_msg = f"Failed to start {agent_type}: {str(e)}"
-        await manager.broadcast(json.dumps({
-            "type": "agent_update",
-            "agent_type": agent_type,
-            "status": "error",
-            "message": error_msg,
-            "data": {"error": str(e)}
-        }))
-        raise HTTPException(status_code=500, detail=error_msg)
-
-# Internal agent runner functions
-async def run_social_media_agent():
-    """Run social media agent internally"""
-    try:
-        import sys
-        import os
-        
-        # Add the backend directory to Python path
-        backend_dir = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
-        if backend_dir not in sys.path:
-            sys.path.insert(0, backend_dir)
-        
-        from agents.social_media_agent import SocialMediaAgent
-        agent = SocialMediaAgent()
-        await agent.monitor_social_media()
-    except Exception as e:
-        await manager.broadcast(json.dumps({
-            "type": "agent_update",
-            "agent_type": "social_media",
-            "status": "error",
-            "message": f"Social Media Agent error: {str(e)}",
-            "data": {"error": str(e)}
-        }))
-
-async def run_damage_assessment_agent():
-    """Run damage assessment agent internally"""
-    try:
-        import sys
-        import os
-        
-        # Add the backend directory to Python path
-        backend_dir = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
-        if backend_dir not in sys.path:
-            sys.path.insert(0, backend_dir)
-        
-        from agents.damage_assessment_agent import DamageAssessmentAgent
-        agent = DamageAssessmentAgent()
-        await agent.run_assessment_cycle()
-    except Exception as e:
-        await manager.broadcast(json.dumps({
-            "type": "agent_update",
-            "agent_type": "damage_assessment",
-            "status": "error",
-            "message": f"Damage Assessment Agent error: {str(e)}",
-            "data": {"error": str(e)}
-        }))
-
-async def run_resource_planning_agent():
-    """Run resource planning agent internally"""
+async def start_agent(agent_type: str, interval: Optional[float] = None, cron: Optional[str] = None,
+                      disaster_id: Optional[int] = None, region: Optional[str] = None):
+    """Start a specific agent, once or recurring every `interval` seconds / on a `cron` schedule.
+
+    With `disaster_id` (and optionally a `region` bbox) the run is a shard
+    scoped to that disaster; shards of the same agent run in parallel.
+    """
+    if agent_type not in AGENT_TYPES:
+        raise HTTPException(status_code=400, detail="Invalid agent type")
+    region = parse_region(disaster_id, region)
+    if supervisor.is_running(agent_type, disaster_id, region):
+        key = shard_key(agent_type, disaster_id, region)
+        raise HTTPException(status_code=409, detail=f"{key} agent is already running")
+
     try:
-        import sys
-        import os
-        
-        # Add the backend directory to Python path
-        backend_dir = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
-        if backend_dir not in sys.path:
-            sys.path.insert(0, backend_dir)
-        
-        from agents.resource_planning_agent import ResourcePlanningAgent
-        agent = ResourcePlanningAgent()
-        await agent.run_planning_cycle()
-    except Exception as e:
-        await manager.broadcast(json.dumps({
-            "type": "agent_update",
-            "agent_type": "resource_planning",
-            "status": "error",
-            "message": f"Resource Planning Agent error: {str(e)}",
-            "data": {"error": str(e)}
-        }))
+        run = await start_agent_run(agent_type, interval, cron, disaster_id, region)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"status": "started", "process_id": "internal", **run.as_dict()}
+
+@router.post("/agents/shards/{agent_type}")
+async def start_agent_shards(agent_type: str, interval: Optional[float] = None, cron: Optional[str] = None,
+                             db: Session = Depends(get_db)):
+    """Start one run of the agent per active disaster, skipping disasters it already runs for"""
+    if agent_type not in AGENT_TYPES:
+        raise HTTPException(status_code=400, detail="Invalid agent type")
+    started, skipped = [], []
+    for disaster_id in await run_in_threadpool(crud.get_active_disaster_ids, db):
+        if supervisor.is_running(agent_type, disaster_id):
+            skipped.append(disaster_id)
+            continue
+        try:
+            await start_agent_run(agent_type, interval, cron, disaster_id)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        started.append(disaster_id)
+    return {"status": "started", "agent_type": agent_type, "started": started, "already_running": skipped}
+
+@router.post("/agents/stop/{agent_type}")
+async def stop_agent(agent_type: str, disaster_id: Optional[int] = None, region: Optional[str] = None):
+    """Cancel a running agent or agent shard"""
+    if agent_type not in AGENT_TYPES:
+        raise HTTPException(status_code=400, detail="Invalid agent type")
+    region = parse_region(disaster_id, region)
+    if not await supervisor.stop(agent_type, disaster_id, region):
+        key = shard_key(agent_type, disaster_id, region)
+        raise HTTPException(status_code=409, detail=f"{key} agent is not running")
+    return {"status": "stopped", "agent_type": agent_type, "disaster_id": disaster_id, "region": region}
+
+@router.post("/disasters/{disaster_id}/agents/stop")
+async def stop_disaster_agents(disaster_id: int):
+    """Cancel every agent shard running for a disaster"""
+    return {"status": "stopped", "disaster_id": disaster_id, "stopped": await supervisor.stop_disaster(disaster_id)}
 
 @router.get("/agents/status")
 async def get_agents_status():
     """Get status of all agents"""
-    return {
-        "social_media": "idle",
-        "damage_assessment": "idle", 
-        "resource_planning": "idle"
-    }
+    return supervisor.status()
+
+# Durable agent job queue, drained by `python -m agents.job_worker`
+@router.post("/jobs/", response_model=job_schemas.Job)
+def enqueue_job(job: job_schemas.JobCreate, db: Session = Depends(get_db)):
+    if job.kind not in job_schemas.JOB_KINDS:
+        raise HTTPException(status_code=400, detail=f"Unknown job kind '{job.kind}'")
+    if job.max_attempts < 1:
+        raise HTTPException(status_code=400, detail="max_attempts must be at least 1")
+    return job_crud.enqueue_job(db=db, job=job)
+
+@router.get("/jobs/", response_model=List[job_schemas.Job])
+def read_jobs(skip: int = 0, limit: int = 100, status: Optional[str] = None, kind: Optional[str] = None,
+              db: Session = Depends(get_db)):
+    return job_crud.get_jobs(db, skip=skip, limit=limit, status=status, kind=kind)
 
-import asyncio
\ No newline at end of file
+@router.get("/jobs/{job_id}", response_model=job_schemas.Job)
+def read_job(job_id: int, db: Session = Depends(get_db)):
+    db_job = job_crud.get_job(db, job_id=job_id)
+    if db_job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return db_job
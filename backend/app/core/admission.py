@@ -0,0 +1,150 @@
+"""
+Admission control for the ingestion endpoints.
+
+Each controlled route gets a concurrency limit. Requests beyond it wait
+in a priority queue and are let in highest priority first as running
+requests finish, so under a surge a severity-9 verified report doesn't
+wait behind hundreds of low-value ones.
+
+Load is shed at two points, both as 429 with a Retry-After estimated
+from the queue depth and recent service times:
+
+  - "sheddable" requests (low-confidence social media reports) are
+    refused once the queue is deeper than `shed_depth`
+  - when the queue is full, the lowest-priority entry loses: either the
+    newcomer or the queued request it outranks
+
+Waiting is also bounded by `queue_timeout`.
+
+Agent progress updates don't hold a slot for long enough to queue (a
+broadcast only enqueues to each client), so `ChatterLimiter` sheds them
+on the load they do cause instead: a per-agent rate, and the depth of
+the WebSocket send queues they fill.
+
+Everything here runs on the event loop, so no locking is needed.
+"""
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import Callable, Dict, Tuple
+
+from .metrics import ADMISSION_IN_FLIGHT, ADMISSION_QUEUE_DEPTH, ADMISSION_SHED, ADMISSION_WAIT
+
+class Overloaded(Exception):
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+class AdmissionController:
+    def __init__(self, route: str, max_concurrent: int, max_queue: int, shed_depth: int,
+                 queue_timeout: float = 10.0):
+        self.route = route
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.shed_depth = shed_depth
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        # (-priority, arrival, future); the heap top is the next to admit
+        self._queue = []
+        self._arrivals = itertools.count()
+        self._service_seconds = 0.05  # moving average, for Retry-After
+        ADMISSION_IN_FLIGHT.labels(route).set_function(lambda: self.in_flight)
+        ADMISSION_QUEUE_DEPTH.labels(route).set_function(lambda: len(self._queue))
+
+    def retry_after(self) -> int:
+        backlog = (len(self._queue) + 1) * self._service_seconds / self.max_concurrent
+        return max(1, math.ceil(backlog))
+
+    def _shed(self, reason: str) -> Overloaded:
+        ADMISSION_SHED.labels(self.route, reason).inc()
+        return Overloaded(reason, self.retry_after())
+
+    def _enqueue(self, priority: float, sheddable: bool) -> asyncio.Future:
+        if sheddable and len(self._queue) >= self.shed_depth:
+            raise self._shed("low_priority")
+        entry = (-priority, next(self._arrivals), asyncio.get_running_loop().create_future())
+        if len(self._queue) >= self.max_queue:
+            # Evict the lowest-priority (latest arrival among equals) entry,
+            # which may be the newcomer itself
+            lowest = max(self._queue)
+            if entry >= lowest:
+                raise self._shed("queue_full")
+            self._queue.remove(lowest)
+            heapq.heapify(self._queue)
+            lowest[2].set_exception(self._shed("queue_full"))
+        heapq.heappush(self._queue, entry)
+        return entry[2]
+
+    def _release(self):
+        self.in_flight -= 1
+        while self._queue and self.in_flight < self.max_concurrent:
+            _, _, waiter = heapq.heappop(self._queue)
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    def _withdraw(self, waiter: asyncio.Future):
+        for i, entry in enumerate(self._queue):
+            if entry[2] is waiter:
+                self._queue.pop(i)
+                heapq.heapify(self._queue)
+                return
+
+    @asynccontextmanager
+    async def admit(self, priority: float = 0.0, sheddable: bool = False):
+        """Hold one of the route's slots for the duration of the block; raises Overloaded"""
+        queued_at = time.perf_counter()
+        if self.in_flight < self.max_concurrent and not self._queue:
+            self.in_flight += 1
+        else:
+            waiter = self._enqueue(priority, sheddable)
+            try:
+                await asyncio.wait_for(asyncio.shield(waiter), self.queue_timeout)
+            except asyncio.TimeoutError:
+                self._withdraw(waiter)
+                if waiter.done() and not waiter.cancelled() and waiter.exception() is None:
+                    # Admitted just as the wait timed out; give the slot back
+                    self._release()
+                raise self._shed("timeout")
+            except asyncio.CancelledError:
+                self._withdraw(waiter)
+                if waiter.done() and not waiter.cancelled() and waiter.exception() is None:
+                    self._release()
+                raise
+        started = time.perf_counter()
+        ADMISSION_WAIT.labels(self.route).observe(started - queued_at)
+        try:
+            yield
+        finally:
+            self._service_seconds = 0.9 * self._service_seconds + 0.1 * (time.perf_counter() - started)
+            self._release()
+
+class ChatterLimiter:
+    def __init__(self, route: str, rate: float, burst: int, load: Callable[[], int], shed_load: int):
+        self.route = route
+        self.rate = rate
+        self.burst = burst
+        self.load = load
+        self.shed_load = shed_load
+        # key -> (tokens, last refill)
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+
+    def _shed(self, reason: str, retry_after: int) -> Overloaded:
+        ADMISSION_SHED.labels(self.route, reason).inc()
+        return Overloaded(reason, retry_after)
+
+    def check(self, key: str):
+        """Spend one of `key`'s tokens; raises Overloaded when it has none or clients are backed up"""
+        if self.load() >= self.shed_load:
+            raise self._shed("send_queue", 1)
+        now = time.monotonic()
+        tokens, last = self._buckets.get(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - last) * self.rate)
+        if tokens < 1:
+            self._buckets[key] = (tokens, now)
+            raise self._shed("rate", max(1, math.ceil((1 - tokens) / self.rate)))
+        self._buckets[key] = (tokens - 1, now)
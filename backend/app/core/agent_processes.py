@@ -0,0 +1,93 @@
+"""
+Process-pool execution of agent cycles.
+
+In "process" mode the supervisor hands each agent cycle to a pool of
+worker processes so that the agents' CPU work and blocking LLM calls
+never run on the API event loop. Agent status updates are put on a
+multiprocessing queue by the workers and pumped back into the API
+process, where they are broadcast to WebSocket clients as usual.
+"""
+import asyncio
+import multiprocessing
+import queue
+from concurrent.futures import ProcessPoolExecutor
+from typing import Awaitable, Callable, Optional
+
+from .supervisor import run_agent_cycle
+
+# Set in each worker process by _init_worker
+_event_queue = None
+
+def _init_worker(event_queue):
+    global _event_queue
+    _event_queue = event_queue
+
+def _run_cycle_in_worker(agent_type: str, disaster_id: Optional[int] = None, region: Optional[str] = None):
+    """Entry point inside a worker process: one agent cycle on a private loop"""
+    asyncio.run(run_agent_cycle(agent_type, event_sink=_event_queue.put, disaster_id=disaster_id, region=region))
+
+class ProcessAgentRunner:
+    """Supervisor runner that executes agent cycles in worker processes.
+
+    A cancelled cycle stops being awaited immediately, but the worker
+    finishes the cycle it is in; pool processes are not killed mid-cycle.
+    """
+
+    def __init__(self, max_workers: int, notify: Optional[Callable[[dict], Awaitable[None]]] = None):
+        self.max_workers = max_workers
+        self.notify = notify
+        self._context = multiprocessing.get_context("spawn")
+        self._events = None
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pump: Optional[asyncio.Task] = None
+
+    def _ensure_started(self):
+        if self._executor is not None:
+            return
+        self._events = self._context.Queue()
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=self._context,
+            initializer=_init_worker,
+            initargs=(self._events,),
+        )
+        self._pump = asyncio.create_task(self._pump_events())
+
+    async def __call__(self, agent_type: str, disaster_id: Optional[int] = None, region: Optional[str] = None):
+        self._ensure_started()
+        await asyncio.wrap_future(self._executor.submit(_run_cycle_in_worker, agent_type, disaster_id, region))
+
+    async def _pump_events(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                update = await loop.run_in_executor(None, self._events.get, True, 0.5)
+            except queue.Empty:
+                continue
+            if update is None:
+                return
+            if self.notify is None:
+                continue
+            try:
+                await self.notify({"type": "agent_update", **update})
+            except Exception as e:
+                print(f"Agent event relay error: {e}")
+
+    async def shutdown(self):
+        if self._executor is None:
+            return
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._events.put(None)
+        try:
+            await asyncio.wait_for(self._pump, timeout=2)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            self._pump.cancel()
+        self._executor = None
+
+def make_agent_runner(mode: str, max_workers: int, notify: Optional[Callable[[dict], Awaitable[None]]] = None):
+    """Runner for AgentSupervisor according to the configured execution mode"""
+    if mode == "process":
+        return ProcessAgentRunner(max_workers, notify=notify)
+    if mode == "inline":
+        return run_agent_cycle
+    raise ValueError(f"Unknown agent execution mode: {mode}")
@@ -0,0 +1,244 @@
+"""
+Bulk import of damage reports from CSV or JSONL.
+
+Rows are read as a stream and handled in chunks of import_chunk_size:
+
+  1. each row is validated and normalized in Python (types, ranges,
+     timestamps); bad rows are rejected with their line number
+  2. the valid rows are COPYed into a per-connection temporary staging
+     table
+  3. one INSERT ... SELECT moves them into damage_reports, skipping
+     rows whose disaster doesn't exist, and the chunk commits
+
+so a million rows cost a few hundred statements rather than a million
+transactions. Daily partitions for the rows' created_at are created as
+needed. Once all chunks are in, the imported reports of the disasters
+touched are grouped into incidents (see backfill_incidents), their
+summaries rebuilt and cached responses invalidated.
+
+Imported reports keep their original created_at (now() when absent) and
+are not broadcast; use replay (import_reports.py --replay) to send them
+through the live ingestion path instead.
+
+Columns: disaster_id, latitude, longitude, damage_type, severity (1-10),
+source, confidence (0-1), and optionally description, verified and
+created_at (ISO 8601, UTC if no offset). CSV needs a header row.
+"""
+import csv
+import io
+import json
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, TextIO, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from .cache import table_versions
+from .config import settings
+from .database import SessionLocal
+from .heatmap import severity_fields
+from .partitions import ensure_partitions
+from ..crud.disaster import backfill_incidents, rebuild_disaster_summaries
+
+IMPORT_FORMATS = ("csv", "jsonl")
+STAGING_COLUMNS = ("line", "disaster_id", "latitude", "longitude", "damage_type", "severity",
+                   "description", "source", "confidence", "verified", "created_at")
+TRUE_VALUES = {"true", "t", "1", "yes", "y"}
+FALSE_VALUES = {"false", "f", "0", "no", "n", ""}
+
+STAGING_DDL = """
+    CREATE TEMPORARY TABLE IF NOT EXISTS damage_report_import (
+        line integer, disaster_id integer, latitude double precision, longitude double precision,
+        damage_type text, severity integer, description text, source text,
+        confidence double precision, verified boolean, created_at timestamptz
+    ) ON COMMIT DELETE ROWS
+"""
+
+UNKNOWN_DISASTER_SQL = """
+    SELECT line, disaster_id FROM damage_report_import s
+    WHERE NOT EXISTS (SELECT 1 FROM disaster_events d WHERE d.id = s.disaster_id)
+    ORDER BY line
+"""
+
+INSERT_SQL = """
+    INSERT INTO damage_reports (disaster_id, location, damage_type, severity, description,
+                                source, confidence, verified, created_at)
+    SELECT s.disaster_id, ST_SetSRID(ST_MakePoint(s.longitude, s.latitude), 4326)::geography,
+           s.damage_type, s.severity, s.description, s.source, s.confidence, s.verified,
+           coalesce(s.created_at, now())
+    FROM damage_report_import s
+    WHERE EXISTS (SELECT 1 FROM disaster_events d WHERE d.id = s.disaster_id)
+    ORDER BY s.line
+"""
+
+class RowError(ValueError):
+    pass
+
+def _required(record: dict, field: str):
+    value = record.get(field)
+    if value is None or (isinstance(value, str) and not value.strip()):
+        raise RowError(f"{field} is required")
+    return value
+
+def _number(record: dict, field: str, kind, low: float, high: float):
+    value = _required(record, field)
+    try:
+        number = kind(value)
+    except (TypeError, ValueError):
+        raise RowError(f"{field} must be {'an integer' if kind is int else 'a number'}")
+    if kind is int and isinstance(value, float) and value != number:
+        raise RowError(f"{field} must be an integer")
+    if not low <= number <= high:
+        raise RowError(f"{field} must be between {low:g} and {high:g}")
+    return number
+
+def _flag(value) -> bool:
+    if isinstance(value, bool) or value is None:
+        return bool(value)
+    normalized = str(value).strip().lower()
+    if normalized in TRUE_VALUES:
+        return True
+    if normalized in FALSE_VALUES:
+        return False
+    raise RowError("verified must be true or false")
+
+def parse_timestamp(value) -> Optional[datetime]:
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return None
+    try:
+        moment = datetime.fromisoformat(str(value).strip().replace("Z", "+00:00"))
+    except ValueError:
+        raise RowError("created_at must be an ISO 8601 timestamp")
+    return moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
+
+def parse_report(record) -> dict:
+    """Validate one raw record into damage report fields; raises RowError"""
+    if not isinstance(record, dict):
+        raise RowError("expected an object")
+    return {
+        "disaster_id": _number(record, "disaster_id", int, 1, 2 ** 31 - 1),
+        "latitude": _number(record, "latitude", float, -90, 90),
+        "longitude": _number(record, "longitude", float, -180, 180),
+        "damage_type": str(_required(record, "damage_type")).strip(),
+        "severity": _number(record, "severity", int, 1, 10),
+        "description": record.get("description") or None,
+        "source": str(_required(record, "source")).strip(),
+        "confidence": _number(record, "confidence", float, 0, 1),
+        "verified": _flag(record.get("verified")),
+        "created_at": parse_timestamp(record.get("created_at")),
+    }
+
+def read_records(stream: TextIO, fmt: str) -> Iterator[Tuple[int, object]]:
+    """(line number, raw record) pairs; undecodable JSONL lines come through as RowError"""
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+    elif fmt == "jsonl":
+        for line_number, line in enumerate(stream, 1):
+            if not line.strip():
+                continue
+            try:
+                yield line_number, json.loads(line)
+            except ValueError:
+                yield line_number, RowError("invalid JSON")
+    else:
+        raise ValueError(f"Unknown import format '{fmt}'")
+
+def _copy_value(value) -> str:
+    """A value in COPY text format"""
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+class ImportResult:
+    def __init__(self, max_errors: int):
+        self.max_errors = max_errors
+        self.rows = 0
+        self.imported = 0
+        self.rejected = 0
+        self.errors: List[Dict] = []
+        self.disaster_ids = set()
+
+    def reject(self, line: int, error: str):
+        self.rejected += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"line": line, "error": error})
+
+    def as_dict(self) -> dict:
+        return {
+            "rows": self.rows,
+            "imported": self.imported,
+            "rejected": self.rejected,
+            "errors": self.errors,
+            "disaster_ids": sorted(self.disaster_ids),
+        }
+
+def _load_chunk(engine: Engine, chunk: List[Tuple[int, dict]], result: ImportResult):
+    lines = ["\t".join(_copy_value(v) for v in (line, *(report[c] for c in STAGING_COLUMNS[1:])))
+             for line, report in chunk]
+    now = datetime.now(timezone.utc)
+    days = {(report["created_at"] or now).astimezone(timezone.utc).date() for _, report in chunk}
+    with engine.begin() as conn:
+        cursor = conn.connection.cursor()
+        cursor.execute(STAGING_DDL)
+        cursor.copy_expert(f"COPY damage_report_import ({', '.join(STAGING_COLUMNS)}) FROM STDIN",
+                           io.StringIO("\n".join(lines) + "\n"))
+        cursor.close()
+        # Only the days present: a backfill spanning months shouldn't create
+        # every partition in between, and rows must not land in the default
+        # partition, which would block creating their day's partition later
+        for day in sorted(days):
+            ensure_partitions(conn, day, day)
+        unknown = conn.execute(text(UNKNOWN_DISASTER_SQL)).all()
+        inserted = conn.execute(text(INSERT_SQL)).rowcount
+    for row in unknown:
+        result.reject(row.line, f"disaster {row.disaster_id} does not exist")
+    missing = {row.disaster_id for row in unknown}
+    result.disaster_ids.update(report["disaster_id"] for _, report in chunk
+                               if report["disaster_id"] not in missing)
+    result.imported += inserted
+
+def import_reports(engine: Engine, stream: TextIO, fmt: str, chunk_size: Optional[int] = None,
+                   max_errors: Optional[int] = None) -> dict:
+    """Validate and load every report in `stream`; returns counts and the first errors"""
+    chunk_size = chunk_size or settings.import_chunk_size
+    result = ImportResult(settings.import_max_errors if max_errors is None else max_errors)
+    chunk: List[Tuple[int, dict]] = []
+    try:
+        for line, record in read_records(stream, fmt):
+            result.rows += 1
+            try:
+                if isinstance(record, RowError):
+                    raise record
+                chunk.append((line, parse_report(record)))
+            except RowError as e:
+                result.reject(line, str(e))
+                continue
+            if len(chunk) >= chunk_size:
+                _load_chunk(engine, chunk, result)
+                chunk = []
+        if chunk:
+            _load_chunk(engine, chunk, result)
+    finally:
+        # Chunks already committed stay, so account for them even on failure
+        if result.imported:
+            _refresh_derived_state(result.disaster_ids)
+    return result.as_dict()
+
+def _refresh_derived_state(disaster_ids):
+    db = SessionLocal()
+    try:
+        for disaster_id in sorted(disaster_ids):
+            # The agents read incidents, not raw reports
+            backfill_incidents(db, disaster_id)
+            rebuild_disaster_summaries(db, disaster_id)
+    finally:
+        db.close()
+    table_versions.bump("damage_reports", "incidents")
+    # Heat maps are reloaded from the table on next read
+    severity_fields.clear()
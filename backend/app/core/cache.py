@@ -0,0 +1,138 @@
+"""
+Response caching for the polled list/detail endpoints.
+
+Every table has a version counter that crud bumps after each committed
+write. Cached bodies are keyed by request path, query string and the
+versions of the tables the response depends on, so a write simply makes
+older entries unreachable and they age out of the LRU. Bodies carry a
+strong ETag (a hash of the exact bytes), which lets a client revalidate
+with If-None-Match and get a 304 without the endpoint touching the
+database.
+
+Versions live in process memory: with several API workers, each worker
+invalidates on its own writes only, so run a single worker (or sticky
+routing) when relying on the cache for cross-client freshness.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable, Iterable, Optional, Tuple
+
+from fastapi import Request, Response
+
+from .compression import MIN_COMPRESS_BYTES, compress, negotiate_encoding
+from .config import settings
+
+class TableVersions:
+    """Monotonic per-table write counters"""
+
+    def __init__(self):
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def bump(self, *tables: str):
+        with self._lock:
+            for table in tables:
+                self._versions[table] = self._versions.get(table, 0) + 1
+
+    def snapshot(self, tables: Iterable[str]) -> Tuple[int, ...]:
+        with self._lock:
+            return tuple(self._versions.get(table, 0) for table in tables)
+
+class CachedBody:
+    """A response body as sent on the wire, i.e. already content-encoded"""
+    __slots__ = ("body", "etag", "media_type", "encoding")
+
+    def __init__(self, body: bytes, media_type: str = "application/json", encoding: Optional[str] = None):
+        self.body = body
+        self.etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+        self.media_type = media_type
+        self.encoding = encoding
+
+class ResponseCache:
+    """Bounded LRU of serialized response bodies"""
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[tuple, CachedBody]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: tuple) -> Optional[CachedBody]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: tuple, entry: CachedBody):
+        if len(entry.body) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous.body)
+            self._entries[key] = entry
+            self._bytes += len(entry.body)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted.body)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+table_versions = TableVersions()
+response_cache = ResponseCache(settings.response_cache_max_entries, settings.response_cache_max_bytes)
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match uses weak comparison, so W/"x" matches "x" """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+def cache_key(request: Request, tables: Iterable[str]) -> tuple:
+    query = tuple(sorted(request.query_params.multi_items()))
+    return (request.url.path, query, table_versions.snapshot(tables))
+
+def cached_response(request: Request, tables: Iterable[str], build: Callable[[], bytes],
+                    variant: str = "json", media_type: str = "application/json") -> Response:
+    """Serve a body from the cache, building it with `build()` on a miss.
+
+    `tables` lists every table the response reads from; a write to any of
+    them invalidates the entry. `variant` distinguishes representations of
+    the same resource (e.g. row vs columnar JSON). Bodies are cached
+    compressed, once per negotiated Content-Encoding, and each encoded
+    variant gets its own strong ETag.
+    """
+    tables = tuple(tables)
+    encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+    key = cache_key(request, tables) + (variant, encoding)
+    entry = response_cache.get(key)
+    if entry is None:
+        body = build()
+        if len(body) < MIN_COMPRESS_BYTES:
+            entry = CachedBody(body, media_type)
+        else:
+            entry = CachedBody(compress(body, encoding), media_type, encoding)
+        response_cache.put(key, entry)
+
+    headers = {"ETag": entry.etag, "Cache-Control": "no-cache", "Vary": "Accept, Accept-Encoding"}
+    if etag_matches(request.headers.get("if-none-match"), entry.etag):
+        return Response(status_code=304, headers=headers)
+    if entry.encoding:
+        headers["Content-Encoding"] = entry.encoding
+    return Response(content=entry.body, media_type=entry.media_type, headers=headers)
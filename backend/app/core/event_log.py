@@ -0,0 +1,115 @@
+"""
+Sequence numbers and replay for WebSocket broadcasts.
+
+Every broadcast is stamped with a monotonically increasing `seq` and kept
+in a bounded ring buffer. It is also written to broadcast_events in small
+batches by a background flusher. A client that reconnects with
+?since=<seq> is sent the events it missed: from the ring when the gap is
+recent, otherwise from the table and then the ring. When the gap can't
+be filled it gets a single resync_required event instead and refetches
+its lists.
+
+Numbering is per API worker: it resumes from the table's highest seq at
+startup. As with the response cache, run a single worker (or sticky
+routing) when clients rely on replay.
+"""
+import asyncio
+import time
+from collections import deque
+from typing import List, Optional
+
+import orjson
+
+from .config import settings
+from .database import SessionLocal
+from ..crud import events as event_crud
+
+class EventLog:
+    def __init__(self, buffer_size: int = 1000, max_replay: int = 5000):
+        self.seq = 0
+        self.ring = deque(maxlen=buffer_size)
+        self.max_replay = max_replay
+        self.pending = []
+        self._flusher: Optional[asyncio.Task] = None
+
+    def append(self, message: dict) -> dict:
+        """Stamp a broadcast with the next seq and record it"""
+        self.seq += 1
+        message = {**message, "seq": self.seq}
+        self.ring.append(message)
+        self.pending.append((self.seq, message.get("type"), orjson.dumps(message, default=str).decode()))
+        return message
+
+    async def events_between(self, since: int, until: int) -> Optional[List[dict]]:
+        """Events with since < seq <= until, or None if they can't all be replayed"""
+        if since == until:
+            return []
+        # A client ahead of the head saw a sequence this log never issued
+        # (e.g. from before a reset), so nothing here lines up with it
+        if since < 0 or since > until or until - since > self.max_replay:
+            return None
+        ring = [event for event in list(self.ring) if since < event["seq"] <= until]
+        first_in_ring = ring[0]["seq"] if ring else until + 1
+        if first_in_ring == since + 1:
+            return ring
+        # The start of the gap has left the ring; anything still pending is
+        # also in the ring, so the table has the rest
+        older = await asyncio.to_thread(self._load, since, first_in_ring)
+        if not older or older[0]["seq"] != since + 1 or older[-1]["seq"] != first_in_ring - 1:
+            return None
+        return older + ring
+
+    def _load(self, since: int, before: int) -> List[dict]:
+        db = SessionLocal()
+        try:
+            return event_crud.get_events_between(db, since, before, self.max_replay)
+        finally:
+            db.close()
+
+    def _save(self, events):
+        db = SessionLocal()
+        try:
+            event_crud.save_events(db, events)
+        finally:
+            db.close()
+
+    def _latest_seq(self) -> int:
+        db = SessionLocal()
+        try:
+            return event_crud.latest_event_seq(db)
+        finally:
+            db.close()
+
+    async def flush(self):
+        events, self.pending = self.pending, []
+        if not events:
+            return
+        try:
+            await asyncio.to_thread(self._save, events)
+        except Exception as e:
+            print(f"Failed to persist {len(events)} broadcast events: {e}")
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(settings.ws_event_flush_interval_seconds)
+            await self.flush()
+
+    async def start(self):
+        """Resume numbering after the last persisted event and start flushing"""
+        try:
+            latest = await asyncio.to_thread(self._latest_seq)
+        except Exception as e:
+            # Without the table, start past anything a previous run could
+            # plausibly have numbered so clients never see seq go backwards
+            print(f"Could not read last broadcast seq, numbering from the clock: {e}")
+            latest = int(time.time() * 1000)
+        self.seq = max(self.seq, latest)
+        self._flusher = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        if self._flusher is not None:
+            self._flusher.cancel()
+            self._flusher = None
+        await self.flush()
+
+event_log = EventLog(settings.ws_replay_buffer_size, settings.ws_replay_max_events)
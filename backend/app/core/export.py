@@ -0,0 +1,208 @@
+"""
+Streaming columnar export of damage reports, tasks and resources.
+
+Rows leave Postgres through COPY (SELECT ...) TO STDOUT, which the server
+streams as it scans, and are parsed in fixed-size blocks by Arrow's CSV
+reader on the way in. Each block becomes one record batch, written out
+as a Parquet row group or an Arrow IPC batch, so memory stays at a few
+blocks however many rows match and no Python object is built per row.
+
+Exports can be limited to one disaster and to a created_at range; on
+damage_reports the range also prunes partitions. Columns are the
+model's, with `location` replaced by the generated latitude/longitude.
+
+Used by GET /export/{table} and by export_data.py.
+"""
+import os
+import threading
+from datetime import datetime
+from typing import Iterator, Optional
+
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.ipc as pa_ipc
+import pyarrow.parquet as pq
+from geoalchemy2 import Geography
+from sqlalchemy import BigInteger, Boolean, DateTime, Float, Integer
+from sqlalchemy.engine import Engine
+
+from .config import settings
+from ..models.disaster import DamageReport, Resource, Task
+
+EXPORT_MODELS = {"damage_reports": DamageReport, "tasks": Task, "resources": Resource}
+# format: (file extension, media type)
+EXPORT_FORMATS = {
+    "parquet": ("parquet", "application/vnd.apache.parquet"),
+    "arrow": ("arrow", "application/vnd.apache.arrow.file"),
+}
+
+def _arrow_type(column_type) -> pa.DataType:
+    if isinstance(column_type, BigInteger):
+        return pa.int64()
+    if isinstance(column_type, Integer):
+        return pa.int32()
+    if isinstance(column_type, Float):
+        return pa.float64()
+    if isinstance(column_type, Boolean):
+        return pa.bool_()
+    if isinstance(column_type, DateTime):
+        return pa.timestamp("us", tz="UTC") if column_type.timezone else pa.timestamp("us")
+    return pa.string()
+
+def export_schema(table: str) -> pa.Schema:
+    model = EXPORT_MODELS[table]
+    return pa.schema([
+        pa.field(column.name, _arrow_type(column.type))
+        for column in model.__table__.columns if not isinstance(column.type, Geography)
+    ])
+
+def validate_export(table: str, fmt: str = "parquet", disaster_id: Optional[int] = None):
+    """Raise ValueError for an export that can't be produced"""
+    if table not in EXPORT_MODELS:
+        raise ValueError(f"Unknown export table '{table}'")
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format '{fmt}'")
+    if disaster_id is not None and table == "resources":
+        raise ValueError("resources are not tied to a disaster; filter them by time only")
+
+def export_query(cursor, table: str, disaster_id: Optional[int] = None,
+                 since: Optional[datetime] = None, until: Optional[datetime] = None) -> str:
+    """The SELECT to export, with filters inlined (COPY takes no bind parameters)"""
+    validate_export(table, disaster_id=disaster_id)
+    conditions, params = [], {}
+    if disaster_id is not None:
+        conditions.append("disaster_id = %(disaster_id)s")
+        params["disaster_id"] = disaster_id
+    if since is not None:
+        conditions.append("created_at >= %(since)s")
+        params["since"] = since
+    if until is not None:
+        conditions.append("created_at < %(until)s")
+        params["until"] = until
+    query = f"SELECT {', '.join(export_schema(table).names)} FROM {table}"
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    return cursor.mogrify(query, params).decode()
+
+def iter_batches(engine: Engine, table: str, disaster_id: Optional[int] = None,
+                 since: Optional[datetime] = None, until: Optional[datetime] = None) -> Iterator[pa.RecordBatch]:
+    """Record batches of the table's matching rows, streamed from the server"""
+    schema = export_schema(table)
+    raw = engine.raw_connection()
+    cursor = raw.cursor()
+    try:
+        sql = f"COPY ({export_query(cursor, table, disaster_id, since, until)}) TO STDOUT WITH (FORMAT csv)"
+        # Timestamps come out as +00 so Arrow reads them as UTC
+        cursor.execute("SET LOCAL TIME ZONE 'UTC'")
+    except Exception:
+        raw.close()
+        raise
+
+    # COPY writes into one end of a pipe from a helper thread while Arrow
+    # parses the other end, so neither side holds more than a block
+    read_fd, write_fd = os.pipe()
+    source, sink = os.fdopen(read_fd, "rb"), os.fdopen(write_fd, "wb")
+    failure = []
+
+    def copy_out():
+        try:
+            cursor.copy_expert(sql, sink)
+        except Exception as e:
+            failure.append(e)
+        finally:
+            sink.close()
+
+    thread = threading.Thread(target=copy_out, name=f"export:{table}", daemon=True)
+    thread.start()
+    finished = False
+    try:
+        reader = pa_csv.open_csv(
+            source,
+            read_options=pa_csv.ReadOptions(column_names=schema.names,
+                                            block_size=settings.export_block_size_mb << 20),
+            parse_options=pa_csv.ParseOptions(newlines_in_values=True),
+            convert_options=pa_csv.ConvertOptions(
+                column_types=schema, true_values=["t"], false_values=["f"],
+                # COPY writes NULL unquoted and empty strings as ""
+                strings_can_be_null=True, quoted_strings_can_be_null=False,
+            ),
+        )
+        for batch in reader:
+            yield batch
+        finished = True
+    except pa.ArrowInvalid:
+        # A COPY that fails part way leaves a truncated stream; report the
+        # database error rather than the parse error it causes
+        thread.join()
+        if not failure:
+            raise
+    finally:
+        # Closing our end also stops a COPY whose consumer went away
+        source.close()
+        thread.join()
+        if finished and not failure:
+            raw.close()
+        else:
+            # The connection may be mid-COPY; don't return it to the pool
+            raw.invalidate()
+    if failure:
+        raise failure[0]
+
+class _ChunkSink:
+    """Write-only file that keeps what is written until drained"""
+
+    def __init__(self):
+        self.parts = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        self.parts.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data, self.parts = b"".join(self.parts), []
+        return data
+
+def _open_writer(fmt: str, where, schema: pa.Schema):
+    if fmt == "parquet":
+        return pq.ParquetWriter(where, schema, compression=settings.export_parquet_compression)
+    return pa_ipc.new_file(where, schema)
+
+def stream_export(engine: Engine, table: str, fmt: str, **filters) -> Iterator[bytes]:
+    """The export file as a sequence of byte chunks, about one per record batch"""
+    validate_export(table, fmt, filters.get("disaster_id"))
+    sink = _ChunkSink()
+    writer = _open_writer(fmt, pa.PythonFile(sink, mode="w"), export_schema(table))
+    for batch in iter_batches(engine, table, **filters):
+        writer.write_batch(batch)
+        data = sink.drain()
+        if data:
+            yield data
+    writer.close()
+    yield sink.drain()
+
+def export_to_file(engine: Engine, table: str, fmt: str, path: str, **filters) -> int:
+    """Write the export to `path`; returns the number of rows"""
+    validate_export(table, fmt, filters.get("disaster_id"))
+    tmp_path = f"{path}.tmp"
+    rows = 0
+    writer = _open_writer(fmt, tmp_path, export_schema(table))
+    try:
+        for batch in iter_batches(engine, table, **filters):
+            writer.write_batch(batch)
+            rows += batch.num_rows
+    finally:
+        writer.close()
+    os.replace(tmp_path, path)
+    return rows
@@ -0,0 +1,230 @@
+"""
+Live, time-decayed damage intensity raster per disaster.
+
+Each disaster gets a square NumPy grid centred on its location. A new
+damage report adds a small precomputed Gaussian kernel, weighted by
+severity x confidence, around its cell: constant work per report no
+matter how many reports came before.
+
+Intensity decays exponentially with a configurable half-life. Rather
+than touching every cell on every tick, the grid stores values in units
+of a reference time: a report at time t is added with weight
+w * exp(lambda * (t - t_ref)), and reads multiply by
+exp(-lambda * (now - t_ref)). When the growth factor gets large the grid
+is rebased onto a new reference time, which is the only full-grid write
+and happens once every few days of uptime.
+
+Fields live in process memory and are built on first read from the
+recent reports in damage_reports, then kept current by crud as reports
+are written. Like the response cache, each API worker only sees its own
+writes after the initial load.
+"""
+import math
+import threading
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from .config import settings
+
+METERS_PER_DEGREE = 111_320.0
+# Rebase once values have grown by e^REBASE_EXPONENT, well inside float64 range
+REBASE_EXPONENT = 50.0
+# Reports older than this many half-lives contribute under 1% and are not loaded
+WARM_HALF_LIVES = 7
+# How long the ids of loaded reports are kept to skip them in record(); the
+# writers of reports committed before the load call it right after commit
+LOADED_IDS_GRACE_SECONDS = 300
+
+def gaussian_kernel(sigma_cells: float) -> np.ndarray:
+    radius = max(1, int(math.ceil(3 * sigma_cells)))
+    offsets = np.arange(-radius, radius + 1)
+    xx, yy = np.meshgrid(offsets, offsets)
+    return np.exp(-(xx ** 2 + yy ** 2) / (2 * sigma_cells ** 2))
+
+class SeverityField:
+    """Decaying intensity grid for one disaster; row 0 is the northern edge"""
+
+    def __init__(self, latitude: float, longitude: float, radius_km: float, size: int,
+                 sigma_meters: float, half_life_seconds: float):
+        self.size = size
+        radius_m = radius_km * 1000
+        self.cell_meters = 2 * radius_m / size
+        self.lat_span = radius_m / METERS_PER_DEGREE
+        self.lng_span = radius_m / (METERS_PER_DEGREE * max(math.cos(math.radians(latitude)), 1e-6))
+        self.min_lat, self.max_lat = latitude - self.lat_span, latitude + self.lat_span
+        self.min_lng, self.max_lng = longitude - self.lng_span, longitude + self.lng_span
+        self.kernel = gaussian_kernel(sigma_meters / self.cell_meters)
+        self.kernel_radius = self.kernel.shape[0] // 2
+        self.decay_rate = math.log(2) / half_life_seconds
+        self.grid = np.zeros((size, size), dtype=np.float64)
+        self.reference_time = time.time()
+        self.reports = 0
+        # Sorted ids of the reports added by the initial load, until expiry
+        self.loaded_ids: Optional[np.ndarray] = None
+        self.loaded_ids_expire_at = 0.0
+        self.lock = threading.Lock()
+
+    @property
+    def bounds(self):
+        return self.min_lng, self.min_lat, self.max_lng, self.max_lat
+
+    def cell(self, latitude: float, longitude: float):
+        row = int((self.max_lat - latitude) / (2 * self.lat_span) * self.size)
+        col = int((longitude - self.min_lng) / (2 * self.lng_span) * self.size)
+        return row, col
+
+    def cell_center(self, row: int, col: int):
+        latitude = self.max_lat - (row + 0.5) * 2 * self.lat_span / self.size
+        longitude = self.min_lng + (col + 0.5) * 2 * self.lng_span / self.size
+        return latitude, longitude
+
+    def _rebase(self, now: float):
+        self.grid *= math.exp(-self.decay_rate * (now - self.reference_time))
+        self.reference_time = now
+
+    def add(self, latitude: float, longitude: float, weight: float, at: Optional[float] = None) -> bool:
+        """Splat one report; returns False if it falls outside the grid"""
+        if latitude is None or longitude is None or weight <= 0:
+            return False
+        row, col = self.cell(latitude, longitude)
+        r = self.kernel_radius
+        if not (-r <= row < self.size + r and -r <= col < self.size + r):
+            return False
+        at = time.time() if at is None else at
+        with self.lock:
+            if self.decay_rate * (at - self.reference_time) > REBASE_EXPONENT:
+                self._rebase(at)
+            scaled = weight * math.exp(self.decay_rate * (at - self.reference_time))
+            # Clip the kernel at the grid edges
+            top, bottom = max(row - r, 0), min(row + r + 1, self.size)
+            left, right = max(col - r, 0), min(col + r + 1, self.size)
+            self.grid[top:bottom, left:right] += scaled * self.kernel[
+                top - (row - r):bottom - (row - r), left - (col - r):right - (col - r)]
+            self.reports += 1
+        return True
+
+    def was_loaded(self, report_id: int) -> bool:
+        """Whether the report was already added by the initial load"""
+        ids = self.loaded_ids
+        if ids is None:
+            return False
+        if time.monotonic() > self.loaded_ids_expire_at:
+            self.loaded_ids = None
+            return False
+        index = int(np.searchsorted(ids, report_id))
+        return index < len(ids) and int(ids[index]) == report_id
+
+    def snapshot(self, now: Optional[float] = None) -> np.ndarray:
+        """Decayed intensities as of `now`"""
+        now = time.time() if now is None else now
+        with self.lock:
+            return self.grid * math.exp(-self.decay_rate * (now - self.reference_time))
+
+    def hotspots(self, limit: int = 10, min_fraction: float = 0.2, now: Optional[float] = None) -> List[Dict]:
+        """Local maxima of the decayed field, strongest first.
+
+        A cell is a hotspot if no neighbour is stronger and it reaches
+        `min_fraction` of the field's maximum.
+        """
+        field = self.snapshot(now)
+        peak = float(field.max())
+        if peak <= 0:
+            return []
+        padded = np.pad(field, 1, constant_values=-np.inf)
+        neighbours = np.max(np.stack([
+            padded[1 + dy:1 + dy + self.size, 1 + dx:1 + dx + self.size]
+            for dy in (-1, 0, 1) for dx in (-1, 0, 1) if dy or dx
+        ]), axis=0)
+        rows, cols = np.nonzero((field >= neighbours) & (field >= min_fraction * peak))
+        order = np.argsort(field[rows, cols])[::-1][:limit]
+        spots = []
+        for row, col in zip(rows[order], cols[order]):
+            latitude, longitude = self.cell_center(int(row), int(col))
+            spots.append({
+                "latitude": round(latitude, 6),
+                "longitude": round(longitude, 6),
+                "intensity": round(float(field[row, col]), 4),
+                "relative_intensity": round(float(field[row, col]) / peak, 4),
+            })
+        return spots
+
+    def quantized(self, now: Optional[float] = None):
+        """The decayed field as uint8 (0..255 of the maximum) and that maximum"""
+        field = self.snapshot(now)
+        peak = float(field.max())
+        if peak <= 0:
+            return np.zeros(field.shape, dtype=np.uint8), 0.0
+        return np.rint(field / peak * 255).astype(np.uint8), peak
+
+def report_weight(severity, confidence) -> float:
+    return float(severity or 0) * float(confidence if confidence is not None else 1.0)
+
+class SeverityFields:
+    """Per-disaster fields, loaded on first use"""
+
+    def __init__(self):
+        self._fields: Dict[int, SeverityField] = {}
+        self._lock = threading.Lock()
+
+    def get(self, db: Session, disaster_id: int) -> Optional[SeverityField]:
+        """The disaster's field, loading it from recent reports on first use; None if no such disaster"""
+        field = self._fields.get(disaster_id)
+        if field is not None:
+            return field
+        with self._lock:
+            field = self._fields.get(disaster_id)
+            if field is None:
+                field = self._load(db, disaster_id)
+                if field is not None:
+                    self._fields[disaster_id] = field
+        return field
+
+    def _load(self, db: Session, disaster_id: int) -> Optional[SeverityField]:
+        disaster = db.execute(text(
+            "SELECT latitude, longitude FROM disaster_events WHERE id = :disaster_id"
+        ), {"disaster_id": disaster_id}).first()
+        if disaster is None or disaster.latitude is None:
+            return None
+        half_life = settings.heatmap_half_life_minutes * 60
+        field = SeverityField(
+            disaster.latitude, disaster.longitude,
+            radius_km=settings.heatmap_radius_km,
+            size=settings.heatmap_grid_size,
+            sigma_meters=settings.heatmap_kernel_sigma_meters,
+            half_life_seconds=half_life,
+        )
+        lookback_seconds = min(WARM_HALF_LIVES * half_life, settings.damage_report_retention_hours * 3600)
+        rows = db.execute(text("""
+            SELECT id, latitude, longitude, severity, confidence, extract(epoch FROM created_at) AS at
+            FROM damage_reports
+            WHERE disaster_id = :disaster_id AND created_at >= now() - make_interval(secs => :lookback)
+        """), {"disaster_id": disaster_id, "lookback": lookback_seconds})
+        loaded = []
+        for row in rows:
+            field.add(row.latitude, row.longitude, report_weight(row.severity, row.confidence), float(row.at))
+            loaded.append(row.id)
+        # Ids are not a commit order (a report can commit after the load with
+        # a lower id than one it saw), so dedupe by the ids actually loaded
+        field.loaded_ids = np.sort(np.array(loaded, dtype=np.int64))
+        field.loaded_ids_expire_at = time.monotonic() + LOADED_IDS_GRACE_SECONDS
+        return field
+
+    def record(self, report):
+        """Add a just-committed report to its disaster's field, if that field is loaded"""
+        with self._lock:
+            field = self._fields.get(report.disaster_id)
+        # Reports already picked up by the initial load are skipped
+        if field is None or field.was_loaded(report.id):
+            return
+        at = report.created_at.timestamp() if report.created_at is not None else None
+        field.add(report.latitude, report.longitude, report_weight(report.severity, report.confidence), at)
+
+    def clear(self):
+        with self._lock:
+            self._fields.clear()
+
+severity_fields = SeverityFields()
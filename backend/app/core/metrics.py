@@ -0,0 +1,200 @@
+"""
+Prometheus metrics for the API, database, WebSocket fan-out, admission
+control and agents.
+
+Everything is recorded in process memory and rendered on scrape by
+GET /metrics. Per-request work is a couple of perf_counter calls and
+counter increments; pool and WebSocket gauges are read from their
+owners only when scraped.
+
+Route labels use the route template (/api/v1/tasks/{task_id}), never the
+raw path, so label cardinality stays bounded.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+from sqlalchemy import event
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LLM_BUCKETS = (0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 40.0, 80.0)
+STATEMENT_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+
+REQUEST_LATENCY = Histogram(
+    "aidr_http_request_duration_seconds", "HTTP request latency by route",
+    ["method", "route", "status"], buckets=LATENCY_BUCKETS,
+)
+SQL_STATEMENTS = Counter(
+    "aidr_sql_statements_total", "SQL statements executed, by statement verb", ["verb"],
+)
+SQL_DURATION = Histogram(
+    "aidr_sql_statement_duration_seconds", "SQL statement execution time, by statement verb",
+    ["verb"], buckets=LATENCY_BUCKETS,
+)
+REQUEST_SQL_STATEMENTS = Histogram(
+    "aidr_http_request_sql_statements", "SQL statements executed per request",
+    ["method", "route"], buckets=STATEMENT_COUNT_BUCKETS,
+)
+REQUEST_SQL_DURATION = Histogram(
+    "aidr_http_request_sql_duration_seconds", "Total SQL time per request",
+    ["method", "route"], buckets=LATENCY_BUCKETS,
+)
+WS_MESSAGES_DROPPED = Counter(
+    "aidr_ws_messages_dropped_total", "WebSocket messages dropped because a client's send queue was full",
+)
+ADMISSION_IN_FLIGHT = Gauge(
+    "aidr_admission_in_flight", "Requests holding an admission slot, by route", ["route"],
+)
+ADMISSION_QUEUE_DEPTH = Gauge(
+    "aidr_admission_queue_depth", "Requests waiting for an admission slot, by route", ["route"],
+)
+ADMISSION_SHED = Counter(
+    "aidr_admission_shed_total", "Requests refused with 429 by admission control", ["route", "reason"],
+)
+ADMISSION_WAIT = Histogram(
+    "aidr_admission_wait_seconds", "Time spent queued for an admission slot", ["route"], buckets=LATENCY_BUCKETS,
+)
+LLM_LATENCY = Histogram(
+    "aidr_llm_request_duration_seconds", "LLM call latency by agent",
+    ["agent_type", "model"], buckets=LLM_BUCKETS,
+)
+LLM_TOKENS = Counter(
+    "aidr_llm_tokens_total", "LLM tokens used by agent", ["agent_type", "model", "kind"],
+)
+LLM_ERRORS = Counter(
+    "aidr_llm_errors_total", "Failed LLM calls by agent", ["agent_type", "model", "error"],
+)
+LLM_QUEUE_WAIT = Histogram(
+    "aidr_llm_queue_wait_seconds", "Time an LLM call waited for a gateway slot and rate budget",
+    ["agent_type", "priority"], buckets=(0.0, 0.05, 0.25) + LLM_BUCKETS,
+)
+LLM_RETRIES = Counter(
+    "aidr_llm_retries_total", "LLM calls retried by the gateway, by error", ["agent_type", "error"],
+)
+
+class RequestStats:
+    """SQL activity attributed to the request being served"""
+    __slots__ = ("statements", "sql_seconds")
+
+    def __init__(self):
+        self.statements = 0
+        self.sql_seconds = 0.0
+
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+def _statement_verb(statement: str) -> str:
+    verb = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "OTHER"
+    # WITH ... / DO ... / COPY ... etc. are rare enough to share a label
+    return verb if verb in ("SELECT", "INSERT", "UPDATE", "DELETE") else "OTHER"
+
+def instrument_engine(engine):
+    """Time every statement the engine executes"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        verb = _statement_verb(statement)
+        SQL_STATEMENTS.labels(verb).inc()
+        SQL_DURATION.labels(verb).observe(elapsed)
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.statements += 1
+            stats.sql_seconds += elapsed
+
+def register_pool_metrics(engine):
+    pool = engine.pool
+    Gauge("aidr_db_pool_size", "Configured connection pool size").set_function(pool.size)
+    Gauge("aidr_db_pool_checked_out", "Connections currently checked out").set_function(pool.checkedout)
+    Gauge("aidr_db_pool_overflow", "Connections open beyond pool_size").set_function(lambda: max(0, pool.overflow()))
+
+def register_websocket_metrics(manager):
+    Gauge("aidr_ws_connections", "Open WebSocket connections").set_function(
+        lambda: len(manager.active_connections))
+    Gauge("aidr_ws_send_queue_depth_total", "Messages waiting in all client send queues").set_function(
+        lambda: sum(manager.queue_depths()))
+    Gauge("aidr_ws_send_queue_depth_max", "Deepest single-client send queue").set_function(
+        lambda: max(manager.queue_depths(), default=0))
+
+def register_llm_gateway_metrics(gateway):
+    Gauge("aidr_llm_in_flight", "LLM calls in flight through the gateway").set_function(
+        lambda: gateway.in_flight)
+    Gauge("aidr_llm_queued", "LLM calls waiting for the gateway").set_function(
+        lambda: gateway.queued)
+
+@contextmanager
+def observe_llm_call(agent_type: str, model: str):
+    """Record latency and errors of one LLM call; yields a callback for the response"""
+    started = time.perf_counter()
+
+    def record_usage(response):
+        usage = getattr(response, "usage", None)
+        if usage is not None:
+            LLM_TOKENS.labels(agent_type, model, "prompt").inc(usage.prompt_tokens or 0)
+            LLM_TOKENS.labels(agent_type, model, "completion").inc(usage.completion_tokens or 0)
+
+    try:
+        yield record_usage
+    except Exception as e:
+        LLM_ERRORS.labels(agent_type, model, type(e).__name__).inc()
+        raise
+    finally:
+        LLM_LATENCY.labels(agent_type, model).observe(time.perf_counter() - started)
+
+def render_metrics():
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+def route_label(scope) -> str:
+    """Route template for a served request, e.g. /api/v1/tasks/{task_id}.
+
+    Read off the matched route, never rebuilt from path param values,
+    which can collide with literal segments. Older FastAPI copies included
+    routes with the router prefix in their path; newer versions keep the
+    router's own route and put the prefixed template in the effective
+    route context.
+    """
+    route = scope.get("route")
+    if route is None:
+        return "unmatched"
+    context = (scope.get("fastapi") or {}).get("effective_route_context")
+    path = getattr(context, "path", None) or route.path
+    # Prefix of a mounted sub-application, if any
+    return scope.get("root_path", "") + path
+
+class MetricsMiddleware:
+    """ASGI middleware timing each HTTP request and the SQL it runs"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            _request_stats.reset(token)
+            route = route_label(scope)
+            if route != "/metrics":
+                method = scope["method"]
+                REQUEST_LATENCY.labels(method, route, str(status["code"])).observe(elapsed)
+                REQUEST_SQL_STATEMENTS.labels(method, route).observe(stats.statements)
+                REQUEST_SQL_DURATION.labels(method, route).observe(stats.sql_seconds)
@@ -0,0 +1,179 @@
+"""
+Maintenance of the time-partitioned damage_reports table.
+
+damage_reports is range partitioned by created_at into one partition per
+UTC day (damage_reports_pYYYYMMDD) plus a default partition. This module
+creates partitions ahead of time and archives partitions that have aged
+out of the retention window: they are detached, copied to a gzipped CSV
+and dropped, so hot queries and vacuum only ever see recent data.
+"""
+import gzip
+import os
+import re
+from datetime import date, datetime, timedelta, timezone
+from typing import List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+from .cache import table_versions
+from .config import settings
+
+PARENT_TABLE = "damage_reports"
+PARTITION_PREFIX = f"{PARENT_TABLE}_p"
+DEFAULT_PARTITION = f"{PARENT_TABLE}_default"
+_PARTITION_RE = re.compile(rf"^{PARTITION_PREFIX}(\d{{8}})$")
+
+def partition_name(day: date) -> str:
+    return f"{PARTITION_PREFIX}{day:%Y%m%d}"
+
+def partition_day(name: str) -> Optional[date]:
+    """Return the day a partition covers, or None if the name isn't ours"""
+    match = _PARTITION_RE.match(name)
+    if not match:
+        return None
+    return datetime.strptime(match.group(1), "%Y%m%d").date()
+
+def _utc_midnight(day: date) -> str:
+    return f"{day.isoformat()} 00:00:00+00"
+
+def ensure_default_partition(conn: Connection):
+    conn.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF {PARENT_TABLE} DEFAULT"
+    ))
+
+def _insertable_columns(conn: Connection) -> List[str]:
+    """damage_reports columns that can be written (generated ones can't)"""
+    return list(conn.execute(text("""
+        SELECT column_name FROM information_schema.columns
+        WHERE table_schema = current_schema() AND table_name = :parent AND is_generated = 'NEVER'
+        ORDER BY ordinal_position
+    """), {"parent": PARENT_TABLE}).scalars())
+
+def _create_partition(conn: Connection, name: str, day: date, has_default: bool):
+    bounds = {"lower": _utc_midnight(day), "upper": _utc_midnight(day + timedelta(days=1))}
+    create = (f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {PARENT_TABLE} "
+              f"FOR VALUES FROM ('{bounds['lower']}') TO ('{bounds['upper']}')")
+    stranded = has_default and conn.execute(text(
+        f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} "
+        f"WHERE created_at >= :lower AND created_at < :upper)"
+    ), bounds).scalar()
+    if not stranded:
+        conn.execute(text(create))
+        return
+    # Rows for the day already sit in the default partition (maintenance fell
+    # behind), and Postgres refuses a partition whose rows the default holds:
+    # move them out, create the partition, and route them back into it
+    columns = ", ".join(_insertable_columns(conn))
+    conn.execute(text(
+        f"CREATE TEMPORARY TABLE {name}_stranded ON COMMIT DROP AS "
+        f"SELECT {columns} FROM {DEFAULT_PARTITION} WITH NO DATA"
+    ))
+    conn.execute(text(f"""
+        WITH moved AS (
+            DELETE FROM {DEFAULT_PARTITION} WHERE created_at >= :lower AND created_at < :upper
+            RETURNING {columns}
+        )
+        INSERT INTO {name}_stranded ({columns}) SELECT {columns} FROM moved
+    """), bounds)
+    conn.execute(text(create))
+    conn.execute(text(f"INSERT INTO {PARENT_TABLE} ({columns}) SELECT {columns} FROM {name}_stranded"))
+
+def ensure_partitions(conn: Connection, start: date, end: date) -> List[str]:
+    """Create daily partitions for every day in [start, end]; returns the ones created"""
+    existing = set(attached_partitions(conn))
+    has_default = DEFAULT_PARTITION in existing
+    created = []
+    day = start
+    while day <= end:
+        name = partition_name(day)
+        if name not in existing:
+            _create_partition(conn, name, day, has_default)
+            created.append(name)
+        day += timedelta(days=1)
+    return created
+
+def attached_partitions(conn: Connection) -> List[str]:
+    rows = conn.execute(text("""
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class parent ON pg_inherits.inhparent = parent.oid
+        JOIN pg_class child ON pg_inherits.inhrelid = child.oid
+        WHERE parent.relname = :parent
+    """), {"parent": PARENT_TABLE}).scalars().all()
+    return list(rows)
+
+def detached_partitions(conn: Connection) -> List[str]:
+    """Day partitions left detached by an interrupted archive run"""
+    rows = conn.execute(text("""
+        SELECT c.relname
+        FROM pg_class c
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE c.relkind = 'r'
+          AND n.nspname = current_schema()
+          AND c.relname LIKE :prefix
+          AND NOT c.relispartition
+    """), {"prefix": f"{PARTITION_PREFIX}%"}).scalars().all()
+    return [name for name in rows if partition_day(name) is not None]
+
+def expired_partitions(conn: Connection, retention_hours: int, now: Optional[datetime] = None) -> List[str]:
+    """Attached day partitions whose whole range is older than the retention window"""
+    now = now or datetime.now(timezone.utc)
+    cutoff = now - timedelta(hours=retention_hours)
+    expired = []
+    for name in attached_partitions(conn):
+        day = partition_day(name)
+        if day is None:
+            continue
+        upper = datetime.combine(day + timedelta(days=1), datetime.min.time(), tzinfo=timezone.utc)
+        if upper <= cutoff:
+            expired.append(name)
+    return sorted(expired)
+
+def archive_partition(engine: Engine, name: str, archive_dir: str) -> str:
+    """Copy a detached partition to <archive_dir>/<name>.csv.gz, then drop it"""
+    os.makedirs(archive_dir, exist_ok=True)
+    path = os.path.join(archive_dir, f"{name}.csv.gz")
+    tmp_path = f"{path}.tmp"
+
+    raw = engine.raw_connection()
+    try:
+        with gzip.open(tmp_path, "wb") as archive:
+            cursor = raw.cursor()
+            cursor.copy_expert(f"COPY {name} TO STDOUT WITH (FORMAT csv, HEADER)", archive)
+            cursor.close()
+        raw.commit()
+    finally:
+        raw.close()
+    os.replace(tmp_path, path)
+
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP TABLE {name}"))
+    return path
+
+def archive_expired_partitions(engine: Engine, retention_hours: Optional[int] = None,
+                               archive_dir: Optional[str] = None) -> List[str]:
+    """Detach, archive and drop every partition older than the retention window"""
+    retention_hours = retention_hours or settings.damage_report_retention_hours
+    archive_dir = archive_dir or settings.partition_archive_dir
+
+    # Detaching takes a brief lock on the parent, so do it in its own
+    # transaction and keep the (slow) copy out of that lock.
+    with engine.begin() as conn:
+        expired = expired_partitions(conn, retention_hours)
+        for name in expired:
+            conn.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}"))
+        pending = detached_partitions(conn)
+    if expired:
+        table_versions.bump(PARENT_TABLE)
+
+    return [archive_partition(engine, name, archive_dir) for name in sorted(pending)]
+
+def run_partition_maintenance(engine: Engine) -> dict:
+    """Create upcoming partitions and archive expired ones"""
+    today = datetime.now(timezone.utc).date()
+    with engine.begin() as conn:
+        ensure_default_partition(conn)
+        created = ensure_partitions(conn, today, today + timedelta(days=settings.partition_premake_days))
+    archived = archive_expired_partitions(engine)
+    return {"created": created, "archived": archived}
@@ -0,0 +1,176 @@
+"""
+Opt-in per-request SQL profiler with N+1 detection.
+
+With `sql_profiler_enabled` on, every statement a request executes is
+recorded under its normalized shape (literals and bind parameters
+replaced by `?`, IN lists collapsed), with a count and cumulative time.
+Responses get a Server-Timing header, requests that repeat one shape at
+least `sql_profiler_n_plus_one_threshold` times are flagged as probable
+N+1 and logged, and the most recent profiles are kept for
+GET /debug/sql-profiles.
+
+Outside the server, `profile_queries()` records the same data for a block
+of code; the `query_budget` pytest fixture in conftest.py builds on it.
+"""
+import re
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+from sqlalchemy import event
+
+_WHITESPACE = re.compile(r"\s+")
+_BIND_PARAM = re.compile(r"%\(\w+\)s|:\w+|\$\d+|%s|\?")
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+
+def normalize_statement(statement: str) -> str:
+    """Reduce a statement to its shape so repeats with different values group together"""
+    shape = _STRING_LITERAL.sub("?", statement)
+    shape = _BIND_PARAM.sub("?", shape)
+    shape = _NUMBER_LITERAL.sub("?", shape)
+    shape = _IN_LIST.sub("IN (?)", shape)
+    return _WHITESPACE.sub(" ", shape).strip()
+
+class StatementStats:
+    __slots__ = ("count", "seconds")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+class QueryProfile:
+    """Statements executed during one request (or profiled block)"""
+
+    def __init__(self, label: str = ""):
+        self.label = label
+        self.statements: Dict[str, StatementStats] = {}
+        self.total_count = 0
+        self.total_seconds = 0.0
+
+    def record(self, statement: str, seconds: float):
+        stats = self.statements.get(statement)
+        if stats is None:
+            stats = self.statements[statement] = StatementStats()
+        stats.count += 1
+        stats.seconds += seconds
+        self.total_count += 1
+        self.total_seconds += seconds
+
+    def normalized(self) -> Dict[str, StatementStats]:
+        """Stats grouped by statement shape; normalizing is deferred to here to keep recording cheap"""
+        shapes: Dict[str, StatementStats] = {}
+        for statement, stats in self.statements.items():
+            shape = normalize_statement(statement)
+            grouped = shapes.get(shape)
+            if grouped is None:
+                grouped = shapes[shape] = StatementStats()
+            grouped.count += stats.count
+            grouped.seconds += stats.seconds
+        return shapes
+
+    def repeated(self, threshold: int) -> List[str]:
+        """Shapes executed at least `threshold` times: probable N+1 queries"""
+        return [shape for shape, stats in self.normalized().items() if stats.count >= threshold]
+
+    def summary(self, threshold: int) -> dict:
+        shapes = sorted(self.normalized().items(), key=lambda item: item[1].seconds, reverse=True)
+        return {
+            "request": self.label,
+            "statements": self.total_count,
+            "sql_ms": round(self.total_seconds * 1000, 3),
+            "n_plus_one": [shape for shape, stats in shapes if stats.count >= threshold],
+            "shapes": [
+                {"statement": shape, "count": stats.count, "total_ms": round(stats.seconds * 1000, 3)}
+                for shape, stats in shapes
+            ],
+        }
+
+    def server_timing(self) -> str:
+        return f'sql;dur={self.total_seconds * 1000:.2f};desc="{self.total_count} statements"'
+
+_current_profile: ContextVar[Optional[QueryProfile]] = ContextVar("query_profile", default=None)
+# Profiles that see every statement in the process, whatever context runs it
+_process_profiles: List[QueryProfile] = []
+_instrumented = set()
+
+def instrument_engine(engine):
+    """Attach the profiler's cursor hooks; they are no-ops unless a profile is active"""
+    if id(engine) in _instrumented:
+        return
+    _instrumented.add(id(engine))
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if _current_profile.get() is not None or _process_profiles:
+            conn.info.setdefault("profile_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("profile_start")
+        if not starts:
+            return
+        elapsed = time.perf_counter() - starts.pop()
+        profile = _current_profile.get()
+        if profile is not None:
+            profile.record(statement, elapsed)
+        for process_profile in _process_profiles:
+            process_profile.record(statement, elapsed)
+
+@contextmanager
+def profile_queries(label: str = "", all_threads: bool = False):
+    """Record the SQL executed inside the block.
+
+    By default only statements run in this context (and threadpool calls
+    made from it) count. With all_threads=True every statement in the
+    process is recorded, e.g. for a TestClient whose app runs in another
+    thread.
+    """
+    profile = QueryProfile(label)
+    if all_threads:
+        _process_profiles.append(profile)
+        try:
+            yield profile
+        finally:
+            _process_profiles.remove(profile)
+        return
+    token = _current_profile.set(profile)
+    try:
+        yield profile
+    finally:
+        _current_profile.reset(token)
+
+recent_profiles: deque = deque(maxlen=50)
+
+class SQLProfilerMiddleware:
+    """ASGI middleware profiling the SQL of each HTTP request"""
+
+    def __init__(self, app, n_plus_one_threshold: int = 5):
+        self.app = app
+        self.n_plus_one_threshold = n_plus_one_threshold
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with profile_queries(f"{scope['method']} {scope['path']}") as profile:
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start":
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", profile.server_timing().encode()))
+                    headers.append((b"x-sql-statements", str(profile.total_count).encode()))
+                    message = {**message, "headers": headers}
+                await send(message)
+
+            await self.app(scope, receive, send_wrapper)
+
+        if profile.total_count:
+            summary = profile.summary(self.n_plus_one_threshold)
+            recent_profiles.append(summary)
+            if summary["n_plus_one"]:
+                print(f"⚠️ Probable N+1 in {profile.label}: {summary['statements']} statements, "
+                      f"repeated shapes: {summary['n_plus_one']}")
@@ -0,0 +1,307 @@
+"""
+Supervisor for the in-process AI agents.
+
+Keeps a registry of agent runs with their lifecycle state and timings,
+allows at most one run per shard at a time, supports cancellation, and
+can repeat an agent's cycle on a fixed interval or a cron schedule.
+
+A shard is an agent type optionally scoped to one disaster and, within
+it, to a region ("minLng,minLat,maxLng,maxLat"). Shards run as
+independent loops, so several incidents are assessed and planned in
+parallel and each cycle only queries its own disaster's reports, tasks
+and (with a region) resources. A run with no disaster is the original
+unscoped agent; social media and damage assessment always work on one
+disaster (DEFAULT_DISASTER_ID when none is given), so their unscoped runs
+share that disaster's shard and can't run alongside it.
+"""
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, Optional
+
+AGENT_TYPES = ("social_media", "damage_assessment", "resource_planning")
+# Agents that can't run across disasters, and the one they default to
+SINGLE_DISASTER_AGENTS = ("social_media", "damage_assessment")
+DEFAULT_DISASTER_ID = 1
+
+def _ensure_agents_importable():
+    # The agents package lives next to `app` in the backend directory
+    backend_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    if backend_dir not in sys.path:
+        sys.path.insert(0, backend_dir)
+
+def effective_disaster_id(agent_type: str, disaster_id: Optional[int] = None) -> Optional[int]:
+    """The disaster a run of the agent actually works on; None means all of them"""
+    if disaster_id is None and agent_type in SINGLE_DISASTER_AGENTS:
+        return DEFAULT_DISASTER_ID
+    return disaster_id
+
+def shard_key(agent_type: str, disaster_id: Optional[int] = None, region: Optional[str] = None) -> str:
+    """Registry key for a run, e.g. resource_planning, damage_assessment:3 or damage_assessment:3:<bbox>"""
+    if region is not None and disaster_id is None:
+        raise ValueError("region requires disaster_id")
+    disaster_id = effective_disaster_id(agent_type, disaster_id)
+    parts = [agent_type]
+    if disaster_id is not None:
+        parts.append(str(disaster_id))
+    if region is not None:
+        parts.append(region)
+    return ":".join(parts)
+
+async def run_agent_cycle(agent_type: str, event_sink: Optional[Callable[[dict], None]] = None,
+                          disaster_id: Optional[int] = None, region: Optional[str] = None):
+    """Run one cycle of the given agent in this event loop, scoped to a shard if given"""
+    _ensure_agents_importable()
+    shard = {"disaster_id": disaster_id} if disaster_id is not None else {}
+    if agent_type == "social_media":
+        from agents.social_media_agent import SocialMediaAgent
+        await SocialMediaAgent(event_sink=event_sink, **shard).monitor_social_media()
+    elif agent_type == "damage_assessment":
+        from agents.damage_assessment_agent import DamageAssessmentAgent
+        await DamageAssessmentAgent(event_sink=event_sink, region=region, **shard).run_assessment_cycle()
+    elif agent_type == "resource_planning":
+        from agents.resource_planning_agent import ResourcePlanningAgent
+        await ResourcePlanningAgent(event_sink=event_sink, disaster_id=disaster_id, region=region).run_planning_cycle()
+    else:
+        raise ValueError(f"Unknown agent type: {agent_type}")
+
+class CronSchedule:
+    """Minimal 5-field cron expression: minute hour day-of-month month day-of-week.
+
+    Each field accepts `*`, `*/n`, `a`, `a-b`, `a-b/n` and comma-separated
+    lists of those. Day-of-week is 0-6 with 0 = Sunday. Times are UTC.
+
+    As in standard cron, when both day-of-month and day-of-week are
+    restricted (neither starts with `*`) a day matches if either does:
+    "0 9 1 * 1" runs on the 1st and on every Monday.
+    """
+    _RANGES = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 6))
+
+    def __init__(self, expression: str):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError("cron expression needs 5 fields: minute hour day month weekday")
+        self.expression = expression
+        self.minutes, self.hours, self.days, self.months, self.weekdays = (
+            self._parse(field, low, high) for field, (low, high) in zip(fields, self._RANGES)
+        )
+        self.either_day = not fields[2].startswith("*") and not fields[4].startswith("*")
+
+    @staticmethod
+    def _parse(field: str, low: int, high: int) -> frozenset:
+        values = set()
+        for part in field.split(","):
+            spec, _, step = part.partition("/")
+            step = int(step) if step else 1
+            if spec == "*":
+                start, end = low, high
+            elif "-" in spec:
+                start, end = (int(v) for v in spec.split("-", 1))
+            else:
+                start = int(spec)
+                end = high if step > 1 else start
+            if start < low or end > high or start > end or step < 1:
+                raise ValueError(f"invalid cron field '{field}'")
+            values.update(range(start, end + 1, step))
+        return frozenset(values)
+
+    def day_matches(self, moment: datetime) -> bool:
+        day = moment.day in self.days
+        weekday = moment.isoweekday() % 7 in self.weekdays
+        return (day or weekday) if self.either_day else (day and weekday)
+
+    def next_after(self, moment: datetime) -> datetime:
+        """First matching minute strictly after `moment`"""
+        candidate = moment.astimezone(timezone.utc).replace(second=0, microsecond=0) + timedelta(minutes=1)
+        # A year of minutes covers every satisfiable expression
+        for _ in range(366 * 24 * 60):
+            if (candidate.month in self.months and self.day_matches(candidate)
+                    and candidate.hour in self.hours and candidate.minute in self.minutes):
+                return candidate
+            candidate += timedelta(minutes=1)
+        raise ValueError(f"cron expression '{self.expression}' never matches")
+
+class AgentAlreadyRunning(Exception):
+    pass
+
+class AgentRun:
+    """Lifecycle record for one supervised agent run"""
+
+    def __init__(self, agent_type: str, interval: Optional[float] = None, cron: Optional[CronSchedule] = None,
+                 disaster_id: Optional[int] = None, region: Optional[str] = None):
+        self.agent_type = agent_type
+        self.key = shard_key(agent_type, disaster_id, region)
+        self.disaster_id = effective_disaster_id(agent_type, disaster_id)
+        self.region = region
+        self.interval = interval
+        self.cron = cron
+        self.state = "starting"  # starting, running, sleeping, completed, failed, cancelled
+        self.started_at = datetime.now(timezone.utc)
+        self.finished_at: Optional[datetime] = None
+        self.last_cycle_started_at: Optional[datetime] = None
+        self.last_cycle_duration: Optional[float] = None
+        self.next_run_at: Optional[datetime] = None
+        self.cycles = 0
+        self.error_count = 0
+        self.last_error: Optional[str] = None
+        self.task: Optional[asyncio.Task] = None
+
+    @property
+    def recurring(self) -> bool:
+        return self.interval is not None or self.cron is not None
+
+    @property
+    def shard(self) -> dict:
+        """Keyword arguments scoping the runner to this run's shard"""
+        return {"disaster_id": self.disaster_id, "region": self.region}
+
+    @property
+    def active(self) -> bool:
+        return self.task is not None and not self.task.done()
+
+    def as_dict(self) -> dict:
+        def iso(value):
+            return value.isoformat() if value else None
+        return {
+            "agent_type": self.agent_type,
+            "disaster_id": self.disaster_id,
+            "region": self.region,
+            "state": self.state,
+            "started_at": iso(self.started_at),
+            "finished_at": iso(self.finished_at),
+            "last_cycle_started_at": iso(self.last_cycle_started_at),
+            "last_cycle_duration": self.last_cycle_duration,
+            "next_run_at": iso(self.next_run_at),
+            "cycles": self.cycles,
+            "error_count": self.error_count,
+            "last_error": self.last_error,
+            "interval": self.interval,
+            "cron": self.cron.expression if self.cron else None,
+        }
+
+class AgentSupervisor:
+    def __init__(self, runner: Callable[..., Awaitable[None]] = run_agent_cycle,
+                 notify: Optional[Callable[[dict], Awaitable[None]]] = None):
+        self.runner = runner
+        self.notify = notify
+        self.runs: Dict[str, AgentRun] = {}
+
+    def is_running(self, agent_type: str, disaster_id: Optional[int] = None, region: Optional[str] = None) -> bool:
+        run = self.runs.get(shard_key(agent_type, disaster_id, region))
+        return run is not None and run.active
+
+    def start(self, agent_type: str, interval: Optional[float] = None, cron: Optional[str] = None,
+              disaster_id: Optional[int] = None, region: Optional[str] = None) -> AgentRun:
+        """Start an agent run; only one run per shard may be active"""
+        if agent_type not in AGENT_TYPES:
+            raise ValueError(f"Unknown agent type: {agent_type}")
+        if interval is not None and cron is not None:
+            raise ValueError("Use either interval or cron, not both")
+        if interval is not None and interval <= 0:
+            raise ValueError("interval must be positive")
+        key = shard_key(agent_type, disaster_id, region)
+        if self.is_running(agent_type, disaster_id, region):
+            raise AgentAlreadyRunning(key)
+
+        run = AgentRun(agent_type, interval=interval, cron=CronSchedule(cron) if cron else None,
+                       disaster_id=disaster_id, region=region)
+        # Holding the task on the run keeps it from being garbage collected
+        run.task = asyncio.create_task(self._supervise(run), name=f"agent:{key}")
+        self.runs[key] = run
+        return run
+
+    async def stop(self, agent_type: str, disaster_id: Optional[int] = None, region: Optional[str] = None) -> bool:
+        """Cancel an active run; returns False if nothing was running"""
+        return await self._stop_run(self.runs.get(shard_key(agent_type, disaster_id, region)))
+
+    async def stop_disaster(self, disaster_id: int) -> int:
+        """Cancel every active shard of a disaster; returns how many were stopped"""
+        stopped = 0
+        for run in [r for r in self.runs.values() if r.disaster_id == disaster_id]:
+            stopped += await self._stop_run(run)
+        return stopped
+
+    async def _stop_run(self, run: Optional[AgentRun]) -> bool:
+        if run is None or not run.active:
+            return False
+        run.task.cancel()
+        try:
+            await run.task
+        except asyncio.CancelledError:
+            pass
+        return True
+
+    async def shutdown(self):
+        for run in list(self.runs.values()):
+            await self._stop_run(run)
+        if hasattr(self.runner, "shutdown"):
+            await self.runner.shutdown()
+
+    def status(self) -> dict:
+        """Unscoped runs by agent type (idle if never started), plus one entry per shard key"""
+        status = {}
+        for agent_type in AGENT_TYPES:
+            run = self.runs.get(shard_key(agent_type))
+            status[agent_type] = run.as_dict() if run is not None else {"state": "idle"}
+        status.update((key, run.as_dict()) for key, run in self.runs.items() if key not in status)
+        return status
+
+    async def _emit(self, run: AgentRun, status: str, message: str, data: Optional[dict] = None):
+        if self.notify is None:
+            return
+        try:
+            await self.notify({
+                "type": "agent_update",
+                "agent_type": run.agent_type,
+                "disaster_id": run.disaster_id,
+                "status": status,
+                "message": message,
+                "data": {**run.as_dict(), **(data or {})}
+            })
+        except Exception as e:
+            print(f"Supervisor notify error: {e}")
+
+    async def _supervise(self, run: AgentRun):
+        name = run.agent_type.replace("_", " ").title()
+        if run.disaster_id is not None:
+            name = f"{name} (disaster {run.disaster_id}{', ' + run.region if run.region else ''})"
+        try:
+            while True:
+                run.state = "running"
+                run.next_run_at = None
+                run.last_cycle_started_at = datetime.now(timezone.utc)
+                started = time.perf_counter()
+                try:
+                    await self.runner(run.agent_type, **run.shard)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    run.error_count += 1
+                    run.last_error = str(e)
+                    await self._emit(run, "error", f"{name} Agent error: {e}", {"error": str(e)})
+                    if not run.recurring:
+                        run.state = "failed"
+                        return
+                finally:
+                    run.last_cycle_duration = time.perf_counter() - started
+                    run.cycles += 1
+
+                if not run.recurring:
+                    run.state = "completed"
+                    return
+
+                now = datetime.now(timezone.utc)
+                if run.cron is not None:
+                    run.next_run_at = run.cron.next_after(now)
+                else:
+                    run.next_run_at = now + timedelta(seconds=max(0.0, run.interval - run.last_cycle_duration))
+                run.state = "sleeping"
+                await asyncio.sleep((run.next_run_at - now).total_seconds())
+        except asyncio.CancelledError:
+            run.state = "cancelled"
+            await self._emit(run, "cancelled", f"{name} Agent was stopped")
+            raise
+        finally:
+            run.finished_at = datetime.now(timezone.utc)
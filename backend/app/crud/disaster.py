@@ -1,14 +1,49 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func, text
-from ..models.disaster import DisasterEvent, DamageReport, Resource, Task
+from sqlalchemy import insert, select, text, update
+from ..models.disaster import DisasterEvent, DamageReport, Incident, Resource, Task, DisasterSummary
 from ..schemas.disaster import (
     DisasterEventCreate, DamageReportCreate, ResourceCreate, TaskCreate
 )
-from geoalchemy2 import Geography
+from ..schemas import disaster as schemas
+from ..core.cache import table_versions
+from ..core.config import settings
+from ..core.heatmap import METERS_PER_DEGREE, severity_fields
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+BBox = Tuple[float, float, float, float]
+
+def row_columns(model, schema):
+    """Columns for `schema`'s fields in order.
+
+    Selecting these returns plain rows that can be serialized directly,
+    without loading ORM objects. latitude/longitude are the stored columns
+    generated from location, so no per-row PostGIS work is needed.
+    """
+    return [getattr(model, name) for name in schema.model_fields]
+
+def insert_returning(db: Session, model, schema, **values):
+    """INSERT a row and get it back shaped like `schema` in the same round trip.
+
+    RETURNING carries server-side values too (id, created_at and the
+    generated coordinates), so no refresh SELECT is needed after commit.
+    """
+    stmt = insert(model).values(**values).returning(*row_columns(model, schema))
+    return db.execute(stmt).one()
+
+def filter_bbox(query, model, bbox: Optional[BBox]):
+    """Restrict to rows inside (min_lng, min_lat, max_lng, max_lat)"""
+    if bbox is None:
+        return query
+    min_lng, min_lat, max_lng, max_lat = bbox
+    # Served by the ix_<table>_lat_lng indexes on the generated columns
+    return query.filter(model.latitude.between(min_lat, max_lat),
+                        model.longitude.between(min_lng, max_lng))
 
 def create_disaster(db: Session, disaster: DisasterEventCreate):
     location = f"POINT({disaster.longitude} {disaster.latitude})"
-    db_disaster = DisasterEvent(
+    db_disaster = insert_returning(
+        db, DisasterEvent, schemas.DisasterEvent,
         name=disaster.name,
         event_type=disaster.event_type,
         location=location,
@@ -16,41 +51,31 @@ def create_disaster(db: Session, disaster: DisasterEventCreate):
         status=disaster.status,
         description=disaster.description
     )
-    db.add(db_disaster)
     db.commit()
-    db.refresh(db_disaster)
-    
-    # Add lat/lng for response
-    db_disaster.latitude = disaster.latitude
-    db_disaster.longitude = disaster.longitude
+    table_versions.bump("disaster_events")
     return db_disaster
 
 def get_disaster(db: Session, disaster_id: int):
-    disaster = db.query(DisasterEvent).filter(DisasterEvent.id == disaster_id).first()
-    if disaster:
-        # Extract coordinates from geometry
-        coord = db.execute(
-            text(f"SELECT ST_X(location::geometry) as lng, ST_Y(location::geometry) as lat FROM disaster_events WHERE id = {disaster_id}")
-        ).first()
-        if coord:
-            disaster.latitude = coord.lat
-            disaster.longitude = coord.lng
-    return disaster
+    return db.query(DisasterEvent).filter(DisasterEvent.id == disaster_id).first()
+
+def get_disaster_rows(db: Session, skip: int = 0, limit: int = 100):
+    """Disaster list as rows shaped like schemas.DisasterEvent"""
+    columns = row_columns(DisasterEvent, schemas.DisasterEvent)
+    return db.query(*columns).offset(skip).limit(limit).all()
 
 def get_disasters(db: Session, skip: int = 0, limit: int = 100):
     disasters = db.query(DisasterEvent).offset(skip).limit(limit).all()
-    for disaster in disasters:
-        coord = db.execute(
-            text(f"SELECT ST_X(location::geometry) as lng, ST_Y(location::geometry) as lat FROM disaster_events WHERE id = {disaster.id}")
-        ).first()
-        if coord:
-            disaster.latitude = coord.lat
-            disaster.longitude = coord.lng
     return disasters
 
+def get_active_disaster_ids(db: Session) -> List[int]:
+    return [row.id for row in db.query(DisasterEvent.id).filter(DisasterEvent.status == "active")
+            .order_by(DisasterEvent.id)]
+
 def create_damage_report(db: Session, report: DamageReportCreate):
     location = f"POINT({report.longitude} {report.latitude})"
-    db_report = DamageReport(
+    incident_id = merge_report_into_incident(db, report)
+    db_report = insert_returning(
+        db, DamageReport, schemas.DamageReport,
         disaster_id=report.disaster_id,
         location=location,
         damage_type=report.damage_type,
@@ -58,31 +83,61 @@ def create_damage_report(db: Session, report: DamageReportCreate):
         description=report.description,
         source=report.source,
         confidence=report.confidence,
-        verified=report.verified
+        verified=report.verified,
+        incident_id=incident_id
     )
-    db.add(db_report)
+    record_report_in_summary(db, report)
     db.commit()
-    db.refresh(db_report)
-    
-    # Add lat/lng for response
-    db_report.latitude = report.latitude
-    db_report.longitude = report.longitude
+    table_versions.bump("damage_reports", "incidents")
+    severity_fields.record(db_report)
     return db_report
 
-def get_damage_reports(db: Session, skip: int = 0, limit: int = 100):
-    reports = db.query(DamageReport).offset(skip).limit(limit).all()
-    for report in reports:
-        coord = db.execute(
-            text(f"SELECT ST_X(location::geometry) as lng, ST_Y(location::geometry) as lat FROM damage_reports WHERE id = {report.id}")
-        ).first()
-        if coord:
-            report.latitude = coord.lat
-            report.longitude = coord.lng
+def damage_reports_query(db: Session, disaster_id: Optional[int] = None, since: Optional[datetime] = None,
+                         columns=None, bbox: Optional[BBox] = None):
+    """Build the damage report query, newest first, with filters pushed into SQL"""
+    query = filter_bbox(db.query(*(columns or [DamageReport])), DamageReport, bbox)
+    if disaster_id is not None:
+        query = query.filter(DamageReport.disaster_id == disaster_id)
+    if since is not None:
+        query = query.filter(DamageReport.created_at >= since)
+    if disaster_id is not None or since is not None:
+        # Served by ix_damage_reports_disaster_id_created_at
+        query = query.order_by(DamageReport.created_at.desc())
+    return query
+
+def get_damage_reports(db: Session, skip: int = 0, limit: int = 100,
+                       disaster_id: Optional[int] = None, since: Optional[datetime] = None,
+                       bbox: Optional[BBox] = None):
+    reports = damage_reports_query(db, disaster_id=disaster_id, since=since, bbox=bbox) \
+        .offset(skip).limit(limit).all()
     return reports
 
+def get_damage_report_rows(db: Session, skip: int = 0, limit: int = 100,
+                           disaster_id: Optional[int] = None, since: Optional[datetime] = None,
+                           bbox: Optional[BBox] = None):
+    """Damage report list as rows shaped like schemas.DamageReport"""
+    columns = row_columns(DamageReport, schemas.DamageReport)
+    return damage_reports_query(db, disaster_id=disaster_id, since=since, columns=columns, bbox=bbox) \
+        .offset(skip).limit(limit).all()
+
+def get_damage_report_points(db: Session, skip: int = 0, limit: int = 5000,
+                             disaster_id: Optional[int] = None, since: Optional[datetime] = None,
+                             bbox: Optional[BBox] = None):
+    """Just the map-layer fields of damage reports, as rows"""
+    columns = [
+        DamageReport.id,
+        DamageReport.latitude,
+        DamageReport.longitude,
+        DamageReport.severity,
+        DamageReport.damage_type,
+    ]
+    return damage_reports_query(db, disaster_id=disaster_id, since=since, columns=columns, bbox=bbox) \
+        .offset(skip).limit(limit).all()
+
 def create_resource(db: Session, resource: ResourceCreate):
     location = f"POINT({resource.longitude} {resource.latitude})"
-    db_resource = Resource(
+    db_resource = insert_returning(
+        db, Resource, schemas.Resource,
         name=resource.name,
         resource_type=resource.resource_type,
         location=location,
@@ -90,29 +145,33 @@ def create_resource(db: Session, resource: ResourceCreate):
         capacity=resource.capacity,
         current_load=resource.current_load
     )
-    db.add(db_resource)
     db.commit()
-    db.refresh(db_resource)
-    
-    # Add lat/lng for response
-    db_resource.latitude = resource.latitude
-    db_resource.longitude = resource.longitude
+    table_versions.bump("resources")
     return db_resource
 
-def get_resources(db: Session, skip: int = 0, limit: int = 100):
-    resources = db.query(Resource).offset(skip).limit(limit).all()
-    for resource in resources:
-        coord = db.execute(
-            text(f"SELECT ST_X(location::geometry) as lng, ST_Y(location::geometry) as lat FROM resources WHERE id = {resource.id}")
-        ).first()
-        if coord:
-            resource.latitude = coord.lat
-            resource.longitude = coord.lng
+def resources_query(db: Session, status: Optional[str] = None, columns=None, bbox: Optional[BBox] = None):
+    """Build the resource query with the status filter pushed into SQL"""
+    query = filter_bbox(db.query(*(columns or [Resource])), Resource, bbox)
+    if status is not None:
+        # status == 'available' is served by the partial ix_resources_available
+        query = query.filter(Resource.status == status).order_by(Resource.id)
+    return query
+
+def get_resources(db: Session, skip: int = 0, limit: int = 100, status: Optional[str] = None,
+                  bbox: Optional[BBox] = None):
+    resources = resources_query(db, status=status, bbox=bbox).offset(skip).limit(limit).all()
     return resources
 
+def get_resource_rows(db: Session, skip: int = 0, limit: int = 100, status: Optional[str] = None,
+                      bbox: Optional[BBox] = None):
+    """Resource list as rows shaped like schemas.Resource"""
+    columns = row_columns(Resource, schemas.Resource)
+    return resources_query(db, status=status, columns=columns, bbox=bbox).offset(skip).limit(limit).all()
+
 def create_task(db: Session, task: TaskCreate):
     location = f"POINT({task.longitude} {task.latitude})"
-    db_task = Task(
+    db_task = insert_returning(
+        db, Task, schemas.Task,
         disaster_id=task.disaster_id,
         title=task.title,
         description=task.description,
@@ -123,56 +182,444 @@ def create_task(db: Session, task: TaskCreate):
         location=location,
         estimated_duration=task.estimated_duration
     )
-    db.add(db_task)
+    record_task_status_change(db, db_task.disaster_id, None, db_task.status)
     db.commit()
-    db.refresh(db_task)
-    
-    # Add lat/lng for response
-    db_task.latitude = task.latitude
-    db_task.longitude = task.longitude
+    table_versions.bump("tasks")
     return db_task
 
-def get_tasks(db: Session, skip: int = 0, limit: int = 100):
-    tasks = db.query(Task).offset(skip).limit(limit).all()
-    for task in tasks:
-        coord = db.execute(
-            text(f"SELECT ST_X(location::geometry) as lng, ST_Y(location::geometry) as lat FROM tasks WHERE id = {task.id}")
-        ).first()
-        if coord:
-            task.latitude = coord.lat
-            task.longitude = coord.lng
+def tasks_query(db: Session, disaster_id: Optional[int] = None, status: Optional[str] = None, columns=None,
+                bbox: Optional[BBox] = None):
+    """Build the task query with disaster/status filters pushed into SQL"""
+    query = filter_bbox(db.query(*(columns or [Task])), Task, bbox)
+    if disaster_id is not None:
+        query = query.filter(Task.disaster_id == disaster_id)
+    if status is not None:
+        # Highest priority first; served by ix_tasks_disaster_id_status_priority
+        # or, for pending tasks across disasters, the partial ix_tasks_pending
+        query = query.filter(Task.status == status).order_by(Task.priority.desc(), Task.created_at)
+    return query
+
+def get_tasks(db: Session, skip: int = 0, limit: int = 100,
+              disaster_id: Optional[int] = None, status: Optional[str] = None, bbox: Optional[BBox] = None):
+    tasks = tasks_query(db, disaster_id=disaster_id, status=status, bbox=bbox).offset(skip).limit(limit).all()
     return tasks
 
+def get_task_rows(db: Session, skip: int = 0, limit: int = 100,
+                  disaster_id: Optional[int] = None, status: Optional[str] = None, bbox: Optional[BBox] = None):
+    """Task list as rows shaped like schemas.Task"""
+    columns = row_columns(Task, schemas.Task)
+    return tasks_query(db, disaster_id=disaster_id, status=status, columns=columns, bbox=bbox) \
+        .offset(skip).limit(limit).all()
+
+def update_task_returning(db: Session, task_id: int, expected_status: Optional[str] = None, **values):
+    """UPDATE one task and return it shaped like schemas.Task plus its previous status.
+
+    The old status comes from a locked subselect in the same statement, so
+    the summary counters can be moved without reading the task first.
+    With `expected_status`, only a task in that status is updated.
+    """
+    old = select(Task.id, Task.status.label("old_status")).where(Task.id == task_id)
+    if expected_status is not None:
+        old = old.where(Task.status == expected_status)
+    old = old.with_for_update().subquery()
+    stmt = update(Task).where(Task.id == old.c.id).values(**values) \
+        .returning(*row_columns(Task, schemas.Task), old.c.old_status)
+    return db.execute(stmt).first()
+
 def update_task_status(db: Session, task_id: int, status: str):
-    db_task = db.query(Task).filter(Task.id == task_id).first()
+    db_task = update_task_returning(db, task_id, status=status)
     if db_task:
-        db_task.status = status
+        record_task_status_change(db, db_task.disaster_id, db_task.old_status, status)
+        released = False
+        if status == "completed" and db_task.old_status != "completed":
+            # Finished work frees its resources for the planner
+            released = release_resources(db, parse_resource_ids(db_task.assigned_resources))
         db.commit()
-        db.refresh(db_task)
-        
-        # Add coordinates
-        coord = db.execute(
-            text(f"SELECT ST_X(location::geometry) as lng, ST_Y(location::geometry) as lat FROM tasks WHERE id = {task_id}")
-        ).first()
-        if coord:
-            db_task.latitude = coord.lat
-            db_task.longitude = coord.lng
+        table_versions.bump("tasks")
+        if released:
+            table_versions.bump("resources")
     return db_task
 
-def assign_resources_to_task(db: Session, task_id: int, assigned_resources: str):
-    """Assign resources to a task"""
-    db_task = db.query(Task).filter(Task.id == task_id).first()
-    if db_task:
-        db_task.assigned_resources = assigned_resources
-        db_task.status = "assigned"  # Update status to indicate resources are assigned
-        db.commit()
-        db.refresh(db_task)
-        
-        # Add coordinates
-        coord = db.execute(
-            text(f"SELECT ST_X(location::geometry) as lng, ST_Y(location::geometry) as lat FROM tasks WHERE id = {task_id}")
-        ).first()
-        if coord:
-            db_task.latitude = coord.lat
-            db_task.longitude = coord.lng
-    return db_task
\ No newline at end of file
+class ResourceUnavailable(Exception):
+    """Some resources to assign are no longer available; carries their ids"""
+
+class TaskNotPending(Exception):
+    """The task to assign was already assigned (or moved on); carries its status"""
+
+# Claimed in id order, skipping rows another assignment has locked, so
+# racing planners neither deadlock nor deploy the same unit twice
+CLAIM_RESOURCES_SQL = """
+    WITH claim AS (
+        SELECT id FROM resources
+        WHERE id = ANY(:resource_ids) AND status = 'available'
+        ORDER BY id
+        FOR UPDATE SKIP LOCKED
+    )
+    UPDATE resources AS r SET status = 'deployed', updated_at = now()
+    FROM claim WHERE r.id = claim.id
+    RETURNING r.id
+"""
+
+def parse_resource_ids(assigned_resources: Optional[str]) -> List[int]:
+    return [int(v) for v in (assigned_resources or "").split(",") if v.strip().isdigit()]
+
+def release_resources(db: Session, resource_ids: List[int]) -> bool:
+    """Make deployed resources available again; False if there were none"""
+    if not resource_ids:
+        return False
+    return db.execute(text("""
+        UPDATE resources SET status = 'available', updated_at = now()
+        WHERE id = ANY(:resource_ids) AND status = 'deployed'
+    """), {"resource_ids": resource_ids}).rowcount > 0
+
+def assign_resources_to_task(db: Session, task_id: int, resource_ids: List[int]):
+    """Assign resources to a pending task and deploy them.
+
+    Only resources still available are claimed, in the same transaction
+    as the task update. If any of them isn't (another planner shard got
+    there first), nothing changes and ResourceUnavailable is raised; if
+    the task is no longer pending (another planner assigned it), the
+    claim is rolled back and TaskNotPending is raised. None if there is
+    no such task.
+    """
+    if resource_ids:
+        claimed = {row.id for row in db.execute(text(CLAIM_RESOURCES_SQL), {"resource_ids": list(resource_ids)})}
+        missing = sorted(set(resource_ids) - claimed)
+        if missing:
+            db.rollback()
+            raise ResourceUnavailable(missing)
+    db_task = update_task_returning(db, task_id, expected_status="pending",
+                                    assigned_resources=",".join(map(str, resource_ids)), status="assigned")
+    if db_task is None:
+        # Give the claimed resources back
+        db.rollback()
+        current = db.execute(select(Task.status).where(Task.id == task_id)).first()
+        if current is not None:
+            raise TaskNotPending(current.status)
+        return None
+    record_task_status_change(db, db_task.disaster_id, db_task.old_status, "assigned")
+    db.commit()
+    table_versions.bump("tasks", "resources")
+    return db_task
+
+# Disaster summaries
+#
+# disaster_summaries holds running counters per disaster so the dashboard and
+# the assessment agent don't have to download raw rows to count them. The
+# counters are bumped with upserts inside the caller's transaction, so they
+# commit (or roll back) together with the report/task write itself.
+
+HIGH_SEVERITY_THRESHOLD = 7
+RATE_WINDOWS_MINUTES = (1, 5, 15, 60)
+
+def _jsonb_increment(column: str, key: str, delta: str) -> str:
+    """SQL for `column` with the integer at :key adjusted by :delta"""
+    return f"{column} || jsonb_build_object(:{key}, coalesce(({column} ->> :{key})::int, 0) + :{delta})"
+
+def record_report_in_summary(db: Session, report: DamageReportCreate):
+    """Count a new damage report in its disaster's summary and per-minute rate bucket"""
+    params = {
+        "disaster_id": report.disaster_id,
+        "high": int(report.severity >= HIGH_SEVERITY_THRESHOLD),
+        "verified": int(bool(report.verified)),
+        "damage_type": report.damage_type or "unknown",
+        "source": report.source or "unknown",
+        "one": 1,
+    }
+    db.execute(text(f"""
+        INSERT INTO disaster_summaries AS s (
+            disaster_id, total_reports, high_severity_reports, verified_reports,
+            damage_type_counts, source_counts, task_status_counts, last_report_at, updated_at
+        ) VALUES (
+            :disaster_id, 1, :high, :verified,
+            jsonb_build_object(:damage_type, 1), jsonb_build_object(:source, 1), '{{}}', now(), now()
+        )
+        ON CONFLICT (disaster_id) DO UPDATE SET
+            total_reports = s.total_reports + 1,
+            high_severity_reports = s.high_severity_reports + EXCLUDED.high_severity_reports,
+            verified_reports = s.verified_reports + EXCLUDED.verified_reports,
+            damage_type_counts = {_jsonb_increment("s.damage_type_counts", "damage_type", "one")},
+            source_counts = {_jsonb_increment("s.source_counts", "source", "one")},
+            last_report_at = now(),
+            updated_at = now()
+    """), params)
+    db.execute(text("""
+        INSERT INTO disaster_report_rates AS r (disaster_id, bucket, report_count)
+        VALUES (:disaster_id, date_trunc('minute', now()), 1)
+        ON CONFLICT (disaster_id, bucket) DO UPDATE SET report_count = r.report_count + 1
+    """), {"disaster_id": report.disaster_id})
+
+def record_task_status_change(db: Session, disaster_id: int, old_status: Optional[str], new_status: Optional[str]):
+    """Move one task between status counters (old_status is None for new tasks)"""
+    if disaster_id is None or old_status == new_status:
+        return
+    params = {"disaster_id": disaster_id, "new": new_status or "unknown", "plus": 1}
+    counts = _jsonb_increment("s.task_status_counts", "new", "plus")
+    initial = "jsonb_build_object(:new, 1)"
+    if old_status is not None:
+        params.update({"old": old_status, "minus": -1})
+        # Both increments read the pre-update value, which is fine as old != new
+        counts = f"{counts} || jsonb_build_object(:old, coalesce((s.task_status_counts ->> :old)::int, 0) + :minus)"
+    db.execute(text(f"""
+        INSERT INTO disaster_summaries AS s (
+            disaster_id, total_reports, high_severity_reports, verified_reports,
+            damage_type_counts, source_counts, task_status_counts, updated_at
+        ) VALUES (:disaster_id, 0, 0, 0, '{{}}', '{{}}', {initial}, now())
+        ON CONFLICT (disaster_id) DO UPDATE SET
+            task_status_counts = {counts},
+            updated_at = now()
+    """), params)
+
+def get_disaster_summary(db: Session, disaster_id: int):
+    """Read a disaster's summary row plus rolling report rates (bounded, index-only work)"""
+    summary = db.query(DisasterSummary).filter(DisasterSummary.disaster_id == disaster_id).first()
+    if summary is None:
+        return None
+
+    windows = ", ".join(
+        f"coalesce(sum(report_count) FILTER (WHERE bucket > now() - interval '{m} minutes'), 0) AS m{m}"
+        for m in RATE_WINDOWS_MINUTES
+    )
+    rates = db.execute(text(f"""
+        SELECT {windows}
+        FROM disaster_report_rates
+        WHERE disaster_id = :disaster_id
+          AND bucket > now() - interval '{max(RATE_WINDOWS_MINUTES)} minutes'
+    """), {"disaster_id": disaster_id}).mappings().first()
+
+    return {
+        "disaster_id": summary.disaster_id,
+        "total_reports": summary.total_reports,
+        "high_severity_reports": summary.high_severity_reports,
+        "verified_reports": summary.verified_reports,
+        "damage_type_counts": summary.damage_type_counts or {},
+        "source_counts": summary.source_counts or {},
+        "task_status_counts": summary.task_status_counts or {},
+        "last_report_at": summary.last_report_at,
+        "reports_per_minute": {f"{m}m": round(float(rates[f"m{m}"]) / m, 3) for m in RATE_WINDOWS_MINUTES},
+        "updated_at": summary.updated_at,
+    }
+
+def prune_report_rates(db: Session):
+    """Drop rate buckets older than the widest rolling window"""
+    db.execute(text(
+        f"DELETE FROM disaster_report_rates WHERE bucket < now() - interval '{max(RATE_WINDOWS_MINUTES)} minutes'"
+    ))
+    db.commit()
+
+REBUILD_SUMMARY_SQL = """
+    INSERT INTO disaster_summaries (
+        disaster_id, total_reports, high_severity_reports, verified_reports,
+        damage_type_counts, source_counts, task_status_counts, last_report_at, updated_at
+    )
+    SELECT ids.disaster_id,
+           coalesce(r.total, 0), coalesce(r.high, 0), coalesce(r.verified, 0),
+           coalesce(dt.counts, '{}'), coalesce(src.counts, '{}'), coalesce(ts.counts, '{}'),
+           r.last_report_at, now()
+    FROM (
+        SELECT disaster_id FROM damage_reports WHERE disaster_id IS NOT NULL
+        UNION SELECT disaster_id FROM tasks WHERE disaster_id IS NOT NULL
+    ) ids
+    LEFT JOIN (
+        SELECT disaster_id, count(*) AS total,
+               count(*) FILTER (WHERE severity >= 7) AS high,
+               count(*) FILTER (WHERE verified) AS verified,
+               max(created_at) AS last_report_at
+        FROM damage_reports GROUP BY disaster_id
+    ) r ON r.disaster_id = ids.disaster_id
+    LEFT JOIN (
+        SELECT disaster_id, jsonb_object_agg(k, n) AS counts FROM (
+            SELECT disaster_id, coalesce(damage_type, 'unknown') AS k, count(*) AS n
+            FROM damage_reports GROUP BY 1, 2
+        ) x GROUP BY disaster_id
+    ) dt ON dt.disaster_id = ids.disaster_id
+    LEFT JOIN (
+        SELECT disaster_id, jsonb_object_agg(k, n) AS counts FROM (
+            SELECT disaster_id, coalesce(source, 'unknown') AS k, count(*) AS n
+            FROM damage_reports GROUP BY 1, 2
+        ) x GROUP BY disaster_id
+    ) src ON src.disaster_id = ids.disaster_id
+    LEFT JOIN (
+        SELECT disaster_id, jsonb_object_agg(k, n) AS counts FROM (
+            SELECT disaster_id, coalesce(status, 'unknown') AS k, count(*) AS n
+            FROM tasks GROUP BY 1, 2
+        ) x GROUP BY disaster_id
+    ) ts ON ts.disaster_id = ids.disaster_id
+    WHERE :disaster_id IS NULL OR ids.disaster_id = :disaster_id
+    ON CONFLICT (disaster_id) DO UPDATE SET
+        total_reports = EXCLUDED.total_reports,
+        high_severity_reports = EXCLUDED.high_severity_reports,
+        verified_reports = EXCLUDED.verified_reports,
+        damage_type_counts = EXCLUDED.damage_type_counts,
+        source_counts = EXCLUDED.source_counts,
+        task_status_counts = EXCLUDED.task_status_counts,
+        last_report_at = EXCLUDED.last_report_at,
+        updated_at = now()
+"""
+
+def rebuild_disaster_summaries(db: Session, disaster_id: Optional[int] = None):
+    """Recompute summaries from raw rows, for writes that bypass crud (bulk loads).
+
+    Counts only cover reports still retained in damage_reports.
+    """
+    db.execute(text(REBUILD_SUMMARY_SQL), {"disaster_id": disaster_id})
+    db.commit()
+
+# Incidents
+#
+# Reports of the same damage type, within incident_merge_radius_meters of an
+# incident that has had a report in the last incident_merge_window_minutes,
+# are merged into that incident at ingest. The raw report keeps a link to it
+# through incident_id; downstream consumers read incidents instead of
+# counting near-duplicate reports.
+
+MERGE_INCIDENT_SQL = f"""
+    WITH candidate AS (
+        SELECT id FROM incidents
+        WHERE disaster_id = :disaster_id
+          AND damage_type = :damage_type
+          AND last_report_at > now() - make_interval(mins => :window_minutes)
+          AND ST_DWithin(location, ST_GeogFromText(:location), :radius)
+        ORDER BY location <-> ST_GeogFromText(:location)
+        LIMIT 1
+    ), merged AS (
+        UPDATE incidents AS s SET
+            location = ST_SetSRID(ST_MakePoint(
+                (s.longitude * s.report_count + :longitude) / (s.report_count + 1),
+                (s.latitude * s.report_count + :latitude) / (s.report_count + 1)
+            ), 4326)::geography,
+            severity = greatest(s.severity, :severity),
+            confidence = 1 - (1 - coalesce(s.confidence, 0)) * (1 - :confidence),
+            verified = s.verified OR :verified,
+            report_count = s.report_count + 1,
+            source_count = s.source_count + CASE WHEN s.source_counts ? :source THEN 0 ELSE 1 END,
+            source_counts = {_jsonb_increment("s.source_counts", "source", "one")},
+            last_report_at = now()
+        FROM candidate
+        WHERE s.id = candidate.id
+        RETURNING s.id
+    ), created AS (
+        INSERT INTO incidents (
+            disaster_id, damage_type, location, severity, confidence, verified,
+            report_count, source_count, source_counts
+        )
+        SELECT :disaster_id, :damage_type, ST_GeogFromText(:location), :severity, :confidence, :verified,
+               1, 1, jsonb_build_object(:source, 1)
+        WHERE NOT EXISTS (SELECT 1 FROM merged)
+        RETURNING id
+    )
+    SELECT id FROM merged UNION ALL SELECT id FROM created
+"""
+
+def merge_report_into_incident(db: Session, report: DamageReportCreate) -> int:
+    """Attach a new report to a nearby recent incident, or open a new one; returns its id"""
+    params = {
+        "disaster_id": report.disaster_id,
+        "damage_type": report.damage_type or "unknown",
+        "location": f"POINT({report.longitude} {report.latitude})",
+        "latitude": report.latitude,
+        "longitude": report.longitude,
+        "severity": report.severity,
+        "confidence": report.confidence or 0.0,
+        "verified": bool(report.verified),
+        "source": report.source or "unknown",
+        "one": 1,
+        "radius": settings.incident_merge_radius_meters,
+        "window_minutes": settings.incident_merge_window_minutes,
+    }
+    # Serialize merges per (disaster, damage type) until commit, so two
+    # concurrent reports of the same incident can't both open a new one
+    db.execute(text("SELECT pg_advisory_xact_lock(:disaster_id, hashtext(:damage_type))"), params)
+    return db.execute(text(MERGE_INCIDENT_SQL), params).scalar_one()
+
+# Reports written without going through the merge (rows from before
+# incidents existed, bulk loads, seeds) are grouped set-wise instead: same
+# disaster and damage type, same merge-radius grid cell and same
+# merge-window time slot. Clusters straddling a cell or slot boundary come
+# out as two incidents, which is close enough for history.
+BACKFILL_INCIDENTS_SQL = """
+    WITH unlinked AS (
+        SELECT id, created_at, disaster_id, coalesce(damage_type, 'unknown') AS damage_type,
+               coalesce(source, 'unknown') AS source, latitude, longitude, severity, confidence, verified,
+               floor(latitude / :cell_degrees) AS cell_y, floor(longitude / :cell_degrees) AS cell_x,
+               floor(extract(epoch FROM created_at) / :window_seconds) AS slot
+        FROM damage_reports
+        WHERE incident_id IS NULL AND disaster_id IS NOT NULL AND location IS NOT NULL
+          AND (:disaster_id IS NULL OR disaster_id = :disaster_id)
+    ), by_source AS (
+        SELECT disaster_id, damage_type, cell_y, cell_x, slot, source, count(*)::int AS n,
+               sum(latitude) AS latitude_sum, sum(longitude) AS longitude_sum, max(severity) AS severity,
+               -- log of the product of (1 - confidence), as in the ingest merge
+               sum(ln(greatest(1 - coalesce(confidence, 0), 1e-9))) AS doubt,
+               bool_or(coalesce(verified, false)) AS verified,
+               min(created_at) AS first_report_at, max(created_at) AS last_report_at
+        FROM unlinked
+        GROUP BY disaster_id, damage_type, cell_y, cell_x, slot, source
+    ), grouped AS (
+        SELECT disaster_id, damage_type, cell_y, cell_x, slot,
+               sum(latitude_sum) / sum(n) AS latitude, sum(longitude_sum) / sum(n) AS longitude,
+               max(severity) AS severity, 1 - exp(sum(doubt)) AS confidence, bool_or(verified) AS verified,
+               sum(n)::int AS report_count, count(*)::int AS source_count,
+               jsonb_object_agg(source, n) AS source_counts,
+               min(first_report_at) AS first_report_at, max(last_report_at) AS last_report_at
+        FROM by_source
+        GROUP BY disaster_id, damage_type, cell_y, cell_x, slot
+    ), clusters AS (
+        SELECT nextval(pg_get_serial_sequence('incidents', 'id')) AS incident_id, * FROM grouped
+    ), created AS (
+        INSERT INTO incidents (
+            id, disaster_id, damage_type, location, severity, confidence, verified,
+            report_count, source_count, source_counts, first_report_at, last_report_at
+        )
+        SELECT incident_id, disaster_id, damage_type,
+               ST_SetSRID(ST_MakePoint(longitude, latitude), 4326)::geography,
+               severity, confidence, verified, report_count, source_count, source_counts,
+               first_report_at, last_report_at
+        FROM clusters
+    )
+    UPDATE damage_reports AS r SET incident_id = c.incident_id
+    FROM unlinked u JOIN clusters c USING (disaster_id, damage_type, cell_y, cell_x, slot)
+    WHERE r.id = u.id AND r.created_at = u.created_at
+"""
+
+def backfill_incidents(db: Session, disaster_id: Optional[int] = None) -> int:
+    """Group reports not yet linked to an incident into new incidents; returns the reports linked"""
+    linked = db.execute(text(BACKFILL_INCIDENTS_SQL), {
+        "disaster_id": disaster_id,
+        "cell_degrees": settings.incident_merge_radius_meters / METERS_PER_DEGREE,
+        "window_seconds": settings.incident_merge_window_minutes * 60,
+    }).rowcount
+    db.commit()
+    return linked
+
+def incidents_query(db: Session, disaster_id: Optional[int] = None, since: Optional[datetime] = None,
+                    min_severity: Optional[int] = None, columns=None, bbox: Optional[BBox] = None):
+    """Build the incident query, most severe first"""
+    query = filter_bbox(db.query(*(columns or [Incident])), Incident, bbox)
+    if disaster_id is not None:
+        query = query.filter(Incident.disaster_id == disaster_id)
+    if since is not None:
+        query = query.filter(Incident.last_report_at >= since)
+    if min_severity is not None:
+        query = query.filter(Incident.severity >= min_severity)
+    return query.order_by(Incident.severity.desc(), Incident.last_report_at.desc())
+
+def get_incident_rows(db: Session, skip: int = 0, limit: int = 100, disaster_id: Optional[int] = None,
+                      since: Optional[datetime] = None, min_severity: Optional[int] = None,
+                      bbox: Optional[BBox] = None):
+    """Incident list as rows shaped like schemas.Incident"""
+    columns = row_columns(Incident, schemas.Incident)
+    return incidents_query(db, disaster_id=disaster_id, since=since, min_severity=min_severity,
+                           columns=columns, bbox=bbox).offset(skip).limit(limit).all()
+
+def get_incident(db: Session, incident_id: int):
+    return db.query(Incident).filter(Incident.id == incident_id).first()
+
+def get_incident_report_rows(db: Session, incident: Incident, skip: int = 0, limit: int = 100):
+    """The raw reports merged into an incident, newest first, as rows shaped like schemas.DamageReport"""
+    columns = row_columns(DamageReport, schemas.DamageReport)
+    # No report of the incident predates it, which lets Postgres prune older partitions
+    return db.query(*columns).filter(
+        DamageReport.incident_id == incident.id,
+        DamageReport.created_at >= incident.first_report_at,
+    ).order_by(DamageReport.created_at.desc()).offset(skip).limit(limit).all()
@@ -0,0 +1,38 @@
+"""
+Persistence for WebSocket broadcast events.
+
+The in-memory ring buffer in app.core.event_log serves recent replays;
+this table covers reconnects whose gap is older than the ring.
+"""
+from typing import List, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from ..models.events import BroadcastEvent
+
+def save_events(db: Session, events: List[Tuple[int, str, str]]):
+    """Insert (seq, event_type, payload JSON) tuples in one batch"""
+    if not events:
+        return
+    db.execute(text("""
+        INSERT INTO broadcast_events (seq, event_type, payload)
+        VALUES (:seq, :event_type, CAST(:payload AS jsonb))
+        ON CONFLICT (seq) DO NOTHING
+    """), [{"seq": seq, "event_type": event_type, "payload": payload} for seq, event_type, payload in events])
+    db.commit()
+
+def latest_event_seq(db: Session) -> int:
+    return db.execute(text("SELECT coalesce(max(seq), 0) FROM broadcast_events")).scalar_one()
+
+def get_events_between(db: Session, after_seq: int, before_seq: int, limit: int) -> List[dict]:
+    """Payloads with after_seq < seq < before_seq, oldest first"""
+    rows = db.query(BroadcastEvent.payload).filter(
+        BroadcastEvent.seq > after_seq, BroadcastEvent.seq < before_seq
+    ).order_by(BroadcastEvent.seq).limit(limit).all()
+    return [row.payload for row in rows]
+
+def prune_events(db: Session, retention_hours: int):
+    db.execute(text("DELETE FROM broadcast_events WHERE created_at < now() - make_interval(hours => :hours)"),
+               {"hours": retention_hours})
+    db.commit()
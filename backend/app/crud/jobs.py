@@ -0,0 +1,132 @@
+"""
+Durable agent job queue on Postgres.
+
+Workers claim jobs with FOR UPDATE SKIP LOCKED, so any number of them on
+any number of nodes can pull from the same table without blocking each
+other. A claimed job is leased until `locked_until`; a worker that dies
+simply lets the lease expire and the job becomes claimable again, which
+gives at-least-once delivery. Failures are retried with exponential
+backoff until max_attempts is reached.
+"""
+import random
+from typing import List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..models.jobs import AgentJob
+from ..schemas.jobs import JobCreate
+
+def enqueue_job(db: Session, job: JobCreate):
+    db_job = AgentJob(
+        kind=job.kind,
+        payload=job.payload or {},
+        priority=job.priority,
+        max_attempts=job.max_attempts,
+        status="queued",
+        attempts=0,
+    )
+    if job.run_at is not None:
+        db_job.run_at = job.run_at
+    db.add(db_job)
+    db.commit()
+    db.refresh(db_job)
+    return db_job
+
+def get_job(db: Session, job_id: int):
+    return db.query(AgentJob).filter(AgentJob.id == job_id).first()
+
+def get_jobs(db: Session, skip: int = 0, limit: int = 100, status: Optional[str] = None, kind: Optional[str] = None):
+    query = db.query(AgentJob)
+    if status is not None:
+        query = query.filter(AgentJob.status == status)
+    if kind is not None:
+        query = query.filter(AgentJob.kind == kind)
+    return query.order_by(AgentJob.id.desc()).offset(skip).limit(limit).all()
+
+def claim_jobs(db: Session, worker_id: str, batch_size: int = 1, kinds: Optional[List[str]] = None,
+               visibility_timeout: Optional[int] = None) -> List[dict]:
+    """Lease up to batch_size runnable jobs to this worker, highest priority first.
+
+    Runnable means queued and due, or running with an expired lease (its
+    worker died) and attempts left.
+    """
+    visibility_timeout = visibility_timeout or settings.job_visibility_timeout_seconds
+    kind_filter = "AND kind = ANY(:kinds)" if kinds else ""
+    # Expired leases with no attempts left are given up on
+    db.execute(text("""
+        UPDATE agent_jobs
+        SET status = 'failed', finished_at = now(), updated_at = now(),
+            last_error = coalesce(last_error, 'visibility timeout expired')
+        WHERE status = 'running' AND locked_until < now() AND attempts >= max_attempts
+    """))
+    claim = text(f"""
+        WITH next AS (
+            SELECT id FROM agent_jobs
+            WHERE status IN ('queued', 'running')
+              AND ((status = 'queued' AND run_at <= now())
+                   OR (status = 'running' AND locked_until < now()))
+              {kind_filter}
+            ORDER BY priority DESC, run_at
+            LIMIT :batch_size
+            FOR UPDATE SKIP LOCKED
+        )
+        UPDATE agent_jobs AS j
+        SET status = 'running',
+            attempts = j.attempts + 1,
+            locked_by = :worker_id,
+            locked_until = now() + make_interval(secs => :visibility_timeout),
+            updated_at = now()
+        FROM next
+        WHERE j.id = next.id
+        RETURNING j.id, j.kind, j.payload, j.priority, j.attempts, j.max_attempts
+    """)
+    params = {"batch_size": batch_size, "worker_id": worker_id, "visibility_timeout": visibility_timeout}
+    if kinds:
+        params["kinds"] = list(kinds)
+    rows = db.execute(claim, params).mappings().all()
+    db.commit()
+    return [dict(row) for row in rows]
+
+def extend_lease(db: Session, job_id: int, worker_id: str, visibility_timeout: Optional[int] = None) -> bool:
+    """Heartbeat for a long-running job; False means the lease was lost"""
+    visibility_timeout = visibility_timeout or settings.job_visibility_timeout_seconds
+    result = db.execute(text("""
+        UPDATE agent_jobs
+        SET locked_until = now() + make_interval(secs => :visibility_timeout), updated_at = now()
+        WHERE id = :job_id AND locked_by = :worker_id AND status = 'running'
+    """), {"job_id": job_id, "worker_id": worker_id, "visibility_timeout": visibility_timeout})
+    db.commit()
+    return result.rowcount == 1
+
+def complete_job(db: Session, job_id: int, worker_id: str) -> bool:
+    """Mark a job done; only the worker holding the lease can do this"""
+    result = db.execute(text("""
+        UPDATE agent_jobs
+        SET status = 'done', finished_at = now(), locked_until = NULL, updated_at = now()
+        WHERE id = :job_id AND locked_by = :worker_id AND status = 'running'
+    """), {"job_id": job_id, "worker_id": worker_id})
+    db.commit()
+    return result.rowcount == 1
+
+def retry_delay(attempts: int) -> float:
+    """Exponential backoff, jittered over the upper half, for the given attempt number"""
+    ceiling = min(settings.job_retry_max_seconds, settings.job_retry_base_seconds * 2 ** max(0, attempts - 1))
+    return random.uniform(ceiling / 2, ceiling)
+
+def fail_job(db: Session, job_id: int, worker_id: str, error: str, attempts: int) -> bool:
+    """Record a failure: requeue with backoff, or give up after max_attempts"""
+    result = db.execute(text("""
+        UPDATE agent_jobs
+        SET status = CASE WHEN attempts >= max_attempts THEN 'failed' ELSE 'queued' END,
+            finished_at = CASE WHEN attempts >= max_attempts THEN now() END,
+            run_at = now() + make_interval(secs => :delay),
+            locked_by = NULL,
+            locked_until = NULL,
+            last_error = :error,
+            updated_at = now()
+        WHERE id = :job_id AND locked_by = :worker_id AND status = 'running'
+    """), {"job_id": job_id, "worker_id": worker_id, "error": error[:2000], "delay": retry_delay(attempts)})
+    db.commit()
+    return result.rowcount == 1
@@ -1,19 +1,75 @@
-from fastapi import FastAPI, Depends
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Depends, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from .api.endpoints import router
+from .api.endpoints import router, supervisor
 from .core.config import settings
-from .core.database import engine
-from .models import disaster
+from .core.database import engine, SessionLocal
+from .core.event_log import event_log
+from .core.metrics import MetricsMiddleware, instrument_engine, register_pool_metrics, render_metrics
+from .core.partitions import run_partition_maintenance
+from .core import sql_profiler
+from .crud.disaster import prune_report_rates
+from .crud.events import prune_events
+from .models import disaster, events, jobs
+
+instrument_engine(engine)
+register_pool_metrics(engine)
 
 # Create database tables (commented out since we created them manually)
 # disaster.Base.metadata.create_all(bind=engine)
 
+def run_maintenance():
+    """Partition upkeep for damage_reports plus pruning of rate buckets and old broadcast events"""
+    result = run_partition_maintenance(engine)
+    db = SessionLocal()
+    try:
+        prune_report_rates(db)
+        prune_events(db, settings.ws_event_retention_hours)
+    finally:
+        db.close()
+    return result
+
+async def maintenance_loop():
+    """Keep damage_reports partitions created ahead and archive expired ones"""
+    while True:
+        try:
+            result = await run_in_threadpool(run_maintenance)
+            if result["created"] or result["archived"]:
+                print(f"Partition maintenance: {result}")
+        except Exception as e:
+            print(f"Maintenance error: {e}")
+        await asyncio.sleep(settings.partition_maintenance_interval_seconds)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    maintenance = asyncio.create_task(maintenance_loop())
+    await event_log.start()
+    yield
+    maintenance.cancel()
+    await supervisor.shutdown()
+    await event_log.stop()
+
 app = FastAPI(
     title="Project AIDR API",
     description="Agent-driven Integrated Disaster Response Platform",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
+app.add_middleware(MetricsMiddleware)
+
+if settings.sql_profiler_enabled:
+    sql_profiler.instrument_engine(engine)
+    app.add_middleware(sql_profiler.SQLProfilerMiddleware,
+                       n_plus_one_threshold=settings.sql_profiler_n_plus_one_threshold)
+
+    @app.get("/debug/sql-profiles", include_in_schema=False)
+    def sql_profiles():
+        """Most recent per-request SQL profiles, newest first"""
+        return list(reversed(sql_profiler.recent_profiles))
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -36,4 +92,10 @@ def read_root():
 
 @app.get("/health")
 def health_check():
-    return {"status": "healthy"}
\ No newline at end of file
+    return {"status": "healthy"}
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus scrape endpoint"""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
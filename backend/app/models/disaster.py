@@ -1,8 +1,17 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text, Boolean
+from sqlalchemy import Column, Computed, Integer, String, Float, DateTime, Text, Boolean, Index, text
 from sqlalchemy.sql import func
+from sqlalchemy.dialects.postgresql import JSONB
 from geoalchemy2 import Geography
 from ..core.database import Base
 
+# Coordinates projected from `location` by Postgres on write, so reads and
+# bbox filters use plain float columns instead of ST_X/ST_Y per row
+def latitude_column():
+    return Column(Float, Computed("ST_Y(location::geometry)", persisted=True))
+
+def longitude_column():
+    return Column(Float, Computed("ST_X(location::geometry)", persisted=True))
+
 class DisasterEvent(Base):
     __tablename__ = "disaster_events"
     
@@ -10,6 +19,8 @@ class DisasterEvent(Base):
     name = Column(String, index=True)
     event_type = Column(String)  # earthquake, hurricane, flood, etc.
     location = Column(Geography('POINT'))
+    latitude = latitude_column()
+    longitude = longitude_column()
     severity = Column(Integer)  # 1-10 scale
     status = Column(String, default="active")  # active, contained, resolved
     description = Column(Text)
@@ -19,16 +30,55 @@ class DisasterEvent(Base):
 class DamageReport(Base):
     __tablename__ = "damage_reports"
     
-    id = Column(Integer, primary_key=True, index=True)
+    # Range partitioned by created_at, so it has to be part of the primary key
+    id = Column(Integer, primary_key=True, autoincrement=True, index=True)
     disaster_id = Column(Integer)
     location = Column(Geography('POINT'))
+    latitude = latitude_column()
+    longitude = longitude_column()
     damage_type = Column(String)  # structural, infrastructure, human, etc.
     severity = Column(Integer)  # 1-10 scale
     description = Column(Text)
     source = Column(String)  # social_media, drone, field_report, etc.
     confidence = Column(Float)  # 0.0-1.0 confidence score
     verified = Column(Boolean, default=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    incident_id = Column(Integer)  # incident this report was merged into at ingest
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), primary_key=True)
+
+    __table_args__ = (
+        # Per-disaster recency scans used by the assessment agent
+        Index("ix_damage_reports_disaster_id_created_at", "disaster_id", "created_at"),
+        Index("ix_damage_reports_lat_lng", "latitude", "longitude"),
+        Index("ix_damage_reports_incident_id", "incident_id"),
+        # Daily partitions are managed by app.core.partitions
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+
+class Incident(Base):
+    """Corroborating damage reports merged at ingest: same place, damage type and time window"""
+    __tablename__ = "incidents"
+
+    id = Column(Integer, primary_key=True, index=True)
+    disaster_id = Column(Integer)
+    damage_type = Column(String)
+    location = Column(Geography('POINT'))  # running centroid; GiST indexed for ST_DWithin
+    latitude = latitude_column()
+    longitude = longitude_column()
+    severity = Column(Integer)  # highest severity reported
+    confidence = Column(Float)  # combined as independent evidence
+    verified = Column(Boolean, default=False)
+    report_count = Column(Integer, nullable=False, default=1)
+    source_count = Column(Integer, nullable=False, default=1)  # distinct sources
+    source_counts = Column(JSONB, nullable=False, default=dict)  # {"social_media": 4, ...}
+    first_report_at = Column(DateTime(timezone=True), server_default=func.now())
+    last_report_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        # Merge candidates: recent incidents of one disaster and damage type
+        Index("ix_incidents_disaster_id_damage_type_last_report_at",
+              "disaster_id", "damage_type", "last_report_at"),
+        Index("ix_incidents_lat_lng", "latitude", "longitude"),
+    )
 
 class Resource(Base):
     __tablename__ = "resources"
@@ -37,12 +87,20 @@ class Resource(Base):
     name = Column(String)
     resource_type = Column(String)  # personnel, equipment, medical, etc.
     location = Column(Geography('POINT'))
+    latitude = latitude_column()
+    longitude = longitude_column()
     status = Column(String, default="available")  # available, deployed, maintenance
     capacity = Column(Integer)
     current_load = Column(Integer, default=0)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+    __table_args__ = (
+        # Only available resources are considered by the planner
+        Index("ix_resources_available", "id", postgresql_where=text("status = 'available'")),
+        Index("ix_resources_lat_lng", "latitude", "longitude"),
+    )
+
 class Task(Base):
     __tablename__ = "tasks"
     
@@ -55,6 +113,42 @@ class Task(Base):
     status = Column(String, default="pending")  # pending, in_progress, completed
     assigned_resources = Column(Text)  # JSON array of resource IDs
     location = Column(Geography('POINT'))
+    latitude = latitude_column()
+    longitude = longitude_column()
     estimated_duration = Column(Integer)  # minutes
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
\ No newline at end of file
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    __table_args__ = (
+        Index("ix_tasks_disaster_id_status_priority", "disaster_id", "status", "priority"),
+        Index("ix_tasks_lat_lng", "latitude", "longitude"),
+        # Planner queue: pending tasks, highest priority first
+        Index(
+            "ix_tasks_pending",
+            text("priority DESC"),
+            "created_at",
+            postgresql_where=text("status = 'pending'"),
+        ),
+    )
+
+class DisasterSummary(Base):
+    """Running per-disaster counters, maintained in the same transaction as report/task writes"""
+    __tablename__ = "disaster_summaries"
+
+    disaster_id = Column(Integer, primary_key=True)
+    total_reports = Column(Integer, nullable=False, default=0)
+    high_severity_reports = Column(Integer, nullable=False, default=0)  # severity >= 7
+    verified_reports = Column(Integer, nullable=False, default=0)
+    damage_type_counts = Column(JSONB, nullable=False, default=dict)  # {"flooding": 12, ...}
+    source_counts = Column(JSONB, nullable=False, default=dict)  # {"social_media": 40, ...}
+    task_status_counts = Column(JSONB, nullable=False, default=dict)  # {"pending": 3, ...}
+    last_report_at = Column(DateTime(timezone=True))
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class DisasterReportRate(Base):
+    """Reports received per disaster per minute, for rolling-window rates"""
+    __tablename__ = "disaster_report_rates"
+
+    disaster_id = Column(Integer, primary_key=True)
+    bucket = Column(DateTime(timezone=True), primary_key=True)  # truncated to the minute
+    report_count = Column(Integer, nullable=False, default=0)
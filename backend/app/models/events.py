@@ -0,0 +1,18 @@
+from sqlalchemy import Column, BigInteger, String, DateTime, Index
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
+from ..core.database import Base
+
+class BroadcastEvent(Base):
+    """A WebSocket broadcast, kept so reconnecting clients can replay what they missed (see app.core.event_log)"""
+    __tablename__ = "broadcast_events"
+
+    seq = Column(BigInteger, primary_key=True, autoincrement=False)
+    event_type = Column(String)  # damage_report, new_task, agent_update, ...
+    payload = Column(JSONB, nullable=False)  # the message as broadcast, including seq
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        # Retention pruning
+        Index("ix_broadcast_events_created_at", "created_at"),
+    )
@@ -0,0 +1,33 @@
+from sqlalchemy import Column, BigInteger, Integer, String, DateTime, Text, Index, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
+from ..core.database import Base
+
+class AgentJob(Base):
+    """A unit of agent work in the durable queue (see app.crud.jobs)"""
+    __tablename__ = "agent_jobs"
+
+    id = Column(BigInteger, primary_key=True)
+    kind = Column(String, nullable=False)  # analyze_post, assess_disaster, plan_region
+    payload = Column(JSONB, nullable=False, default=dict)
+    priority = Column(Integer, nullable=False, default=0)  # higher runs first
+    status = Column(String, nullable=False, default="queued")  # queued, running, done, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=5)
+    run_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    locked_by = Column(String)
+    locked_until = Column(DateTime(timezone=True))  # visibility timeout of a running job
+    last_error = Column(Text)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    finished_at = Column(DateTime(timezone=True))
+
+    __table_args__ = (
+        # Claim order for workers; finished jobs drop out of the index
+        Index(
+            "ix_agent_jobs_claimable",
+            text("priority DESC"),
+            "run_at",
+            postgresql_where=text("status IN ('queued', 'running')"),
+        ),
+    )
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Optional, List, Dict
 from datetime import datetime
 
 class DisasterEventBase(BaseModel):
@@ -41,11 +41,30 @@ class DamageReport(DamageReportBase):
     disaster_id: int
     latitude: float
     longitude: float
+    incident_id: Optional[int] = None
     created_at: datetime
     
     class Config:
         from_attributes = True
 
+class Incident(BaseModel):
+    id: int
+    disaster_id: int
+    damage_type: str
+    latitude: float
+    longitude: float
+    severity: int
+    confidence: float
+    verified: bool = False
+    report_count: int
+    source_count: int
+    source_counts: Dict[str, int] = {}
+    first_report_at: datetime
+    last_report_at: datetime
+
+    class Config:
+        from_attributes = True
+
 class ResourceBase(BaseModel):
     name: str
     resource_type: str
@@ -92,6 +111,18 @@ class Task(TaskBase):
     class Config:
         from_attributes = True
 
+class DisasterSummary(BaseModel):
+    disaster_id: int
+    total_reports: int = 0
+    high_severity_reports: int = 0
+    verified_reports: int = 0
+    damage_type_counts: Dict[str, int] = {}
+    source_counts: Dict[str, int] = {}
+    task_status_counts: Dict[str, int] = {}
+    last_report_at: Optional[datetime] = None
+    reports_per_minute: Dict[str, float] = {}  # rolling windows, e.g. {"5m": 2.4}
+    updated_at: Optional[datetime] = None
+
 class AgentUpdate(BaseModel):
     agent_type: str
     status: str
@@ -0,0 +1,31 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+
+JOB_KINDS = ("analyze_post", "assess_disaster", "plan_region")
+
+class JobCreate(BaseModel):
+    kind: str
+    payload: Optional[dict] = None
+    priority: int = 0
+    max_attempts: int = 5
+    run_at: Optional[datetime] = None
+
+class Job(BaseModel):
+    id: int
+    kind: str
+    payload: dict
+    priority: int
+    status: str
+    attempts: int
+    max_attempts: int
+    run_at: datetime
+    locked_by: Optional[str] = None
+    locked_until: Optional[datetime] = None
+    last_error: Optional[str] = None
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
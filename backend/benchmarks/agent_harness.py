@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Throughput harness for the agent pipeline, run against the fake LLM.
+
+Starts benchmarks/fake_llm_server.py and the API (unless --llm-url /
+--base-url point at running ones), then drives the agents directly:
+
+  social_media       SocialMediaAgent.process_post over --posts posts with
+                     --concurrency in flight: posts/sec and latency per post
+  damage_assessment  --cycles runs of DamageAssessmentAgent.run_assessment_cycle
+  resource_planning  --cycles runs of ResourcePlanningAgent.run_planning_cycle
+
+For each stage it reports LLM calls per item (from the fake server's
+/stats) and database writes per item (INSERT/UPDATE/DELETE statements
+from the API's /metrics). Status updates go to a local sink instead of
+POST /agent-update so they don't count as pipeline writes.
+
+    python benchmarks/agent_harness.py --posts 500 --concurrency 16 --llm-latency fixed:200
+    python benchmarks/agent_harness.py --json results/agents.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCH_DIR)
+sys.path.append(BACKEND_DIR)
+
+import httpx
+from prometheus_client.parser import text_string_to_metric_families
+
+from load_test import git_commit, latency_stats, start_server
+
+POST_TEMPLATES = [
+    "Building collapsed on {street}! People trapped inside! #earthquake",
+    "Water rising fast near {street}. Cars floating away #flood",
+    "Power lines down everywhere on {street} after the storm",
+    "Fire spreading through the block at {street}. Evacuations ordered",
+    "Road blocked by debris on {street}, nobody can get through",
+    "Beautiful sunset at the beach today! #vacation",
+    "Great coffee on {street} this morning",
+    "My house on {street} is severely damaged. Roof caved in completely",
+]
+STREETS = ["Main Street", "Broadway", "Canal Street", "Houston Street", "Park Avenue", "Fulton Street"]
+
+def synthetic_posts(n: int, seed: int = 0) -> List[str]:
+    rng = random.Random(seed)
+    return [rng.choice(POST_TEMPLATES).format(street=rng.choice(STREETS)) for _ in range(n)]
+
+def wait_healthy(url: str, process: subprocess.Popen, name: str):
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{name} exited with status {process.returncode}")
+        try:
+            httpx.get(url)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"{name} did not start within 30s")
+
+def start_fake_llm(port: int, args) -> subprocess.Popen:
+    command = [sys.executable, os.path.join(BENCH_DIR, "fake_llm_server.py"), "--port", str(port),
+               "--latency", args.llm_latency, "--error-rate", str(args.llm_error_rate), "--seed", str(args.seed)]
+    process = subprocess.Popen(command, cwd=BACKEND_DIR)
+    wait_healthy(f"http://127.0.0.1:{port}/stats", process, "fake LLM server")
+    return process
+
+class Counters:
+    """Snapshots of LLM calls and DB writes around a stage"""
+
+    def __init__(self, llm_url: str, base_url: str):
+        self.llm_stats_url = llm_url.rsplit("/v1", 1)[0] + "/stats"
+        self.metrics_url = base_url + "/metrics"
+
+    def llm_calls(self) -> Dict[str, int]:
+        return httpx.get(self.llm_stats_url).json()
+
+    def db_writes(self) -> float:
+        writes = 0.0
+        for family in text_string_to_metric_families(httpx.get(self.metrics_url).text):
+            if family.name != "aidr_sql_statements":
+                continue
+            for sample in family.samples:
+                if sample.name.endswith("_total") and sample.labels.get("verb") in ("INSERT", "UPDATE", "DELETE"):
+                    writes += sample.value
+        return writes
+
+    def snapshot(self) -> dict:
+        return {"llm": self.llm_calls(), "db_writes": self.db_writes(), "at": time.perf_counter()}
+
+    def stage_result(self, before: dict, items: int, latencies: List[float]) -> dict:
+        after = self.snapshot()
+        seconds = after["at"] - before["at"]
+        calls = after["llm"]["calls"] - before["llm"]["calls"]
+        return {
+            "items": items,
+            "seconds": seconds,
+            "items_per_second": items / seconds if seconds else 0.0,
+            "llm_calls_per_item": calls / items if items else 0.0,
+            "llm_errors": after["llm"]["errors"] - before["llm"]["errors"],
+            "llm_completion_tokens_per_item":
+                (after["llm"]["completion_tokens"] - before["llm"]["completion_tokens"]) / items if items else 0.0,
+            "db_writes_per_item": (after["db_writes"] - before["db_writes"]) / items if items else 0.0,
+            "latency": latency_stats(latencies),
+        }
+
+async def run_concurrently(items: list, concurrency: int, handle: Callable) -> List[float]:
+    """Run handle(item) for every item with `concurrency` in flight; latency per item"""
+    latencies: List[float] = []
+    queue = iter(items)
+
+    async def worker():
+        for item in queue:
+            started = time.perf_counter()
+            await handle(item)
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies
+
+async def bench_social_media(counters: Counters, api_url: str, disaster_id: int, posts: List[str],
+                             concurrency: int, sink: Callable) -> dict:
+    from agents.social_media_agent import SocialMediaAgent
+
+    agent = SocialMediaAgent(event_sink=sink)
+    agent.api_base_url = api_url
+    before = counters.snapshot()
+    latencies = await run_concurrently(posts, concurrency,
+                                       lambda post: agent.process_post(post, disaster_id=disaster_id))
+    return counters.stage_result(before, len(posts), latencies)
+
+async def bench_cycles(counters: Counters, make_agent: Callable, run_cycle: str, cycles: int) -> dict:
+    agent = make_agent()
+    before = counters.snapshot()
+    latencies = []
+    for _ in range(cycles):
+        started = time.perf_counter()
+        await getattr(agent, run_cycle)()
+        latencies.append(time.perf_counter() - started)
+    return counters.stage_result(before, cycles, latencies)
+
+async def run(args, llm_url: str, base_url: str) -> dict:
+    from agents.damage_assessment_agent import DamageAssessmentAgent
+    from agents.resource_planning_agent import ResourcePlanningAgent
+
+    api_url = base_url + "/api/v1"
+    counters = Counters(llm_url, base_url)
+    updates = []
+    sink = updates.append
+
+    async with httpx.AsyncClient(base_url=api_url, timeout=30) as client:
+        response = await client.post("/disasters/", json={
+            "name": "Agent harness", "event_type": "earthquake", "severity": 7,
+            "latitude": 40.7128, "longitude": -74.0060})
+        response.raise_for_status()
+        disaster_id = response.json()["id"]
+
+    def assessment_agent():
+        agent = DamageAssessmentAgent(event_sink=sink, disaster_id=disaster_id)
+        agent.api_base_url = api_url
+        return agent
+
+    def planning_agent():
+        agent = ResourcePlanningAgent(event_sink=sink)
+        agent.api_base_url = api_url
+        return agent
+
+    stages = {}
+    if "social_media" in args.stages:
+        stages["social_media"] = await bench_social_media(
+            counters, api_url, disaster_id, synthetic_posts(args.posts, args.seed), args.concurrency, sink)
+    if "damage_assessment" in args.stages:
+        stages["damage_assessment"] = await bench_cycles(
+            counters, assessment_agent, "run_assessment_cycle", args.cycles)
+    if "resource_planning" in args.stages:
+        stages["resource_planning"] = await bench_cycles(
+            counters, planning_agent, "run_planning_cycle", args.cycles)
+
+    for name, result in stages.items():
+        print(f"{name:<18} {result['items_per_second']:>8.2f} items/s  p50 {result['latency']['p50_ms']:>8.1f} ms  "
+              f"p95 {result['latency']['p95_ms']:>8.1f} ms  LLM calls/item {result['llm_calls_per_item']:.2f}  "
+              f"DB writes/item {result['db_writes_per_item']:.2f}")
+
+    return {
+        "benchmark": "agent_harness",
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "config": {"posts": args.posts, "cycles": args.cycles, "concurrency": args.concurrency,
+                   "llm_latency": args.llm_latency, "llm_error_rate": args.llm_error_rate, "seed": args.seed},
+        "stages": stages,
+        "agent_updates": len(updates),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Agent pipeline benchmark against a fake LLM")
+    parser.add_argument("--base-url", help="running API, e.g. http://localhost:8000 (default: start one)")
+    parser.add_argument("--port", type=int, default=8766, help="port for the API started by the harness")
+    parser.add_argument("--llm-url", help="running fake LLM, e.g. http://127.0.0.1:8900/v1 (default: start one)")
+    parser.add_argument("--llm-port", type=int, default=8901)
+    parser.add_argument("--llm-latency", default="lognormal:800,0.5", help="latency spec for the fake LLM")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--stages", nargs="+", default=["social_media", "damage_assessment", "resource_planning"],
+                        choices=["social_media", "damage_assessment", "resource_planning"])
+    parser.add_argument("--posts", type=int, default=200)
+    parser.add_argument("--cycles", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=8, help="posts processed at once")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    processes = []
+    try:
+        llm_url = args.llm_url
+        if llm_url is None:
+            processes.append(start_fake_llm(args.llm_port, args))
+            llm_url = f"http://127.0.0.1:{args.llm_port}/v1"
+        # The agents read this through settings when their clients are built
+        os.environ["OPENAI_BASE_URL"] = llm_url
+        os.environ.setdefault("OPENAI_API_KEY", "fake-key")
+        from app.core.config import settings
+        settings.openai_base_url = llm_url
+        settings.openai_api_key = settings.openai_api_key or "fake-key"
+
+        base_url = args.base_url
+        if base_url is None:
+            processes.append(start_server(args.port))
+            base_url = f"http://127.0.0.1:{args.port}"
+
+        results = asyncio.run(run(args, llm_url, base_url))
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait(timeout=10)
+
+    if args.json:
+        os.makedirs(os.path.dirname(os.path.abspath(args.json)), exist_ok=True)
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
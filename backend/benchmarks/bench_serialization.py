@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Compare the two list-response serialization paths.
+
+  model path: ORM objects -> pydantic validation per row -> JSON
+  rows path:  named rows from a column select -> orjson, no per-row models
+
+By default both paths run on synthetic task rows so the numbers isolate
+serialization cost. With --database the full query + serialize path is
+timed against the configured database instead (crud.get_tasks vs
+crud.get_task_rows), which includes the per-row coordinate lookups the
+model path still does.
+
+    python benchmarks/bench_serialization.py --rows 1000 10000 100000
+    python benchmarks/bench_serialization.py --database --rows 10000 --json results.json
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.api.serialization import dump_models, dump_rows
+from app.schemas import disaster as schemas
+
+TaskRow = namedtuple("TaskRow", list(schemas.Task.model_fields))
+
+def synthetic_tasks(n: int):
+    """Equivalent ORM-like objects and named rows for n tasks"""
+    base = datetime(2025, 8, 12, tzinfo=timezone.utc)
+    objects, rows = [], []
+    for i in range(n):
+        values = {
+            "title": f"Emergency Response - Zone {i}",
+            "description": "High priority response needed. Severity: 8",
+            "task_type": "rescue",
+            "priority": i % 5 + 1,
+            "status": "pending",
+            "assigned_resources": None,
+            "estimated_duration": 180,
+            "id": i + 1,
+            "disaster_id": 1,
+            "latitude": 40.7128 + (i % 100) * 0.001,
+            "longitude": -74.0060 - (i % 100) * 0.001,
+            "created_at": base + timedelta(seconds=i),
+            "updated_at": None,
+        }
+        objects.append(SimpleNamespace(**values))
+        rows.append(TaskRow(**values))
+    return objects, rows
+
+def timed(fn, repeat: int):
+    """Run fn `repeat` times; returns (median seconds, last result)"""
+    samples = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples), result
+
+def bench_synthetic(n: int, repeat: int) -> dict:
+    objects, rows = synthetic_tasks(n)
+    model_s, model_body = timed(lambda: dump_models(schemas.Task, objects), repeat)
+    rows_s, rows_body = timed(lambda: dump_rows(rows), repeat)
+    assert json.loads(model_body) == json.loads(rows_body), "paths disagree"
+    return {"rows": n, "model_path_ms": model_s * 1000, "rows_path_ms": rows_s * 1000,
+            "speedup": model_s / rows_s, "bytes": len(rows_body)}
+
+def bench_database(n: int, repeat: int) -> dict:
+    from app.core.database import SessionLocal
+    from app.crud import disaster as crud
+
+    db = SessionLocal()
+    try:
+        model_s, model_body = timed(
+            lambda: dump_models(schemas.Task, crud.get_tasks(db, limit=n)), repeat)
+        rows_s, rows_body = timed(
+            lambda: dump_rows(crud.get_task_rows(db, limit=n)), repeat)
+    finally:
+        db.close()
+    return {"rows": len(json.loads(rows_body)), "model_path_ms": model_s * 1000,
+            "rows_path_ms": rows_s * 1000, "speedup": model_s / rows_s, "bytes": len(rows_body)}
+
+def main():
+    parser = argparse.ArgumentParser(description="List serialization benchmark")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--database", action="store_true", help="time query + serialize against the database")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    bench = bench_database if args.database else bench_synthetic
+    results = []
+    print(f"{'rows':>8} {'model ms':>10} {'rows ms':>10} {'speedup':>8} {'bytes':>10}")
+    for n in args.rows:
+        result = bench(n, args.repeat)
+        results.append(result)
+        print(f"{result['rows']:>8} {result['model_path_ms']:>10.1f} {result['rows_path_ms']:>10.1f} "
+              f"{result['speedup']:>7.1f}x {result['bytes']:>10}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"benchmark": "serialization", "database": args.database, "results": results}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the OpenAI chat-completions API.
+
+Lets the agents run offline and reproducibly. Point them at it with
+
+    OPENAI_BASE_URL=http://127.0.0.1:8900/v1
+
+Responses come from one of three modes:
+
+  canned  deterministic answers built from the prompt: post analyses,
+          damage assessments and allocation plans shaped like the real
+          model's, seeded by a hash of the prompt
+  record  forward to --upstream and append every exchange to --cassette
+  replay  answer from --cassette by prompt hash (unknown prompts fall back
+          to canned answers with --replay-fallback, else 404)
+
+Latency is drawn from --latency (fixed:MS, uniform:LOW,HIGH or
+lognormal:MEDIAN,SIGMA) plus --ms-per-token for each completion token, and
+--error-rate injects failures with statuses from --error-statuses (429s
+carry Retry-After). GET /stats returns call, error and token counters.
+
+    python benchmarks/fake_llm_server.py --latency lognormal:800,0.6 --error-rate 0.02
+    python benchmarks/fake_llm_server.py --mode record --upstream https://api.openai.com/v1 --cassette llm.jsonl
+    python benchmarks/fake_llm_server.py --mode replay --cassette llm.jsonl
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+import uuid
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+DAMAGE_TYPES = ["structural_damage", "flooding", "fire", "debris", "power_outage", "road_closure"]
+DISASTER_WORDS = {
+    "earthquake": ("earthquake", "structural_damage"), "collapse": ("earthquake", "structural_damage"),
+    "flood": ("flood", "flooding"), "water rising": ("flood", "flooding"),
+    "fire": ("fire", "fire"), "smoke": ("fire", "fire"),
+    "storm": ("storm", "power_outage"), "power lines": ("storm", "power_outage"),
+    "debris": ("storm", "debris"), "road": ("storm", "road_closure"),
+    "trapped": ("collapse", "structural_damage"), "damaged": ("earthquake", "structural_damage"),
+}
+
+def prompt_key(model: str, messages: list) -> str:
+    return hashlib.sha256(json.dumps([model, messages], sort_keys=True).encode()).hexdigest()
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+class LatencyModel:
+    def __init__(self, spec: str, ms_per_token: float = 0.0):
+        kind, _, params = spec.partition(":")
+        values = [float(v) for v in params.split(",")] if params else []
+        if kind not in ("fixed", "uniform", "lognormal") or len(values) != {"fixed": 1}.get(kind, 2):
+            raise ValueError(f"bad latency spec '{spec}'")
+        self.kind = kind
+        self.values = values
+        self.ms_per_token = ms_per_token
+
+    def sample(self, rng: random.Random, completion_tokens: int) -> float:
+        """Seconds to wait before answering"""
+        if self.kind == "fixed":
+            ms = self.values[0]
+        elif self.kind == "uniform":
+            ms = rng.uniform(*self.values)
+        else:
+            median, sigma = self.values
+            ms = rng.lognormvariate(0.0, sigma) * median
+        return (ms + self.ms_per_token * completion_tokens) / 1000
+
+def canned_social_analysis(post: str, rng: random.Random) -> dict:
+    text = post.lower()
+    matches = [value for word, value in DISASTER_WORDS.items() if word in text]
+    if not matches:
+        return {"is_disaster_related": False, "disaster_type": "none", "severity": 1,
+                "location_mentioned": "", "damage_type": "unknown",
+                "confidence": round(rng.uniform(0.6, 0.95), 2), "key_phrases": []}
+    disaster_type, damage_type = matches[0]
+    location = re.search(r"\b(?:on|near|in|at)\s+((?:[A-Z][\w']*\s?){1,3})", post)
+    return {
+        "is_disaster_related": True,
+        "disaster_type": disaster_type,
+        "severity": rng.randint(4, 10),
+        "location_mentioned": location.group(1).strip() if location else "",
+        "damage_type": damage_type,
+        "confidence": round(rng.uniform(0.55, 0.95), 2),
+        "key_phrases": [word for word in DISASTER_WORDS if word in text][:3],
+    }
+
+def canned_assessment(prompt: str, rng: random.Random) -> dict:
+    coordinates = re.findall(r'"latitude":\s*(-?[\d.]+),\s*"longitude":\s*(-?[\d.]+)', prompt)
+    zones = [{"latitude": float(lat), "longitude": float(lng), "severity": rng.randint(6, 10),
+              "description": "Cluster of high severity reports"} for lat, lng in coordinates[:3]]
+    return {
+        "overall_severity": rng.choice(["medium", "high", "critical"]),
+        "primary_damage_types": rng.sample(DAMAGE_TYPES, 2),
+        "affected_area_size": rng.choice(["small", "medium", "large"]),
+        "trend": rng.choice(["improving", "stable", "worsening"]),
+        "critical_zones": zones,
+        "recommended_actions": ["Deploy search and rescue teams", "Set up medical triage"],
+        "confidence": round(rng.uniform(0.6, 0.9), 2),
+    }
+
+def canned_allocation(prompt: str, rng: random.Random) -> dict:
+    tasks_part, _, resources_part = prompt.partition("AVAILABLE RESOURCES")
+    task_ids = [int(i) for i in re.findall(r'"id":\s*(\d+)', tasks_part)]
+    resource_ids = [int(i) for i in re.findall(r'"id":\s*(\d+)', resources_part)]
+    allocations = []
+    for task_id, resource_id in zip(task_ids, resource_ids):
+        allocations.append({"task_id": task_id, "resource_ids": [resource_id],
+                            "efficiency_score": round(rng.uniform(0.6, 0.95), 2),
+                            "reasoning": "Nearest available resource of a matching type"})
+    return {
+        "allocations": allocations,
+        "overall_efficiency": round(rng.uniform(0.6, 0.9), 2),
+        "unallocated_tasks": task_ids[len(allocations):],
+        "recommendations": ["Request additional resources"] if len(task_ids) > len(resource_ids) else [],
+    }
+
+def canned_content(messages: list, rng: random.Random) -> str:
+    prompt = "\n".join(str(m.get("content", "")) for m in messages)
+    if "social media post" in prompt:
+        # The post is the line that is a quoted string on its own
+        post = re.search(r'^\s*"(.*)"\s*$', prompt, re.MULTILINE)
+        return json.dumps(canned_social_analysis(post.group(1) if post else prompt, rng))
+    if "damage reports" in prompt:
+        return json.dumps(canned_assessment(prompt, rng))
+    if "resource allocation" in prompt:
+        return json.dumps(canned_allocation(prompt, rng))
+    return json.dumps({"answer": "ok"})
+
+def completion_body(model: str, content: str, prompt_tokens: int) -> dict:
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex[:24]}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": estimate_tokens(content),
+                  "total_tokens": prompt_tokens + estimate_tokens(content)},
+    }
+
+def create_app(args) -> FastAPI:
+    app = FastAPI(title="Fake chat completions")
+    latency = LatencyModel(args.latency, args.ms_per_token)
+    rng = random.Random(args.seed)
+    stats = {"calls": 0, "errors": 0, "prompt_tokens": 0, "completion_tokens": 0, "replay_misses": 0}
+    cassette = {}
+    cassette_lock = threading.Lock()
+    if args.mode == "replay":
+        with open(args.cassette) as f:
+            for line in f:
+                entry = json.loads(line)
+                cassette[entry["key"]] = entry["response"]
+
+    @app.get("/stats")
+    def get_stats():
+        return stats
+
+    @app.post("/stats/reset")
+    def reset_stats():
+        for key in stats:
+            stats[key] = 0
+        return stats
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        model = body.get("model", "gpt-4")
+        messages = body.get("messages", [])
+        key = prompt_key(model, messages)
+        prompt_tokens = sum(estimate_tokens(str(m.get("content", ""))) for m in messages)
+        stats["calls"] += 1
+
+        if rng.random() < args.error_rate:
+            status = rng.choice(args.error_statuses)
+            stats["errors"] += 1
+            await asyncio.sleep(latency.sample(rng, 0) / 4)
+            headers = {"Retry-After": "1"} if status == 429 else {}
+            return JSONResponse({"error": {"message": "injected failure", "type": "fake_error", "code": status}},
+                                status_code=status, headers=headers)
+
+        if args.mode == "record":
+            async with httpx.AsyncClient(timeout=120) as client:
+                upstream = await client.post(
+                    f"{args.upstream}/chat/completions", json=body,
+                    headers={"Authorization": request.headers.get("authorization", "")})
+            response = upstream.json()
+            if upstream.status_code < 400:
+                with cassette_lock, open(args.cassette, "a") as f:
+                    f.write(json.dumps({"key": key, "request": body, "response": response}) + "\n")
+            else:
+                stats["errors"] += 1
+            return JSONResponse(response, status_code=upstream.status_code)
+
+        if args.mode == "replay" and key in cassette:
+            response = cassette[key]
+        elif args.mode == "replay" and not args.replay_fallback:
+            stats["replay_misses"] += 1
+            stats["errors"] += 1
+            return JSONResponse({"error": {"message": "prompt not in cassette", "type": "replay_miss"}},
+                                status_code=404)
+        else:
+            if args.mode == "replay":
+                stats["replay_misses"] += 1
+            # Seed per prompt so the same prompt always gets the same answer
+            content = canned_content(messages, random.Random(f"{args.seed}:{key}"))
+            response = completion_body(model, content, prompt_tokens)
+
+        usage = response.get("usage", {})
+        stats["prompt_tokens"] += usage.get("prompt_tokens", 0)
+        stats["completion_tokens"] += usage.get("completion_tokens", 0)
+        await asyncio.sleep(latency.sample(rng, usage.get("completion_tokens", 0)))
+        return response
+
+    return app
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Fake OpenAI chat-completions server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--mode", choices=["canned", "record", "replay"], default="canned")
+    parser.add_argument("--latency", default="lognormal:800,0.5",
+                        help="fixed:MS, uniform:LOW,HIGH or lognormal:MEDIAN,SIGMA (milliseconds)")
+    parser.add_argument("--ms-per-token", type=float, default=0.0, help="extra latency per completion token")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of calls that fail")
+    parser.add_argument("--error-statuses", type=lambda v: [int(s) for s in v.split(",")], default=[429, 500, 503])
+    parser.add_argument("--cassette", help="JSONL file for record/replay")
+    parser.add_argument("--upstream", default="https://api.openai.com/v1", help="real API for record mode")
+    parser.add_argument("--replay-fallback", action="store_true", help="answer unknown prompts with canned responses")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    if args.mode in ("record", "replay") and not args.cassette:
+        parser.error(f"--mode {args.mode} needs --cassette")
+    LatencyModel(args.latency)  # validate early
+    return args
+
+def main():
+    import uvicorn
+
+    args = parse_args()
+    uvicorn.run(create_app(args), host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+"""
+End-to-end load test for the HTTP API and the WebSocket fan-out.
+
+Seeds the configured Postgres/PostGIS database, starts the API under
+uvicorn (or targets an already running one with --base-url) and measures:
+
+  endpoints  throughput and p50/p95/p99 latency for creating and listing
+             damage reports, tasks and resources at a fixed concurrency
+  fanout     latency from POST /damage-reports/ to delivery of the
+             broadcast on each of --ws-clients WebSocket connections
+  memory     server RSS growth per open WebSocket connection (only when
+             the server was started here, since it reads /proc/<pid>)
+
+Results are written as JSON tagged with the git commit, so two runs can be
+compared with --compare:
+
+    python benchmarks/load_test.py --json results/$(git rev-parse --short HEAD).json
+    python benchmarks/load_test.py --compare results/before.json results/after.json
+
+The agents are not started, and the seed only adds rows, so point it at
+a disposable database.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Callable, List, Optional
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+import httpx
+
+# Everything lands near New York so the rows look like one incident area
+CENTER = (40.7128, -74.0060)
+
+SEED_SQL = """
+INSERT INTO disaster_events (name, event_type, severity, status, description, location)
+SELECT 'Load test disaster ' || g, 'earthquake', 7, 'active', 'seeded by benchmarks/load_test.py',
+       ST_SetSRID(ST_MakePoint(:lng + random() * 0.1, :lat + random() * 0.1), 4326)::geography
+FROM generate_series(1, :disasters) g;
+
+INSERT INTO damage_reports (disaster_id, damage_type, severity, description, source, confidence, verified, location)
+SELECT (SELECT min(id) FROM disaster_events WHERE description = 'seeded by benchmarks/load_test.py'),
+       (ARRAY['structural_damage','flooding','fire','debris','power_outage'])[1 + g % 5],
+       1 + g % 10, 'seeded report ' || g, (ARRAY['social_media','field_team','sensor'])[1 + g % 3],
+       random(), g % 4 = 0,
+       ST_SetSRID(ST_MakePoint(:lng + random() * 0.2 - 0.1, :lat + random() * 0.2 - 0.1), 4326)::geography
+FROM generate_series(1, :reports) g;
+
+INSERT INTO resources (name, resource_type, status, capacity, current_load, location)
+SELECT 'Seeded unit ' || g, (ARRAY['ambulance','fire_truck','rescue_team','supply_truck'])[1 + g % 4],
+       CASE WHEN g % 3 = 0 THEN 'deployed' ELSE 'available' END, 10, 0,
+       ST_SetSRID(ST_MakePoint(:lng + random() * 0.2 - 0.1, :lat + random() * 0.2 - 0.1), 4326)::geography
+FROM generate_series(1, :resources) g;
+
+INSERT INTO tasks (disaster_id, title, description, task_type, priority, status, estimated_duration, location)
+SELECT (SELECT min(id) FROM disaster_events WHERE description = 'seeded by benchmarks/load_test.py'),
+       'Seeded task ' || g, 'seeded', (ARRAY['rescue','medical','evacuation','supply'])[1 + g % 4],
+       1 + g % 5, (ARRAY['pending','in_progress','completed'])[1 + g % 3], 60,
+       ST_SetSRID(ST_MakePoint(:lng + random() * 0.2 - 0.1, :lat + random() * 0.2 - 0.1), 4326)::geography
+FROM generate_series(1, :tasks) g;
+"""
+
+def seed_database(disasters: int, reports: int, resources: int, tasks: int):
+    """Bulk insert seed rows server-side, group the reports into incidents and rebuild the summary tables"""
+    from sqlalchemy import text
+
+    from app.core.database import SessionLocal
+    from app.core.partitions import ensure_default_partition
+    from app.crud import disaster as crud
+
+    db = SessionLocal()
+    try:
+        ensure_default_partition(db.connection())
+        params = {"disasters": disasters, "reports": reports, "resources": resources, "tasks": tasks,
+                  "lat": CENTER[0], "lng": CENTER[1]}
+        for statement in SEED_SQL.split(";\n"):
+            if statement.strip():
+                db.execute(text(statement), params)
+        db.commit()
+        crud.backfill_incidents(db)
+        crud.rebuild_disaster_summaries(db)
+    finally:
+        db.close()
+
+def percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[rank]
+
+def latency_stats(samples: List[float]) -> dict:
+    """Milliseconds from a list of seconds"""
+    return {
+        "p50_ms": percentile(samples, 50) * 1000,
+        "p95_ms": percentile(samples, 95) * 1000,
+        "p99_ms": percentile(samples, 99) * 1000,
+        "mean_ms": statistics.fmean(samples) * 1000 if samples else 0.0,
+        "max_ms": max(samples) * 1000 if samples else 0.0,
+    }
+
+def jitter(value: float, spread: float = 0.1) -> float:
+    return value + random.uniform(-spread, spread)
+
+def report_body(disaster_id: int) -> dict:
+    return {
+        "disaster_id": disaster_id, "latitude": jitter(CENTER[0]), "longitude": jitter(CENTER[1]),
+        "damage_type": random.choice(["structural_damage", "flooding", "fire", "debris"]),
+        "severity": random.randint(1, 10), "description": "load test report",
+        "source": "field_team", "confidence": round(random.random(), 2), "verified": False,
+    }
+
+def task_body(disaster_id: int) -> dict:
+    return {
+        "disaster_id": disaster_id, "latitude": jitter(CENTER[0]), "longitude": jitter(CENTER[1]),
+        "title": "Load test task", "description": "load test", "task_type": "rescue",
+        "priority": random.randint(1, 5), "estimated_duration": 60,
+    }
+
+def resource_body(_disaster_id: int) -> dict:
+    return {
+        "name": "Load test unit", "resource_type": "ambulance", "capacity": 4,
+        "latitude": jitter(CENTER[0]), "longitude": jitter(CENTER[1]),
+    }
+
+ENDPOINTS = [
+    ("create_damage_report", "POST", "/damage-reports/", report_body),
+    ("list_damage_reports", "GET", "/damage-reports/?limit=100", None),
+    ("list_damage_reports_recent", "GET", "/damage-reports/?disaster_id={disaster_id}&limit=100", None),
+    ("list_incidents", "GET", "/incidents/?disaster_id={disaster_id}&limit=100", None),
+    ("create_task", "POST", "/tasks/", task_body),
+    ("list_tasks", "GET", "/tasks/?limit=100", None),
+    ("list_pending_tasks", "GET", "/tasks/?status=pending&limit=100", None),
+    ("create_resource", "POST", "/resources/", resource_body),
+    ("list_resources", "GET", "/resources/?limit=100", None),
+    ("list_available_resources", "GET", "/resources/?status=available&limit=100", None),
+]
+
+async def bench_endpoint(client: httpx.AsyncClient, method: str, path: str, body: Optional[Callable],
+                         disaster_id: int, requests: int, concurrency: int) -> dict:
+    """Issue `requests` calls with `concurrency` in flight; latency per call"""
+    path = path.format(disaster_id=disaster_id)
+    latencies: List[float] = []
+    errors = 0
+    remaining = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            payload = body(disaster_id) if body else None
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, path, json=payload)
+                ok = response.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            latencies.append(time.perf_counter() - started)
+            if not ok:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {"requests": requests, "errors": errors, "seconds": elapsed,
+            "throughput_rps": requests / elapsed if elapsed else 0.0, **latency_stats(latencies)}
+
+def read_rss_bytes(pid: int) -> Optional[int]:
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+async def bench_fanout(base_url: str, disaster_id: int, clients: int, messages: int,
+                       server_pid: Optional[int]) -> dict:
+    """Open `clients` WebSockets, post reports and time each broadcast delivery"""
+    import websockets
+
+    ws_url = base_url.replace("http", "ws", 1) + "/ws"
+    rss_before = read_rss_bytes(server_pid) if server_pid else None
+    connections = []
+    for start in range(0, clients, 100):
+        batch = await asyncio.gather(*(websockets.connect(ws_url, max_queue=None)
+                                       for _ in range(start, min(clients, start + 100))))
+        connections.extend(batch)
+    await asyncio.sleep(1.0)
+    rss_after = read_rss_bytes(server_pid) if server_pid else None
+
+    delivery: List[float] = []
+    completion: List[float] = []
+    missed = 0
+    try:
+        async with httpx.AsyncClient(base_url=base_url, timeout=30) as client:
+            for _ in range(messages):
+                # Only this loop creates reports during the test, so the next
+                # damage_report event on every socket is the one just posted
+                async def next_report(ws):
+                    while True:
+                        event = json.loads(await ws.recv())
+                        if event.get("type") == "damage_report":
+                            return time.perf_counter(), event["data"]["id"]
+
+                waiters = [asyncio.create_task(next_report(ws)) for ws in connections]
+                sent = time.perf_counter()
+                response = await client.post("/damage-reports/", json=report_body(disaster_id))
+                response.raise_for_status()
+                report_id = response.json()["id"]
+                done, pending = await asyncio.wait(waiters, timeout=30)
+                for task in pending:
+                    task.cancel()
+                arrivals = [arrived - sent for arrived, event_id in (task.result() for task in done)
+                            if event_id == report_id]
+                missed += clients - len(arrivals)
+                delivery.extend(arrivals)
+                if arrivals:
+                    completion.append(max(arrivals))
+    finally:
+        await asyncio.gather(*(ws.close() for ws in connections), return_exceptions=True)
+
+    result = {"clients": clients, "messages": messages, "missed_deliveries": missed,
+              "delivery": latency_stats(delivery), "last_client": latency_stats(completion)}
+    if rss_before is not None and rss_after is not None and clients:
+        result["server_rss_bytes_per_connection"] = (rss_after - rss_before) / clients
+    return result
+
+def start_server(port: int) -> subprocess.Popen:
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health").status_code == 200:
+                return process
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("API server did not become healthy within 30s")
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=BACKEND_DIR, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+async def run(args) -> dict:
+    server = None
+    server_pid = None
+    base_url = args.base_url
+    if base_url is None:
+        server = start_server(args.port)
+        server_pid = server.pid
+        base_url = f"http://127.0.0.1:{args.port}"
+    api_url = base_url + "/api/v1"
+
+    try:
+        async with httpx.AsyncClient(base_url=api_url, timeout=30,
+                                     limits=httpx.Limits(max_connections=args.concurrency)) as client:
+            response = await client.post("/disasters/", json={
+                "name": "Load test", "event_type": "earthquake", "severity": 7,
+                "latitude": CENTER[0], "longitude": CENTER[1]})
+            response.raise_for_status()
+            disaster_id = response.json()["id"]
+
+            endpoints = {}
+            for name, method, path, body in ENDPOINTS:
+                if args.endpoints and name not in args.endpoints:
+                    continue
+                await bench_endpoint(client, method, path, body, disaster_id, args.warmup, args.concurrency)
+                endpoints[name] = await bench_endpoint(client, method, path, body, disaster_id,
+                                                       args.requests, args.concurrency)
+                result = endpoints[name]
+                print(f"{name:<28} {result['throughput_rps']:>8.1f} rps  p50 {result['p50_ms']:>7.1f} ms  "
+                      f"p95 {result['p95_ms']:>7.1f} ms  p99 {result['p99_ms']:>7.1f} ms  errors {result['errors']}")
+
+        fanout = None
+        if args.ws_clients:
+            fanout = await bench_fanout(api_url, disaster_id, args.ws_clients, args.ws_messages, server_pid)
+            print(f"{'ws_fanout':<28} {fanout['clients']} clients  p50 {fanout['delivery']['p50_ms']:.1f} ms  "
+                  f"p99 {fanout['delivery']['p99_ms']:.1f} ms  last client p50 "
+                  f"{fanout['last_client']['p50_ms']:.1f} ms  missed {fanout['missed_deliveries']}")
+            if "server_rss_bytes_per_connection" in fanout:
+                print(f"{'ws_memory':<28} {fanout['server_rss_bytes_per_connection'] / 1024:.1f} KiB per connection")
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=10)
+
+    return {
+        "benchmark": "load_test",
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "config": {"requests": args.requests, "concurrency": args.concurrency, "ws_clients": args.ws_clients,
+                   "ws_messages": args.ws_messages, "seed": None if args.skip_seed else args.seed},
+        "endpoints": endpoints,
+        "ws_fanout": fanout,
+    }
+
+def compare(before_path: str, after_path: str):
+    """Print per-endpoint deltas between two result files"""
+    with open(before_path) as f:
+        before = json.load(f)
+    with open(after_path) as f:
+        after = json.load(f)
+    print(f"{(before.get('commit') or '?')[:10]} -> {(after.get('commit') or '?')[:10]}")
+    print(f"{'endpoint':<28} {'rps':>18} {'p95 ms':>20} {'p99 ms':>20}")
+
+    def delta(old, new):
+        change = (new - old) / old * 100 if old else 0.0
+        return f"{old:>7.1f}->{new:<7.1f}{change:+5.0f}%"
+
+    for name, new in after["endpoints"].items():
+        old = before["endpoints"].get(name)
+        if old is None:
+            continue
+        print(f"{name:<28} {delta(old['throughput_rps'], new['throughput_rps'])} "
+              f"{delta(old['p95_ms'], new['p95_ms'])} {delta(old['p99_ms'], new['p99_ms'])}")
+    if before.get("ws_fanout") and after.get("ws_fanout"):
+        old, new = before["ws_fanout"]["delivery"], after["ws_fanout"]["delivery"]
+        print(f"{'ws_fanout delivery':<28} {'':>18} {delta(old['p95_ms'], new['p95_ms'])} "
+              f"{delta(old['p99_ms'], new['p99_ms'])}")
+
+def main():
+    parser = argparse.ArgumentParser(description="API and WebSocket load test")
+    parser.add_argument("--base-url", help="target a running server instead of starting one, e.g. http://localhost:8000")
+    parser.add_argument("--port", type=int, default=8765, help="port for the server started by the benchmark")
+    parser.add_argument("--seed", type=int, nargs=4, default=[3, 100000, 2000, 20000],
+                        metavar=("DISASTERS", "REPORTS", "RESOURCES", "TASKS"), help="rows to seed before the run")
+    parser.add_argument("--skip-seed", action="store_true", help="use the data already in the database")
+    parser.add_argument("--requests", type=int, default=2000, help="measured requests per endpoint")
+    parser.add_argument("--warmup", type=int, default=100, help="unmeasured requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=32, help="requests in flight")
+    parser.add_argument("--endpoints", nargs="+", choices=[name for name, *_ in ENDPOINTS])
+    parser.add_argument("--ws-clients", type=int, default=1000, help="WebSocket clients for the fan-out test (0 skips it)")
+    parser.add_argument("--ws-messages", type=int, default=20, help="broadcasts to time in the fan-out test")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="compare two result files and exit")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    random.seed(0)
+    if not args.skip_seed:
+        print(f"Seeding {args.seed[1]} reports, {args.seed[2]} resources, {args.seed[3]} tasks...")
+        seed_database(*args.seed)
+
+    results = asyncio.run(run(args))
+    if args.json:
+        os.makedirs(os.path.dirname(os.path.abspath(args.json)), exist_ok=True)
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+from contextlib import contextmanager
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.database import engine
+from app.core.sql_profiler import instrument_engine, profile_queries
+from app.main import app
+
+@pytest.fixture
+def client():
+    """The API app, without running its startup (no database needed until a request queries one)"""
+    return TestClient(app)
+
+@pytest.fixture
+def query_budget():
+    """Fail a test when a block runs more SQL than allowed.
+
+        def test_list_tasks(client, query_budget):
+            with query_budget(2):
+                client.get("/api/v1/tasks/")
+
+    Pass n_plus_one=k to also fail when any statement shape repeats k times.
+    Opt-in: only tests that request the fixture are profiled, and budgets
+    on endpoints that query need the database to be up.
+    """
+    instrument_engine(engine)
+
+    @contextmanager
+    def budget(max_statements: int, n_plus_one: int = None):
+        with profile_queries("query_budget", all_threads=True) as profile:
+            yield profile
+        shapes = profile.summary(n_plus_one or profile.total_count + 1)
+        assert profile.total_count <= max_statements, (
+            f"{profile.total_count} SQL statements, budget is {max_statements}: {shapes['shapes']}"
+        )
+        if n_plus_one:
+            assert not shapes["n_plus_one"], f"Probable N+1 queries: {shapes['n_plus_one']}"
+
+    return budget
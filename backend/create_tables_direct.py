@@ -7,7 +7,9 @@ import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from app.core.database import engine
+from app.core.partitions import run_partition_maintenance
 from app.models.disaster import Base
+from app.models import events, jobs  # registers broadcast_events and agent_jobs on Base.metadata
 
 def create_tables():
     """Create all database tables"""
@@ -15,6 +17,10 @@ def create_tables():
         print("Creating database tables...")
         Base.metadata.create_all(bind=engine)
         print("✅ All tables created successfully!")
+
+        # damage_reports is partitioned and needs its partitions created too
+        result = run_partition_maintenance(engine)
+        print(f"🗂️ Created damage_reports partitions: {result['created']}")
         
         # Verify tables were created
         from sqlalchemy import inspect
@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+Generate a synthetic city-scale disaster scenario for load and scaling tests.
+
+Disasters get epicentres scattered around --center; each has a handful of
+hotspots, and damage reports are drawn around those hotspots with
+severity falling off with distance. Report arrival follows a surge that
+peaks a few hours after each disaster's onset and then decays, modulated
+by a day/night cycle. Resources are spread over the whole area and tasks
+sit on the hotspots.
+
+Rows are bulk-loaded with COPY in chunks, so 10M reports never sit in
+memory at once. With --posts-out the scenario is also written as a
+time-ordered JSONL stream of social media posts, one object per line:
+
+    {"offset_seconds": 12.4, "created_at": "...", "text": "...", "latitude": ...,
+     "longitude": ..., "disaster_id": 7, "damage_type": "...", "severity": 6}
+
+The text/latitude/longitude/disaster_id fields match the analyze_post job
+payload, so a stream can be fed to the agent job queue.
+
+    python generate_scenario.py --disasters 3 --reports 1000000 --resources 10000
+    python generate_scenario.py --reports 0 --resources 0 --posts 50000 --posts-out posts.jsonl --no-load
+"""
+import argparse
+import io
+import json
+import math
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+KM_PER_DEGREE = 111.32
+DISASTER_TYPES = {
+    # event type: (damage types, their weights)
+    "earthquake": (["structural_damage", "debris", "road_closure", "fire", "power_outage"], [0.45, 0.2, 0.15, 0.1, 0.1]),
+    "flood": (["flooding", "power_outage", "road_closure", "structural_damage"], [0.55, 0.2, 0.15, 0.1]),
+    "hurricane": (["flooding", "power_outage", "debris", "structural_damage", "road_closure"], [0.3, 0.25, 0.2, 0.15, 0.1]),
+    "fire": (["fire", "road_closure", "structural_damage", "power_outage"], [0.6, 0.15, 0.15, 0.1]),
+}
+SOURCES = ["social_media", "field_team", "drone", "sensor"]
+SOURCE_WEIGHTS = [0.6, 0.2, 0.1, 0.1]
+RESOURCE_TYPES = ["personnel", "medical", "equipment", "vehicle"]
+TASK_TYPES = {
+    "structural_damage": "rescue", "debris": "logistics", "road_closure": "logistics",
+    "fire": "rescue", "power_outage": "logistics", "flooding": "evacuation",
+}
+STREETS = ["Main Street", "Broadway", "Canal Street", "Park Avenue", "Houston Street", "Fulton Street",
+           "Water Street", "Church Street", "Market Street", "5th Avenue", "Harbor Road", "Highway 101"]
+POST_TEMPLATES = {
+    "structural_damage": ["Building collapsed on {street}! People trapped inside!",
+                          "Huge cracks in the walls on {street}, roof caved in",
+                          "Apartment block on {street} partially collapsed #earthquake"],
+    "debris": ["Debris everywhere on {street}, can't get through", "Rubble blocking {street} after the shaking"],
+    "road_closure": ["{street} is closed, emergency vehicles only", "Road on {street} is cracked and impassable"],
+    "fire": ["Fire spreading near {street}! Smoke everywhere", "Gas leak fire on {street}, evacuations ordered"],
+    "power_outage": ["Power lines down on {street}, no electricity for blocks",
+                     "Whole neighbourhood around {street} is dark"],
+    "flooding": ["Water rising fast on {street}. Cars floating away #flood",
+                 "Basements flooded all along {street}, water knee deep"],
+}
+NOISE_POSTS = ["Beautiful sunset at the beach today! #vacation", "Great coffee on {street} this morning",
+               "Traffic on {street} is terrible as usual", "Anyone know a good pizza place near {street}?"]
+
+class Scenario:
+    """Disasters, their hotspots and arrival-rate curves; reports are sampled from it"""
+
+    def __init__(self, args, rng: np.random.Generator):
+        self.rng = rng
+        self.start = args.start
+        self.minutes = int(args.duration_hours * 60)
+        center_lat, center_lng = args.center
+        self.disasters = []
+        for i in range(args.disasters):
+            event_type = rng.choice(list(DISASTER_TYPES))
+            lat, lng = offset_km(center_lat, center_lng, *rng.normal(0, args.radius_km / 2, 2))
+            hotspots = []
+            for _ in range(int(rng.integers(3, 9))):
+                spread = rng.uniform(0.5, args.radius_km / 4)
+                h_lat, h_lng = offset_km(lat, lng, *rng.normal(0, spread, 2))
+                hotspots.append((h_lat, h_lng, rng.uniform(0.3, args.cluster_km), rng.pareto(1.5) + 1))
+            weights = np.array([h[3] for h in hotspots])
+            onset = int(rng.uniform(0, self.minutes * 0.5)) if i else 0
+            self.disasters.append({
+                "name": f"Scenario {event_type} {i + 1}",
+                "event_type": event_type,
+                "severity": int(rng.integers(5, 11)),
+                "latitude": lat,
+                "longitude": lng,
+                "hotspots": np.array([h[:3] for h in hotspots]),
+                "hotspot_weights": weights / weights.sum(),
+                "onset": onset,
+                "weight": rng.uniform(0.5, 2.0),
+                "arrival_cdf": arrival_cdf(self.minutes, onset, args.peak_hours * 60),
+            })
+        weights = np.array([d["weight"] for d in self.disasters])
+        self.disaster_weights = weights / weights.sum()
+
+    def sample_reports(self, n: int) -> dict:
+        """n reports as column arrays"""
+        rng = self.rng
+        which = rng.choice(len(self.disasters), size=n, p=self.disaster_weights)
+        lat = np.empty(n)
+        lng = np.empty(n)
+        severity = np.empty(n, dtype=np.int64)
+        minute = np.empty(n)
+        damage_type = np.empty(n, dtype=object)
+        for index, disaster in enumerate(self.disasters):
+            mask = which == index
+            count = int(mask.sum())
+            if not count:
+                continue
+            spots = disaster["hotspots"][rng.choice(len(disaster["hotspots"]), size=count, p=disaster["hotspot_weights"])]
+            sigma = spots[:, 2]
+            dy, dx = rng.normal(0, 1, (2, count)) * sigma
+            lat[mask], lng[mask] = offset_km(spots[:, 0], spots[:, 1], dy, dx)
+            distance = np.hypot(dx, dy)
+            base = disaster["severity"] * np.exp(-distance / (3 * sigma))
+            severity[mask] = np.clip(np.rint(base + rng.normal(0, 1.2, count)), 1, 10)
+            minute[mask] = np.searchsorted(disaster["arrival_cdf"], rng.random(count)) + rng.random(count)
+            types, weights = DISASTER_TYPES[disaster["event_type"]]
+            damage_type[mask] = rng.choice(types, size=count, p=weights)
+        source = rng.choice(SOURCES, size=n, p=SOURCE_WEIGHTS)
+        confidence = np.where(source == "social_media", rng.uniform(0.3, 0.9, n), rng.uniform(0.7, 1.0, n))
+        verified = (source == "field_team") | (rng.random(n) < 0.05)
+        return {"disaster": which, "latitude": lat, "longitude": lng, "severity": severity,
+                "minute": np.minimum(minute, self.minutes - 1e-6), "damage_type": damage_type,
+                "source": source, "confidence": confidence, "verified": verified}
+
+def offset_km(lat, lng, north_km, east_km):
+    """Move a point by a distance in km (equirectangular, fine at city scale)"""
+    new_lat = lat + north_km / KM_PER_DEGREE
+    new_lng = lng + east_km / (KM_PER_DEGREE * np.cos(np.radians(lat)))
+    return new_lat, new_lng
+
+def arrival_cdf(minutes: int, onset: int, peak_minutes: float) -> np.ndarray:
+    """CDF over minutes of a surge peaking `peak_minutes` after onset, times a day/night cycle"""
+    t = np.arange(minutes, dtype=float) - onset
+    since_onset = np.clip(t, 0, None)
+    surge = np.where(t >= 0, (since_onset + 1) * np.exp(-since_onset / peak_minutes), 0.0)
+    diurnal = 1 + 0.4 * np.sin(2 * math.pi * (np.arange(minutes) / 1440 - 0.25))
+    rate = surge * diurnal
+    cdf = np.cumsum(rate)
+    return cdf / cdf[-1]
+
+def ewkt(lat, lng) -> str:
+    return f"SRID=4326;POINT({lng:.6f} {lat:.6f})"
+
+def copy_rows(raw, table: str, columns: list, lines: list):
+    buffer = io.StringIO("\n".join(lines) + "\n")
+    cursor = raw.cursor()
+    cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", buffer)
+    cursor.close()
+
+def copy_text(value: str) -> str:
+    """Escape for COPY text format"""
+    return value.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n")
+
+def load_disasters(raw, scenario: Scenario) -> list:
+    cursor = raw.cursor()
+    ids = []
+    for disaster in scenario.disasters:
+        cursor.execute(
+            "INSERT INTO disaster_events (name, event_type, location, severity, status, description, created_at) "
+            "VALUES (%s, %s, ST_GeogFromText(%s), %s, 'active', %s, %s) RETURNING id",
+            (disaster["name"], disaster["event_type"], ewkt(disaster["latitude"], disaster["longitude"]),
+             disaster["severity"], "Synthetic scenario (generate_scenario.py)",
+             scenario.start + timedelta(minutes=disaster["onset"])),
+        )
+        ids.append(cursor.fetchone()[0])
+    cursor.close()
+    return ids
+
+def load_reports(raw, scenario: Scenario, disaster_ids: list, total: int, chunk_size: int):
+    columns = ["disaster_id", "location", "damage_type", "severity", "description", "source",
+               "confidence", "verified", "created_at"]
+    start = scenario.start
+    loaded = 0
+    while loaded < total:
+        n = min(chunk_size, total - loaded)
+        batch = scenario.sample_reports(n)
+        lines = []
+        for i in range(n):
+            created_at = start + timedelta(minutes=float(batch["minute"][i]))
+            lines.append("\t".join((
+                str(disaster_ids[batch["disaster"][i]]),
+                ewkt(batch["latitude"][i], batch["longitude"][i]),
+                batch["damage_type"][i],
+                str(batch["severity"][i]),
+                f"Synthetic {batch['damage_type'][i].replace('_', ' ')} report",
+                batch["source"][i],
+                f"{batch['confidence'][i]:.3f}",
+                "t" if batch["verified"][i] else "f",
+                created_at.isoformat(),
+            )))
+        copy_rows(raw, "damage_reports", columns, lines)
+        raw.commit()
+        loaded += n
+        print(f"  damage_reports: {loaded}/{total}")
+
+def load_resources(raw, scenario: Scenario, total: int, radius_km: float, center):
+    rng = scenario.rng
+    lat, lng = offset_km(center[0], center[1], *rng.normal(0, radius_km / 2, (2, total)))
+    types = rng.choice(RESOURCE_TYPES, size=total)
+    status = rng.choice(["available", "deployed", "maintenance"], size=total, p=[0.75, 0.2, 0.05])
+    capacity = rng.integers(2, 30, size=total)
+    lines = [
+        "\t".join((f"{types[i].title()} unit {i + 1}", types[i], ewkt(lat[i], lng[i]), status[i],
+                   str(capacity[i]), "0" if status[i] == "available" else str(rng.integers(1, capacity[i] + 1)),
+                   scenario.start.isoformat()))
+        for i in range(total)
+    ]
+    copy_rows(raw, "resources", ["name", "resource_type", "location", "status", "capacity", "current_load",
+                                 "created_at"], lines)
+    raw.commit()
+    print(f"  resources: {total}")
+
+def load_tasks(raw, scenario: Scenario, disaster_ids: list, total: int):
+    batch = scenario.sample_reports(total)
+    status = scenario.rng.choice(["pending", "assigned", "in_progress", "completed"], size=total,
+                                 p=[0.5, 0.2, 0.2, 0.1])
+    lines = []
+    for i in range(total):
+        damage_type = batch["damage_type"][i]
+        priority = int(np.clip(math.ceil(batch["severity"][i] / 2), 1, 5))
+        created_at = scenario.start + timedelta(minutes=float(batch["minute"][i]))
+        lines.append("\t".join((
+            str(disaster_ids[batch["disaster"][i]]),
+            copy_text(f"{TASK_TYPES[damage_type].title()} - {damage_type.replace('_', ' ')} zone {i + 1}"),
+            f"Respond to {damage_type.replace('_', ' ')}. Severity: {batch['severity'][i]}",
+            TASK_TYPES[damage_type],
+            str(priority),
+            status[i],
+            ewkt(batch["latitude"][i], batch["longitude"][i]),
+            str(int(scenario.rng.integers(30, 360))),
+            created_at.isoformat(),
+        )))
+    copy_rows(raw, "tasks", ["disaster_id", "title", "description", "task_type", "priority", "status",
+                             "location", "estimated_duration", "created_at"], lines)
+    raw.commit()
+    print(f"  tasks: {total}")
+
+def write_posts(path: str, scenario: Scenario, disaster_ids: list, total: int, noise: float):
+    """Time-ordered JSONL stream of social media posts drawn from the same scenario"""
+    rng = scenario.rng
+    batch = scenario.sample_reports(total)
+    order = np.argsort(batch["minute"])
+    is_noise = rng.random(total) < noise
+    with open(path, "w") as f:
+        for i in order:
+            street = STREETS[int(rng.integers(len(STREETS)))]
+            if is_noise[i]:
+                text = NOISE_POSTS[int(rng.integers(len(NOISE_POSTS)))].format(street=street)
+            else:
+                templates = POST_TEMPLATES[batch["damage_type"][i]]
+                text = templates[int(rng.integers(len(templates)))].format(street=street)
+            offset = float(batch["minute"][i]) * 60
+            f.write(json.dumps({
+                "offset_seconds": round(offset, 3),
+                "created_at": (scenario.start + timedelta(seconds=offset)).isoformat(),
+                "text": text,
+                "latitude": round(float(batch["latitude"][i]), 6),
+                "longitude": round(float(batch["longitude"][i]), 6),
+                "disaster_id": disaster_ids[batch["disaster"][i]],
+                "damage_type": None if is_noise[i] else batch["damage_type"][i],
+                "severity": None if is_noise[i] else int(batch["severity"][i]),
+            }) + "\n")
+    print(f"  posts: {total} -> {path}")
+
+def parse_point(value: str):
+    lat, lng = (float(v) for v in value.split(","))
+    return lat, lng
+
+def main():
+    parser = argparse.ArgumentParser(description="Synthetic disaster scenario generator")
+    parser.add_argument("--disasters", type=int, default=3)
+    parser.add_argument("--reports", type=int, default=100000, help="damage reports to load")
+    parser.add_argument("--resources", type=int, default=10000)
+    parser.add_argument("--tasks", type=int, help="tasks to load (default: one per 100 reports)")
+    parser.add_argument("--center", type=parse_point, default=(40.7128, -74.0060), help="LAT,LNG of the city")
+    parser.add_argument("--radius-km", type=float, default=15.0, help="spread of epicentres and resources")
+    parser.add_argument("--cluster-km", type=float, default=1.5, help="max spread of reports around a hotspot")
+    parser.add_argument("--duration-hours", type=float, default=48.0, help="time span of report arrivals")
+    parser.add_argument("--peak-hours", type=float, default=6.0, help="hours from onset to peak arrival rate")
+    parser.add_argument("--start", type=datetime.fromisoformat,
+                        help="scenario start (ISO 8601, default: now minus the duration)")
+    parser.add_argument("--chunk-size", type=int, default=200000, help="rows per COPY")
+    parser.add_argument("--posts", type=int, default=0, help="posts to write to --posts-out")
+    parser.add_argument("--posts-out", help="JSONL file for the replayable post stream")
+    parser.add_argument("--noise", type=float, default=0.2, help="fraction of posts unrelated to the disaster")
+    parser.add_argument("--no-load", action="store_true", help="don't touch the database (posts only)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    if args.start is None:
+        args.start = datetime.now(timezone.utc) - timedelta(hours=args.duration_hours)
+    elif args.start.tzinfo is None:
+        args.start = args.start.replace(tzinfo=timezone.utc)
+    if args.tasks is None:
+        args.tasks = max(1, args.reports // 100)
+    if args.posts and not args.posts_out:
+        parser.error("--posts needs --posts-out")
+
+    rng = np.random.default_rng(args.seed)
+    scenario = Scenario(args, rng)
+    print(f"🌍 Scenario: {len(scenario.disasters)} disasters starting {args.start.isoformat()}")
+
+    if args.no_load:
+        # Disaster ids are 1-based positions when nothing is loaded
+        disaster_ids = list(range(1, len(scenario.disasters) + 1))
+    else:
+        from app.core.database import SessionLocal, engine
+        from app.core.partitions import ensure_default_partition, ensure_partitions
+        from app.crud.disaster import backfill_incidents, rebuild_disaster_summaries
+
+        end = args.start + timedelta(hours=args.duration_hours)
+        with engine.begin() as conn:
+            ensure_default_partition(conn)
+            ensure_partitions(conn, args.start.date(), end.date())
+
+        raw = engine.raw_connection()
+        try:
+            disaster_ids = load_disasters(raw, scenario)
+            raw.commit()
+            print(f"  disaster_events: {disaster_ids}")
+            load_reports(raw, scenario, disaster_ids, args.reports, args.chunk_size)
+            if args.resources:
+                load_resources(raw, scenario, args.resources, args.radius_km, args.center)
+            if args.tasks:
+                load_tasks(raw, scenario, disaster_ids, args.tasks)
+            cursor = raw.cursor()
+            cursor.execute("ANALYZE damage_reports; ANALYZE resources; ANALYZE tasks")
+            cursor.close()
+            raw.commit()
+        finally:
+            raw.close()
+
+        db = SessionLocal()
+        try:
+            # COPY bypasses the ingest merge; group the reports into incidents
+            print(f"  incidents: {backfill_incidents(db)} reports linked")
+            rebuild_disaster_summaries(db)
+        finally:
+            db.close()
+
+    if args.posts:
+        write_posts(args.posts_out, scenario, disaster_ids, args.posts, args.noise)
+    print("✅ Scenario ready")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Bulk import damage reports from CSV or JSONL, or replay them live.
+
+By default rows are validated and loaded straight into the database in
+chunks (see app.core.bulk_import), for backfills from partner agencies:
+
+    python import_reports.py partner_reports.csv
+    python import_reports.py drill.jsonl --chunk-size 100000
+
+With --replay the rows are instead POSTed one by one to a running API's
+/damage-reports/, spaced by their original created_at gaps divided by
+--speed, so they go through admission control, incident merging, the
+heat map and WebSocket broadcasts like live reports (stamped with the
+time they are sent). Rows should be in created_at order; rows without it
+are sent right after the previous one.
+
+    python import_reports.py drill.jsonl --replay --speed 60
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from collections import Counter
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import httpx
+
+from app.core.bulk_import import IMPORT_FORMATS, RowError, parse_report, read_records
+
+def detect_format(path: str) -> str:
+    return "csv" if path.lower().endswith(".csv") else "jsonl"
+
+def bulk_load(args):
+    from app.core.database import engine
+    from app.core.bulk_import import import_reports
+
+    started = time.perf_counter()
+    with open(args.path, newline="", encoding="utf-8-sig") as stream:
+        result = import_reports(engine, stream, args.format, chunk_size=args.chunk_size)
+    elapsed = time.perf_counter() - started
+    print(f"📥 {result['imported']}/{result['rows']} rows imported in {elapsed:.1f}s "
+          f"({result['imported'] / max(elapsed, 1e-9):.0f} rows/s), {result['rejected']} rejected")
+    for error in result["errors"]:
+        print(f"  line {error['line']}: {error['error']}")
+
+async def replay(args):
+    statuses = Counter()
+    rejected = 0
+    lateness = []
+    semaphore = asyncio.Semaphore(args.concurrency)
+    in_flight = set()
+
+    async def send(client, report):
+        try:
+            response = await client.post(f"{args.base_url}/damage-reports/", json=report)
+            statuses[response.status_code] += 1
+        except httpx.HTTPError as e:
+            statuses[type(e).__name__] += 1
+
+    def finished(task):
+        in_flight.discard(task)
+        semaphore.release()
+
+    async with httpx.AsyncClient(timeout=30, limits=httpx.Limits(max_connections=args.concurrency)) as client:
+        with open(args.path, newline="", encoding="utf-8-sig") as stream:
+            start = time.monotonic()
+            first_at = None
+            offset = 0.0
+            for line, record in read_records(stream, args.format):
+                try:
+                    if isinstance(record, RowError):
+                        raise record
+                    report = parse_report(record)
+                except RowError as e:
+                    rejected += 1
+                    print(f"  line {line}: {e}")
+                    continue
+                created_at = report.pop("created_at")
+                if created_at is not None:
+                    first_at = first_at or created_at
+                    # Out-of-order rows are sent as soon as they are reached
+                    offset = max(offset, (created_at - first_at).total_seconds() / args.speed)
+                delay = start + offset - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                # Wait for a free slot before creating the task, so a slow API
+                # holds back reading rather than piling up pending sends
+                await semaphore.acquire()
+                behind = time.monotonic() - (start + offset)
+                if behind > 0:
+                    lateness.append(behind)
+                task = asyncio.create_task(send(client, report))
+                in_flight.add(task)
+                task.add_done_callback(finished)
+            if in_flight:
+                await asyncio.wait(in_flight)
+
+    sent = sum(statuses.values())
+    elapsed = time.monotonic() - start
+    print(f"🔁 Replayed {sent} reports in {elapsed:.1f}s at {args.speed:g}x, {rejected} rejected")
+    print(f"  responses: {dict(statuses)}")
+    if lateness:
+        lateness.sort()
+        print(f"  behind schedule: {len(lateness)} sends, p50 {lateness[len(lateness) // 2]:.3f}s, "
+              f"max {lateness[-1]:.3f}s")
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import or replay of damage reports")
+    parser.add_argument("path", help="CSV (with header) or JSONL file of damage reports")
+    parser.add_argument("--format", choices=IMPORT_FORMATS, help="default: from the file extension")
+    parser.add_argument("--chunk-size", type=int, help="rows per COPY/INSERT chunk")
+    parser.add_argument("--replay", action="store_true", help="POST rows to the API on their original timing")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed-up over the original timing")
+    parser.add_argument("--concurrency", type=int, default=32, help="replay requests in flight")
+    parser.add_argument("--base-url", default="http://localhost:8000/api/v1")
+    args = parser.parse_args()
+    args.format = args.format or detect_format(args.path)
+    if args.speed <= 0:
+        parser.error("--speed must be positive")
+
+    if args.replay:
+        asyncio.run(replay(args))
+    else:
+        bulk_load(args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Create upcoming damage_reports partitions and archive expired ones.
+
+The API runs this periodically on its own; the script is for cron jobs
+and for running retention by hand, e.g. with a shorter window:
+
+    python manage_partitions.py --retention-hours 48 --archive-dir /var/lib/aidr/archive
+"""
+import argparse
+import sys
+import os
+from datetime import datetime, timedelta, timezone
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.config import settings
+from app.core.database import engine
+from app.core.partitions import archive_expired_partitions, ensure_default_partition, ensure_partitions
+
+def main():
+    parser = argparse.ArgumentParser(description="damage_reports partition maintenance")
+    parser.add_argument("--days-ahead", type=int, default=settings.partition_premake_days)
+    parser.add_argument("--retention-hours", type=int, default=settings.damage_report_retention_hours)
+    parser.add_argument("--archive-dir", default=settings.partition_archive_dir)
+    parser.add_argument("--skip-archive", action="store_true", help="only create upcoming partitions")
+    args = parser.parse_args()
+
+    today = datetime.now(timezone.utc).date()
+    with engine.begin() as conn:
+        ensure_default_partition(conn)
+        created = ensure_partitions(conn, today, today + timedelta(days=args.days_ahead))
+    print(f"🗂️ Created partitions: {created or 'none'}")
+
+    if not args.skip_archive:
+        archived = archive_expired_partitions(engine, args.retention_hours, args.archive_dir)
+        print(f"📦 Archived partitions: {archived or 'none'}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+import pytest
+
+from app.api import endpoints
+from app.core.admission import ChatterLimiter
+
+@pytest.fixture
+def ws_depth(monkeypatch):
+    """A limiter allowing a burst of two updates per agent, fed a settable send-queue depth"""
+    depth = {"max": 0}
+    limiter = ChatterLimiter("/api/v1/agent-update", rate=0.001, burst=2,
+                             load=lambda: depth["max"], shed_load=10)
+    monkeypatch.setattr(endpoints, "agent_update_limiter", limiter)
+    return depth
+
+def post_update(client, status, agent_type="social_media"):
+    return client.post("/api/v1/agent-update",
+                       json={"agent_type": agent_type, "status": status, "message": status})
+
+def test_chatter_beyond_an_agents_rate_is_shed(client, ws_depth):
+    assert [post_update(client, "processing").status_code for _ in range(3)] == [200, 200, 429]
+    refused = post_update(client, "processing")
+    assert int(refused.headers["Retry-After"]) >= 1
+    # Other agents have their own budget, and results still go out
+    assert post_update(client, "processing", agent_type="damage_assessment").status_code == 200
+    assert post_update(client, "error").status_code == 200
+    assert post_update(client, "completed").status_code == 200
+
+def test_chatter_is_shed_while_clients_are_backed_up(client, ws_depth):
+    ws_depth["max"] = 10
+    assert post_update(client, "processing").status_code == 429
+    assert post_update(client, "error").status_code == 200
+    assert post_update(client, "completed").status_code == 200
+    ws_depth["max"] = 0
+    assert post_update(client, "processing").status_code == 200
@@ -0,0 +1,19 @@
+import asyncio
+
+from app.core.event_log import EventLog
+
+def appended_log(count):
+    log = EventLog(buffer_size=10)
+    for _ in range(count):
+        log.append({"type": "damage_report"})
+    return log
+
+def test_missed_events_are_replayed_from_the_ring():
+    log = appended_log(5)
+    assert [event["seq"] for event in asyncio.run(log.events_between(2, 5))] == [3, 4, 5]
+
+def test_client_at_head_gets_nothing():
+    assert asyncio.run(appended_log(5).events_between(5, 5)) == []
+
+def test_client_ahead_of_head_must_resync():
+    assert asyncio.run(appended_log(5).events_between(9, 5)) is None
@@ -0,0 +1,24 @@
+import pytest
+
+from agents.gazetteer import get_gazetteer
+
+@pytest.mark.parametrize("mention", ["street", "my street", "st", "park", "near the park", "avenue",
+                                     "west", "the", "e", "by the bridge", "jones street"])
+def test_generic_mentions_resolve_to_nothing(mention):
+    assert get_gazetteer().resolve(mention) is None
+
+@pytest.mark.parametrize("mention, name", [
+    ("Canal St", "Canal Street"),
+    ("collapse on canal street", "Canal Street"),
+    ("5th ave", "Fifth Avenue"),
+    ("the bronx", "The Bronx"),
+    ("central prk", "Central Park"),
+    ("times", "Times Square"),
+])
+def test_named_places_resolve(mention, name):
+    assert get_gazetteer().resolve(mention).name == name
+
+def test_partial_matches_score_below_exact():
+    gazetteer = get_gazetteer()
+    assert gazetteer.resolve("Times Square").score == 1.0
+    assert gazetteer.resolve("times").score < 0.5
@@ -0,0 +1,30 @@
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import numpy as np
+
+from app.core.heatmap import SeverityField, SeverityFields
+
+def loaded_fields(loaded_ids):
+    fields = SeverityFields()
+    field = SeverityField(40.7, -74.0, radius_km=5, size=64, sigma_meters=200, half_life_seconds=1800)
+    field.loaded_ids = np.sort(np.array(loaded_ids, dtype=np.int64))
+    field.loaded_ids_expire_at = time.monotonic() + 60
+    fields._fields[1] = field
+    return fields, field
+
+def report(report_id):
+    return SimpleNamespace(id=report_id, disaster_id=1, latitude=40.7, longitude=-74.0, severity=8,
+                           confidence=0.9, created_at=datetime.now(timezone.utc))
+
+def test_loaded_report_is_not_added_twice():
+    fields, field = loaded_fields([10, 12])
+    fields.record(report(12))
+    assert field.reports == 0
+
+def test_report_committed_after_load_with_lower_id_is_added():
+    # id 11 was allocated before 12 but committed after the load read 12
+    fields, field = loaded_fields([10, 12])
+    fields.record(report(11))
+    assert field.reports == 1
@@ -0,0 +1,75 @@
+import asyncio
+import functools
+
+import httpx
+import pytest
+
+from agents import job_worker
+from app.crud import jobs as job_crud
+
+WORKER_ID = "test-worker"
+
+@pytest.fixture
+def lease_calls(monkeypatch):
+    """Queue updates the worker makes, recorded instead of run against Postgres"""
+    calls = []
+
+    def record(fn, *args, **kwargs):
+        calls.append((fn, args))
+        return True
+
+    monkeypatch.setattr(job_worker, "_with_session", record)
+    return calls
+
+@pytest.fixture
+def api_status(monkeypatch):
+    """Serve every agent API call with the status set on the returned dict"""
+    status = {"code": 200}
+
+    def respond(request):
+        if request.url.path.endswith("/incidents/"):
+            return httpx.Response(status["code"], json=[])
+        return httpx.Response(status["code"], json={})
+
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setattr(httpx, "AsyncClient",
+                        functools.partial(httpx.AsyncClient, transport=httpx.MockTransport(respond)))
+    return status
+
+def run_job(kind, payload, attempts=1):
+    worker = job_worker.JobWorker(WORKER_ID, visibility_timeout=30)
+    job = {"id": 7, "kind": kind, "payload": payload, "attempts": attempts, "max_attempts": 5}
+    asyncio.run(worker.run_job(job))
+
+def test_failed_api_call_requeues_job(lease_calls, api_status):
+    api_status["code"] = 503
+    run_job("assess_disaster", {"disaster_id": 1}, attempts=2)
+
+    [(fn, args)] = lease_calls
+    assert fn is job_crud.fail_job
+    job_id, worker_id, error, attempts = args
+    assert (job_id, worker_id, attempts) == (7, WORKER_ID, 2)
+    assert "503" in error
+
+def test_failed_llm_call_requeues_job(lease_calls, api_status, monkeypatch):
+    def unavailable(*args, **kwargs):
+        raise RuntimeError("LLM unavailable")
+
+    monkeypatch.setattr("agents.social_media_agent.chat_completion", unavailable)
+    run_job("analyze_post", {"text": "Bridge collapsed downtown"})
+
+    [(fn, args)] = lease_calls
+    assert fn is job_crud.fail_job
+    assert "LLM unavailable" in args[2]
+
+def test_unknown_kind_requeues_job(lease_calls):
+    run_job("no_such_kind", {})
+
+    [(fn, args)] = lease_calls
+    assert fn is job_crud.fail_job
+    assert "No handler" in args[2]
+
+def test_successful_job_completes(lease_calls, api_status):
+    run_job("assess_disaster", {"disaster_id": 1})
+
+    assert lease_calls == [(job_crud.complete_job, (7, WORKER_ID))]
@@ -0,0 +1,39 @@
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.metrics import route_label
+
+def served_labels(*paths):
+    router = APIRouter()
+    labels = []
+
+    @router.post("/agents/stop/{agent_type}")
+    def stop_agent(agent_type: str):
+        return {}
+
+    @router.get("/tasks/{task_id}")
+    def get_task(task_id: int):
+        return {}
+
+    app = FastAPI()
+    app.include_router(router, prefix="/api/v1")
+
+    @app.middleware("http")
+    async def record_label(request, call_next):
+        response = await call_next(request)
+        labels.append(route_label(request.scope))
+        return response
+
+    client = TestClient(app)
+    for method, path in paths:
+        client.request(method, path)
+    return labels
+
+def test_route_label_is_the_prefixed_template():
+    assert served_labels(("POST", "/api/v1/agents/stop/v1"), ("GET", "/api/v1/tasks/1")) == [
+        "/api/v1/agents/stop/{agent_type}",
+        "/api/v1/tasks/{task_id}",
+    ]
+
+def test_route_label_of_unmatched_request():
+    assert served_labels(("GET", "/api/v1/nothing")) == ["unmatched"]
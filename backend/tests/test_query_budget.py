@@ -0,0 +1,4 @@
+def test_agent_status_runs_no_sql(client, query_budget):
+    with query_budget(0):
+        response = client.get("/api/v1/agents/status")
+    assert response.status_code == 200
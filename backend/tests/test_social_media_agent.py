@@ -0,0 +1,36 @@
+import asyncio
+import functools
+import json
+
+import httpx
+import pytest
+
+from agents.social_media_agent import SocialMediaAgent
+
+@pytest.fixture
+def filed_reports(monkeypatch):
+    """Damage reports the agent POSTs, captured instead of sent"""
+    reports = []
+
+    def respond(request):
+        reports.append(json.loads(request.content))
+        return httpx.Response(200, json={"id": len(reports)})
+
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setattr(httpx, "AsyncClient",
+                        functools.partial(httpx.AsyncClient, transport=httpx.MockTransport(respond)))
+    return reports
+
+def file_report(location_mentioned):
+    analysis = {"is_disaster_related": True, "confidence": 0.8, "severity": 7,
+                "damage_type": "structural_damage", "location_mentioned": location_mentioned}
+    asyncio.run(SocialMediaAgent().create_damage_report(analysis, "Building collapsed"))
+
+def test_partial_place_match_keeps_more_confidence_than_no_match(filed_reports):
+    file_report("Building collapse on Main St near the bridge")
+    file_report("somewhere over there")
+    located, unplaced = filed_reports
+
+    assert "Main Street" in located["description"]
+    assert located["confidence"] == 0.8
+    assert located["confidence"] > unplaced["confidence"]
@@ -0,0 +1,34 @@
+import asyncio
+
+import pytest
+
+from app.core.supervisor import AgentAlreadyRunning, AgentSupervisor
+
+async def idle_runner(agent_type, **shard):
+    await asyncio.sleep(10)
+
+def test_unscoped_run_shares_its_default_disaster_shard():
+    async def scenario():
+        supervisor = AgentSupervisor(runner=idle_runner)
+        supervisor.start("damage_assessment")
+        try:
+            with pytest.raises(AgentAlreadyRunning):
+                supervisor.start("damage_assessment", disaster_id=1)
+            supervisor.start("damage_assessment", disaster_id=2)
+            assert supervisor.is_running("damage_assessment", disaster_id=1)
+        finally:
+            await supervisor.shutdown()
+
+    asyncio.run(scenario())
+
+def test_unscoped_planning_runs_beside_disaster_shards():
+    async def scenario():
+        supervisor = AgentSupervisor(runner=idle_runner)
+        supervisor.start("resource_planning")
+        try:
+            supervisor.start("resource_planning", disaster_id=1)
+            assert supervisor.status()["resource_planning"]["disaster_id"] is None
+        finally:
+            await supervisor.shutdown()
+
+    asyncio.run(scenario())
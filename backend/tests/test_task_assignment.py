@@ -0,0 +1,54 @@
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.crud import disaster as crud
+
+class Result:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def first(self):
+        return self.rows[0] if self.rows else None
+
+class RecordingSession:
+    """Answers each execute() with the next canned rows and records the SQL"""
+
+    def __init__(self, *results):
+        self.results = list(results)
+        self.statements = []
+        self.committed = self.rolled_back = False
+
+    def execute(self, statement, params=None):
+        self.statements.append(str(statement.compile(dialect=postgresql.dialect())))
+        return Result(self.results.pop(0))
+
+    def commit(self):
+        self.committed = True
+
+    def rollback(self):
+        self.rolled_back = True
+
+def test_task_assigned_by_another_planner_is_not_overwritten():
+    # Resources 3 and 4 are claimed, but the task is no longer pending
+    db = RecordingSession([SimpleNamespace(id=3), SimpleNamespace(id=4)], [], [SimpleNamespace(status="assigned")])
+    with pytest.raises(crud.TaskNotPending):
+        crud.assign_resources_to_task(db, task_id=9, resource_ids=[3, 4])
+
+    assert "tasks.status = %(status_1)s" in db.statements[1]
+    assert db.rolled_back and not db.committed
+
+def test_unknown_task_releases_claim():
+    db = RecordingSession([SimpleNamespace(id=3)], [], [])
+    assert crud.assign_resources_to_task(db, task_id=9, resource_ids=[3]) is None
+    assert db.rolled_back and not db.committed
+
+def test_taken_resource_fails_before_touching_the_task():
+    db = RecordingSession([SimpleNamespace(id=3)])
+    with pytest.raises(crud.ResourceUnavailable):
+        crud.assign_resources_to_task(db, task_id=9, resource_ids=[3, 4])
+    assert len(db.statements) == 1 and db.rolled_back
@@ -1,9 +1,20 @@
 import { useEffect, useRef } from 'react';
 import { useEmergencyStore } from '../state/emergencyStore';
 
-export const useWebSocket = (url: string) => {
+interface UseWebSocketOptions {
+  // Called when the server can't replay the events missed while
+  // disconnected; the caller should refetch its lists
+  onResync?: () => void;
+}
+
+export const useWebSocket = (url: string, { onResync }: UseWebSocketOptions = {}) => {
   const ws = useRef<WebSocket | null>(null);
   const reconnectTimeoutRef = useRef<NodeJS.Timeout>();
+  // Last broadcast seq seen, so a reconnect only replays what was missed
+  const lastSeqRef = useRef<number | null>(null);
+  // Latest callback, so a new one doesn't force a reconnect
+  const onResyncRef = useRef(onResync);
+  onResyncRef.current = onResync;
   const { 
     addIncident, 
     updateResource, 
@@ -15,7 +26,10 @@ export const useWebSocket = (url: string) => {
   const connect = () => {
     try {
       setWebSocketStatus('connecting');
-      ws.current = new WebSocket(url);
+      const since = lastSeqRef.current;
+      ws.current = new WebSocket(
+        since === null ? url : `${url}${url.includes('?') ? '&' : '?'}since=${since}`
+      );
 
       ws.current.onopen = () => {
         console.log('WebSocket connected');
@@ -29,6 +43,15 @@ export const useWebSocket = (url: string) => {
       ws.current.onmessage = (event) => {
         try {
           const message = JSON.parse(event.data);
+          if (typeof message.seq === 'number') {
+            lastSeqRef.current = message.seq;
+          }
+          if (message.type === 'resync_required') {
+            // Missed events are gone, so refetch the lists to catch up
+            console.log('WebSocket replay unavailable, resyncing from seq', message.seq);
+            onResyncRef.current?.();
+            return;
+          }
           
           switch (message.event_type) {
             case 'NEW_INCIDENT':